@@ -0,0 +1,144 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Hashable, List, Tuple
+
+from bot.intents import Intent
+from bot.nlp_processor import ParsedQuery
+
+# Дешевые интенты: ответ из stats_counters, один COUNT по индексу или
+# вообще без базы. В очереди они идут вперед тяжелых (приросты, суммы
+# просмотров за период), чтобы быстрые вопросы не ждали медленные.
+CHEAP_INTENTS = frozenset({
+    Intent.TOTAL_VIDEOS,
+    Intent.NEGATIVE_VIEWS_SNAPSHOTS,
+    Intent.VIDEOS_BY_CREATOR,
+    Intent.VIDEOS_BY_CREATOR_WITH_VIEWS,
+    Intent.UNIQUE_PUBLISHING_DAYS,
+    Intent.UNKNOWN,
+})
+
+PRIORITY_CHEAP = 0
+PRIORITY_HEAVY = 1
+
+
+def query_priority(parsed_query: ParsedQuery) -> int:
+    """Приоритет запроса в очереди (меньше — раньше)."""
+    if parsed_query.intent in CHEAP_INTENTS:
+        return PRIORITY_CHEAP
+    if parsed_query.intent == Intent.VIDEOS_BY_VIEWS and not parsed_query.unique_creators:
+        return PRIORITY_CHEAP
+    return PRIORITY_HEAVY
+
+
+class Overloaded(Exception):
+    """Запрос не принят: reason — 'chat' (лимит чата) или 'queue' (очередь полна)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Контроль входа запросов к базе.
+
+    - chat(chat_id): не больше chat_limit вопросов одного чата в работе
+      одновременно, лишние сразу отклоняются;
+    - slot(priority): не больше concurrency запросов к базе одновременно,
+      остальные ждут в очереди с приоритетом (дешевые интенты первыми,
+      внутри приоритета — по порядку прихода). Очередь ограничена
+      queue_size: при переполнении запрос отклоняется (Overloaded), и бот
+      отвечает "занят" вместо того, чтобы копить задачи без предела.
+
+    Работает в одном event loop и без блокировок: состояние меняется только
+    из корутин этого loop.
+    """
+
+    def __init__(self, concurrency: int, queue_size: int, chat_limit: int):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.chat_limit = chat_limit
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._chats: Dict[Hashable, int] = {}
+        self.running = 0
+        # Счетчики
+        self.admitted = 0
+        self.shed_chat = 0
+        self.shed_queue = 0
+        self.max_queue_depth = 0
+
+    @contextmanager
+    def chat(self, chat_id: Hashable):
+        """Учет вопросов чата в работе; Overloaded('chat'), если лимит исчерпан."""
+        in_flight = self._chats.get(chat_id, 0)
+        if in_flight >= self.chat_limit:
+            self.shed_chat += 1
+            raise Overloaded('chat')
+        self._chats[chat_id] = in_flight + 1
+        try:
+            yield
+        finally:
+            if self._chats[chat_id] <= 1:
+                del self._chats[chat_id]
+            else:
+                self._chats[chat_id] -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_HEAVY):
+        """Место для запроса к базе; ждет в очереди или бросает Overloaded('queue')."""
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int):
+        if self.running < self.concurrency and not self._queue:
+            self.running += 1
+            self.admitted += 1
+            return
+        if len(self._queue) >= self.queue_size:
+            self.shed_queue += 1
+            raise Overloaded('queue')
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), waiter))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Место уже передано этой задаче — отдаем следующей
+                self._release()
+            else:
+                self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+                heapq.heapify(self._queue)
+            raise
+        self.admitted += 1
+
+    def _release(self):
+        # Место переходит первому ожидающему, running не меняется
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'running': self.running,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'chats_in_flight': len(self._chats),
+            'admitted': self.admitted,
+            'shed_chat': self.shed_chat,
+            'shed_queue': self.shed_queue,
+        }
@@ -0,0 +1,219 @@
+import logging
+from datetime import timedelta
+
+from bot.intents import Intent
+from bot.nlp_processor import ParsedQuery
+from bot.temporal import Period
+from database.query_manager import QueryManager
+
+logger = logging.getLogger(__name__)
+
+
+class QueryAnswerer:
+    """
+    Ответ на разобранный вопрос: запросы к QueryManager и текст ответа.
+    Общий для бота (bot/handlers.py) и пакетной обработки (bulk_answer.py).
+    Методы синхронные: бот вызывает их в пуле потоков.
+    """
+
+    def __init__(self, query_manager: QueryManager):
+        self.query_manager = query_manager
+
+    def answer(self, parsed_query: ParsedQuery) -> str:
+        """Ответ на распарсенный запрос (синхронно, с запросами к базе)."""
+        
+        if parsed_query.intent == Intent.TOTAL_VIDEOS:
+            count = self.query_manager.get_total_videos()
+            return f"{count}"
+
+        if parsed_query.intent == Intent.TOTAL_VIEWS_ALL_VIDEOS_PERIOD:
+            start_date = parsed_query.start_date
+            end_date = parsed_query.end_date or start_date
+        
+            if not start_date:
+                return "❌ Не указан период."
+        
+            # Получаем суммарные просмотры всех видео за период
+            total_views = self.query_manager.get_total_views_for_all_videos_period(start_date, end_date)
+        
+            # Один день — без разделителей разрядов, месяц или диапазон — с ними
+            if start_date == end_date:
+                return f"{total_views}"
+            return f"{total_views:,}"
+    
+        if parsed_query.intent == Intent.TOTAL_VIEWS_PERIOD:
+            creator_id = parsed_query.creator_id
+            start_date = parsed_query.start_date
+            start_time = parsed_query.start_time
+            end_time = parsed_query.end_time
+
+            # Если нет ID креатора, но есть дата - это запрос про все видео
+            if not creator_id and start_date:
+                end_date = parsed_query.end_date or start_date
+            
+                if start_time and end_time:
+                    # Это запрос про прирост просмотров всех видео в интервале времени
+                    return "❌ Для запроса с временным интервалом нужен ID креатора."
+                else:
+                    # Это запрос про суммарные просмотры всех видео за период
+                    total_views = self.query_manager.get_total_views_for_all_videos_period(start_date, end_date)
+                    return f"{total_views}"
+
+            if not creator_id:
+                return "❌ Не указан ID креатора."
+        
+            if not start_date:
+                return "❌ Не указана дата."
+        
+            if not start_time or not end_time:
+                return "❌ Не указан временной интервал."
+        
+            # Если указана конечная дата, используем ее, иначе используем начальную
+            end_date = parsed_query.end_date or start_date
+        
+            growth = 0
+            # Если начальная и конечная даты одинаковые, считаем для одного дня
+            if start_date == end_date:
+                growth = self.query_manager.get_total_views_growth_for_creator_with_time_period(
+                    creator_id, start_date, start_time, end_time
+                )
+            else:
+                # Для диапазона дней считаем для каждого дня отдельно
+                current_date = start_date
+                while current_date <= end_date:
+                    daily_growth = self.query_manager.get_total_views_growth_for_creator_with_time_period(
+                        creator_id, current_date, start_time, end_time
+                    )
+                    growth += daily_growth
+                    current_date += timedelta(days=1)
+            return f"{growth}"
+
+        elif parsed_query.intent == Intent.UNIQUE_PUBLISHING_DAYS:
+            creator_id = parsed_query.creator_id
+            start_date = parsed_query.start_date
+            end_date = parsed_query.end_date
+
+            if not start_date or not end_date:
+                return "❌ Для подсчета дней публикации нужно указать период."
+
+            unique_days = self.query_manager.get_unique_publishing_days_for_creator(
+                creator_id, start_date, end_date
+            )
+            return f"{unique_days}"
+
+        elif parsed_query.intent == Intent.NEGATIVE_VIEWS_SNAPSHOTS:
+            count = self.query_manager.get_negative_views_snapshots_count()
+            return f"{count}"
+    
+        elif parsed_query.intent == Intent.VIDEOS_BY_CREATOR:
+            creator_id = parsed_query.creator_id
+            start_date = parsed_query.start_date
+            end_date = parsed_query.end_date
+            logger.debug("🔍 Поиск видео для creator_id=%s, start_date=%s, end_date=%s",
+                         creator_id, start_date, end_date)
+            
+            if not creator_id:
+                return "❌ Не указан ID креатора. Пример: 'Сколько видео у креатора с id user123?'"
+            
+            count = self.query_manager.get_videos_by_creator(
+                creator_id, start_date, end_date
+            )
+            # Диагностика — лишний запрос к базе: только при LOG_LEVEL=DEBUG и если видео нашлись
+            # (неизвестный креатор — 0 без запроса к базе)
+            if count and logger.isEnabledFor(logging.DEBUG):
+                try:
+                    conn = self.query_manager._get_connection()
+                    cursor = conn.cursor()
+        
+                    # Выполняем тот же запрос что и в get_videos_by_creator
+                    query = "SELECT id, video_created_at FROM videos WHERE creator_id = %s"
+                    params = [creator_id]
+        
+                    if start_date:
+                        query += " AND video_created_at >= %s"
+                        params.append(Period.from_dates(start_date, start_date).start)
+        
+                    if end_date:
+                        query += " AND video_created_at < %s"
+                        params.append(Period.from_dates(end_date, end_date).end)
+        
+                    cursor.execute(query, params)
+                    videos = cursor.fetchall()
+        
+                    # Весь список не логируется: первые записи и их число
+                    logger.debug("📊 Найдено видео: %d, первые: %s", len(videos), videos[:5])
+        
+                    cursor.close()
+                    conn.close()
+                except Exception as e:
+                    logger.error("Ошибка при проверке запроса: %s", e)
+            return f"{count}"
+        
+        elif parsed_query.intent == Intent.VIDEOS_BY_VIEWS:
+            min_views = parsed_query.min_views or 100000
+
+            if parsed_query.unique_creators:
+                # Это запрос об уникальных креаторах
+                count = self.query_manager.get_unique_creators_with_high_views(min_views)
+                return f"{count}"
+            else:
+                count = self.query_manager.get_videos_with_views_above(min_views)
+                return f"{count}"
+        
+        elif parsed_query.intent == Intent.TOTAL_GROWTH:
+            start_date = parsed_query.start_date
+            end_date = parsed_query.end_date or start_date
+    
+            if not start_date:
+                # Пытаемся получить последнюю дату из данных
+                try:
+                    # Проверяем есть ли данные вообще
+                    conn = self.query_manager._get_connection()
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT MAX(DATE(created_at)) FROM video_snapshots WHERE delta_views_count > 0")
+                    result = cursor.fetchone()
+                    cursor.close()
+                    conn.close()
+            
+                    if result and result[0]:
+                        start_date = end_date = result[0]
+                    else:
+                        return "❌ В данных нет информации о приросте просмотров"
+                
+                except Exception as e:
+                    logger.error("Ошибка при получении даты: %s", e)
+                    return "❌ Не удалось определить дату для анализа"
+    
+            growth = self.query_manager.get_total_views_growth_for_period(start_date, end_date)
+            return f"{growth}"
+        
+        elif parsed_query.intent == Intent.UNIQUE_GROWTH:
+            start_date = parsed_query.start_date
+            if not start_date:
+                return "❌ Не указана дата. Пример: 'Сколько видео получали просмотры вчера?'"
+            
+            count = self.query_manager.get_unique_videos_with_growth_for_period(
+                start_date, parsed_query.end_date or start_date
+            )
+            return f"{count:,}"
+        
+        elif parsed_query.intent == Intent.VIDEOS_BY_CREATOR_WITH_VIEWS:
+            creator_id = parsed_query.creator_id
+            min_views = parsed_query.min_views or 10000
+    
+            if not creator_id:
+                return "❌ Не указан ID креатора. Пример: 'Сколько видео у креатора с id abc123 набрало больше 10000 просмотров?'"
+    
+            count = self.query_manager.get_videos_by_creator_with_views(creator_id, min_views)
+            return f"{count}"
+        
+        else:
+            # Для unknown запросов даем подсказки
+            return (
+                "🤔 Не удалось распознать запрос.\n\n"
+                "Попробуйте один из примеров:\n"
+                "• Сколько всего видео?\n"
+                "• Видео креатора id 123\n"
+                "• Видео с >50000 просмотров\n"
+                "• Прирост просмотров за вчера"
+            )
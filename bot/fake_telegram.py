@@ -0,0 +1,123 @@
+"""
+Фейковый Telegram Bot API для локальной проверки webhook-режима.
+
+Сервер отвечает на вызовы методов бота и запоминает отправленные
+сообщения; он же отправляет в webhook бота обновления с текстом:
+
+    python -m bot.fake_telegram --port 8082
+    TELEGRAM_API_URL=http://127.0.0.1:8082 BOT_MODE=webhook WEBHOOK_SECRET=s python main.py
+    python -m bot.fake_telegram --send "Сколько всего видео?" --webhook http://127.0.0.1:8080/webhook --secret s
+
+GET /sent возвращает отправленные ботом сообщения.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Video Stats Bot', 'username': 'video_stats_bot'}
+TEST_USER = {'id': 100, 'is_bot': False, 'first_name': 'Test'}
+TEST_CHAT = {'id': 100, 'type': 'private', 'first_name': 'Test'}
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+
+
+def make_update(text: str, chat: Dict[str, Any] = TEST_CHAT) -> Dict[str, Any]:
+    """Обновление с текстовым сообщением, как его присылает Telegram."""
+    return {
+        'update_id': next(_update_ids),
+        'message': {
+            'message_id': next(_message_ids),
+            'date': int(time.time()),
+            'chat': chat,
+            'from': TEST_USER,
+            'text': text,
+        },
+    }
+
+
+def create_app(sent: Optional[List[Dict[str, Any]]] = None) -> web.Application:
+    """Bot API: /bot<token>/<метод>; sendMessage запоминается, остальное — успех."""
+    sent = sent if sent is not None else []
+
+    async def method_handler(request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        if request.content_type == 'application/json':
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': BOT_USER})
+        if method == 'sendMessage':
+            chat_id = int(params.get('chat_id', TEST_CHAT['id']))
+            message = {
+                'message_id': next(_message_ids),
+                'date': int(time.time()),
+                'chat': {**TEST_CHAT, 'id': chat_id},
+                'from': BOT_USER,
+                'text': params.get('text', ''),
+            }
+            sent.append(message)
+            logger.info(f"📤 sendMessage → {chat_id}: {message['text']!r}")
+            return web.json_response({'ok': True, 'result': message})
+        return web.json_response({'ok': True, 'result': True})
+
+    async def sent_handler(request: web.Request) -> web.Response:
+        return web.json_response(sent)
+
+    app = web.Application()
+    app.router.add_post('/bot{token}/{method}', method_handler)
+    app.router.add_get('/sent', sent_handler)
+    return app
+
+
+async def send_update(webhook_url: str, text: str, secret: Optional[str] = None) -> int:
+    """POST обновления в webhook бота; возвращает HTTP статус ответа."""
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    async with aiohttp.ClientSession() as session:
+        async with session.post(webhook_url, json=make_update(text), headers=headers) as response:
+            return response.status
+
+
+async def serve(host: str, port: int):
+    runner = web.AppRunner(create_app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Фейковый Bot API на http://{host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Фейковый Telegram Bot API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8082)
+    parser.add_argument('--send', help="Отправить в webhook обновление с этим текстом и выйти")
+    parser.add_argument('--webhook', default='http://127.0.0.1:8080/webhook', help="Адрес webhook бота")
+    parser.add_argument('--secret', help="Секрет webhook (WEBHOOK_SECRET)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        if args.send:
+            status = asyncio.run(send_update(args.webhook, args.send, args.secret))
+            print(json.dumps({'status': status}))
+        else:
+            asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n⏹️ Фейковый Bot API остановлен")
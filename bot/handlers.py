@@ -1,31 +1,63 @@
 import logging
 import asyncio
-import re
+import os
+from concurrent.futures import ThreadPoolExecutor
+import time as clock
 from datetime import datetime, date, time, timedelta
-from typing import Optional, Tuple
-import calendar
+from typing import List, Optional
 from aiogram import Bot, Dispatcher, types
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
+from bot.admission import AdmissionController, Overloaded, query_priority
+from bot.answers import QueryAnswerer
+from bot.intents import Intent
+from bot.metrics import (ERRORS, REGISTRY, REQUESTS, STAGE_SECONDS, RequestTimer, TimedQueryManager,
+                         query_time, reset_query_time)
 from bot.nlp_processor import NLPProcessor, ParsedQuery
+from bot.sender import OutboundSender
+from bot.single_flight import SingleFlight
+from config.config import Config
 from database.query_manager import QueryManager
 
-logging.basicConfig(level=logging.INFO)
+# Вывод логов настраивается в main.py (bot/logging_setup.py)
 logger = logging.getLogger(__name__)
 
+# Сколько вопросов (строк) одного сообщения обрабатывается, остальные отбрасываются
+MAX_QUESTIONS_PER_MESSAGE = 20
+
 class VideoStatsBot:
-    def __init__(self, token: str):
+    def __init__(self, token: str, api_url: Optional[str] = None):
         self.token = token
+        # api_url — другой сервер Bot API (например, фейковый для локальной проверки)
+        session = AiohttpSession(api=TelegramAPIServer.from_base(api_url)) if api_url else None
         self.bot = Bot(
             token=token, 
+            session=session,
             default=DefaultBotProperties(parse_mode=ParseMode.HTML)
         )
         self.dp = Dispatcher(storage=MemoryStorage())
         self.nlp = NLPProcessor()
         self.query_manager = QueryManager()
+        # Время методов QueryManager идет в метрики (bot_db_query_seconds)
+        self.answerer = QueryAnswerer(TimedQueryManager(self.query_manager))
+        self.single_flight = SingleFlight()
+        self.admission = AdmissionController(
+            Config.WORK_CONCURRENCY, Config.WORK_QUEUE_SIZE, Config.CHAT_MAX_IN_FLIGHT
+        )
+        # Потоки для запросов к базе: по одному на место в очереди (у asyncio.to_thread
+        # их min(32, CPU + 4), и вопросы одного сообщения шли бы не все параллельно)
+        self._db_executor = ThreadPoolExecutor(Config.WORK_CONCURRENCY, thread_name_prefix='db')
+        self.sender = OutboundSender(self.bot, Config.SEND_GLOBAL_RATE, Config.SEND_CHAT_RATE)
+        self._dataset_watcher: Optional[asyncio.Task] = None
+        self._metrics_runner: Optional[web.AppRunner] = None
+        REGISTRY.add_collector(self._collect_metrics)
         self._register_handlers()
     
     def _register_handlers(self):
@@ -33,54 +65,40 @@ class VideoStatsBot:
         self.dp.message.register(self.start_handler, Command(commands=["start"]))
         self.dp.message.register(self.help_handler, Command(commands=["help"]))
         self.dp.message.register(self.message_handler)
-    
-    def _extract_month_year_from_text(self, text: str) -> Optional[Tuple[date, date]]:
-        """Извлечение месяца и года из текста запроса."""    
-        text_lower = text.lower()
-        month_map = {
-            'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4,
-            'мая': 5, 'июня': 6, 'июля': 7, 'августа': 8,
-            'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12,
-            'январе': 1, 'феврале': 2, 'марте': 3, 'апреле': 4,
-            'мае': 5, 'июне': 6, 'июле': 7, 'августе': 8,
-            'сентябре': 9, 'октябре': 10, 'ноябре': 11, 'декабре': 12
-        }
-    
-        # Ищем любой месяц и год
-        for month_name, month_num in month_map.items():
-            patterns = [
-                rf'в\s+{month_name}\s+(\d{{4}})',
-                rf'за\s+{month_name}\s+(\d{{4}})',
-                rf'{month_name}\s+(\d{{4}})\s+года',
-                rf'{month_name}\s+(\d{{4}})',
-            ]
+        self.dp.startup.register(self._on_startup)
+        self.dp.shutdown.register(self._on_shutdown)
 
-            for pattern in patterns:
-                match = re.search(pattern, text_lower)
-                if match:
-                    try:
-                        year = int(match.group(1))
-                        last_day = calendar.monthrange(year, month_num)[1]
-                    
-                        start_date = date(year, month_num, 1)
-                        end_date = date(year, month_num, last_day)
-                    
-                        logger.info(f"📅 Извлечен {month_name} {year}: {start_date} - {end_date}")
-                        return start_date, end_date
-                    except Exception as e:
-                        logger.error(f"Ошибка извлечения даты: {e}")
-                        continue
-    
-        return None
+    async def _on_startup(self):
+        self.sender.start()
+        self._dataset_watcher = asyncio.create_task(self._watch_dataset_version())
 
-    def _get_last_day_of_month(self, any_date: date) -> date:
-        """Получить последний день месяца."""
-        # Первый день следующего месяца минус один день
-        if any_date.month == 12:
-            return date(any_date.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            return date(any_date.year, any_date.month + 1, 1) - timedelta(days=1)
+    async def _on_shutdown(self):
+        if self._dataset_watcher is not None:
+            self._dataset_watcher.cancel()
+        await self.sender.stop()
+        self._db_executor.shutdown(wait=False)
+
+    def _on_dataset_change(self):
+        """Данные в базе изменились: индексы и кэши процесса строятся заново."""
+        self.nlp.set_creator_index(self.query_manager.creator_index)
+        logger.info("🔄 Версия данных %s: индекс креаторов (%d) обновлен",
+                    self.query_manager.dataset_version, len(self.query_manager.creator_index or ()))
 
+    async def _watch_dataset_version(self):
+        """
+        Фоновая сверка версии данных. Каждый воркер сверяет ее сам, поэтому
+        после загрузки кэши сбрасываются во всех процессах без обмена сообщениями.
+        """
+        while True:
+            try:
+                changed = await asyncio.to_thread(self.query_manager.check_dataset_version, True)
+                # Индекс мог обновиться и при сверке внутри QueryManager
+                if changed or self.nlp.creator_index is not self.query_manager.creator_index:
+                    self._on_dataset_change()
+            except Exception as e:
+                logger.error("Ошибка сверки версии данных: %s", e)
+            await asyncio.sleep(Config.CREATOR_INDEX_TTL)
+    
     def _format_total_views_response(self, start_date: date, end_date: date, total_views: int) -> str:
         """Форматирование ответа для суммарных просмотров."""
         # Месяцы в предложном падеже
@@ -122,7 +140,7 @@ class VideoStatsBot:
         
         Просто напишите вопрос в чат!
         """
-        await message.answer(welcome_text)
+        self.sender.send(message.chat.id, welcome_text)
     
     async def help_handler(self, message: types.Message):
         """Обработчик команды /help."""
@@ -136,7 +154,9 @@ class VideoStatsBot:
         <b>Формат вопросов:</b>
         • Используйте естественный русский язык
         • Даты можно указывать как "28 ноября 2025" или "с 1 по 5 ноября 2025"
+        • Понимаются и относительные даты: "вчера", "за последние 7 дней", "на прошлой неделе"
         • В ответе вы получите одно число
+        • Несколько вопросов можно задать одним сообщением, по одному в строке
         
         <b>Примеры:</b>
         • "Сколько всего видео?"
@@ -144,380 +164,243 @@ class VideoStatsBot:
         • "Видео с >50000 просмотров"
         • "Прирост просмотров за вчера"
         """
-        await message.answer(help_text)
+        self.sender.send(message.chat.id, help_text)
     
     async def message_handler(self, message: types.Message):
         """Обработчик текстовых сообщений."""
         user_query = message.text
-        logger.info(f"Получен запрос: {user_query}")
+        logger.info("Получен запрос: %s", user_query, extra={'chat_id': message.chat.id})
         
+        timer = RequestTimer()
+        intent = 'unknown'
         try:
-            # ПРОВЕРКА: Если это запрос об уникальных днях, обрабатываем отдельно
-            user_query_lower = user_query.lower()
-            if 'разных календарных днях' in user_query_lower or 'публиковал хотя бы одно видео' in user_query_lower:
-                # Извлекаем ID креатора
-                import re
-                id_match = re.search(r'id\s+([a-f0-9]{32})', user_query_lower)
-                if id_match:
-                    creator_id = id_match.group(1)
-                
-                    # Извлекаем месяц и год
-                    from datetime import date
-                    month_map = {
-                        'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4,
-                        'мая': 5, 'июня': 6, 'июля': 7, 'августа': 8,
-                        'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12
-                    }
-                
-                    # Ищем например "ноября 2025"
-                    month_match = re.search(r'(' + '|'.join(month_map.keys()) + r')\s+(\d{4})', user_query_lower)
-                    if month_match:
-                        month_name = month_match.group(1)
-                        year = int(month_match.group(2))
-                        month = month_map[month_name]
-                    
-                        start_date = date(year, month, 1)
-                        if month == 12:
-                            end_date = date(year + 1, 1, 1) - timedelta(days=1)
-                        else:
-                            end_date = date(year, month + 1, 1) - timedelta(days=1)
-                    
-                        # Считаем уникальные дни
-                        unique_days = self.query_manager.get_unique_publishing_days_for_creator(
-                            creator_id, start_date, end_date
-                        )
-                    
-                        response = f"{unique_days}"
-                        await message.answer(response)
-                        logger.info(f"📤 Отправлен ответ: {response}")
-                        return
-            # Распознаем намерение пользователя
-            parsed_query = self.nlp.parse_query(user_query)
-            logger.info(f"🎯 Распознан интент: {parsed_query.intent}")
-            logger.info(f"📊 Параметры: {parsed_query.parameters}")
-            
-            # Дополнительная отладка для запросов с временем
-            if parsed_query.intent == "total_views_period":
-                logger.info(f"⏰ Время: {parsed_query.get('start_time')} - {parsed_query.get('end_time')}")
-                logger.info(f"📅 Дата: {parsed_query.get('start_date')} - {parsed_query.get('end_date')}")
-    
-            # Обрабатываем запрос
-            response = await self._process_parsed_query(parsed_query)
+            with self.admission.chat(message.chat.id):
+                # Несколько вопросов, по одному в строке, разбираются одним вызовом
+                questions = self._split_questions(user_query)
+                with timer.span('parse'):
+                    parsed_queries = self.nlp.parse_many(questions[:MAX_QUESTIONS_PER_MESSAGE])
+                intent = parsed_queries[0].intent.value if len(parsed_queries) == 1 else 'multi'
+                debug = logger.isEnabledFor(logging.DEBUG)
+                for parsed_query in parsed_queries:
+                    REQUESTS.inc(intent=parsed_query.intent.value)
+                    # parameters собирает словарь — только если DEBUG включен
+                    if debug:
+                        logger.debug("🎯 Распознан интент: %s, параметры: %s",
+                                     parsed_query.intent, parsed_query.parameters)
+
+                # Обрабатываем запрос
+                with timer.span('answer'):
+                    if len(parsed_queries) == 1:
+                        response = await self._process_parsed_query(parsed_queries[0])
+                    else:
+                        response = await self._process_many(parsed_queries)
+                if len(questions) > MAX_QUESTIONS_PER_MESSAGE:
+                    response += f"\n\n⚠️ Обработаны первые {MAX_QUESTIONS_PER_MESSAGE} вопросов."
             
-            # Отправляем ответ
-            await message.answer(response)
-            logger.info(f"📤 Отправлен ответ: {response[:50]}...")
+            # Ответ уходит в очередь отправки, обработчик сразу завершается
+            self.sender.send(message.chat.id, response)
+            timer.observe(intent)
+            logger.info("📤 Ответ в очереди: %.50s", response, extra={'intent': intent})
+
+        except Overloaded as e:
+            logger.warning("⏳ Запрос отклонен (%s), глубина очереди %d", e.reason, self.admission.queue_depth)
+            if e.reason == 'chat':
+                self.sender.send(message.chat.id, "⏳ Подождите ответа на предыдущие вопросы и спросите снова.")
+            else:
+                self.sender.send(message.chat.id, "⏳ Сейчас много запросов, повторите вопрос через минуту.")
             
         except Exception as e:
-            logger.error(f"Ошибка обработки запроса: {e}", exc_info=True)
+            ERRORS.inc(intent=intent)
+            logger.error("Ошибка обработки запроса: %s", e, exc_info=True)
             error_msg = (
                 "❌ Произошла ошибка при обработке запроса.\n"
                 "Попробуйте переформулировать вопрос или проверьте корректность данных."
             )
-            await message.answer(error_msg)
+            self.sender.send(message.chat.id, error_msg)
     
+    @staticmethod
+    def _split_questions(text: str) -> List[str]:
+        """Вопросы сообщения: непустые строки или весь текст."""
+        return [line.strip() for line in text.splitlines() if line.strip()] or [text]
+
+    async def _process_many(self, parsed_queries: List[ParsedQuery]) -> str:
+        """
+        Ответ на несколько вопросов одного сообщения: запросы к базе идут
+        параллельно (каждый в своем соединении пула), поэтому десять вопросов
+        отвечаются примерно за время самого долгого. Ответы — по порядку
+        вопросов; ошибка в одном вопросе не мешает остальным.
+        """
+        results = await asyncio.gather(
+            *(self._process_parsed_query(parsed_query) for parsed_query in parsed_queries),
+            return_exceptions=True,
+        )
+        lines = []
+        for number, (parsed_query, result) in enumerate(zip(parsed_queries, results), 1):
+            if isinstance(result, Overloaded):
+                result = "⏳ Сейчас много запросов, повторите вопрос позже."
+            elif isinstance(result, Exception):
+                ERRORS.inc(intent=parsed_query.intent.value)
+                logger.error("Ошибка обработки запроса %r: %s", parsed_query.original_query, result,
+                             exc_info=result)
+                result = "❌ Ошибка при обработке вопроса."
+            elif parsed_query.intent == Intent.UNKNOWN:
+                result = "🤔 Не удалось распознать вопрос."
+            lines.append(f"{number}. {result}")
+        return "\n".join(lines)
+
     async def _process_parsed_query(self, parsed_query: ParsedQuery) -> str:
-        """Обработка распарсенного запроса."""
-        
-        if parsed_query.intent == "total_videos":
-            count = self.query_manager.get_total_videos()
-            return f"{count}"
+        """
+        Обработка распарсенного запроса: запросы к базе идут в потоке и не
+        блокируют event loop, а одинаковые вопросы, заданные одновременно,
+        ждут один и тот же запрос (см. SingleFlight). Место в очереди к базе
+        (AdmissionController.slot) занимает только выполняющий запрос.
+        """
+        async def execute() -> str:
+            loop = asyncio.get_running_loop()
+            queued = loop.time()
+            async with self.admission.slot(query_priority(parsed_query)):
+                STAGE_SECONDS.observe(loop.time() - queued, stage='queue', intent=parsed_query.intent.value)
+                return await loop.run_in_executor(self._db_executor, self._answer, parsed_query)
 
-        if parsed_query.intent == "total_views_all_videos_period":
-            start_date = parsed_query.get("start_date")
-            end_date = parsed_query.get("end_date", start_date)
-        
-            if not start_date:
-                return "❌ Не указан период."
-        
-            # Получаем суммарные просмотры всех видео за период
-            total_views = self.query_manager.get_total_views_for_all_videos_period(start_date, end_date)
-        
-            if start_date == end_date:
-                date_str = start_date.strftime('%d %B %Y')
-                return f"{total_views}"
-            else:
-                # Если это месяц (первое и последнее число месяца)
-                if start_date.day == 1 and end_date == self._get_last_day_of_month(start_date):
-                    month_name = start_date.strftime('%B %Y').lower()
-                    return f"{total_views:,}"
-                else:
-                    date_str = f"с {start_date.strftime('%d %B %Y')} по {end_date.strftime('%d %B %Y')}"
-                    return f"{total_views:,}"
-    
-        if parsed_query.intent == "total_views_period":
-            creator_id = parsed_query.get("creator_id")
-            start_date = parsed_query.get("start_date")
-            start_time = parsed_query.get("start_time")
-            end_time = parsed_query.get("end_time")
+        # Версия данных в ключе: вопрос после перезагрузки не получит ответ по старым данным
+        key = (parsed_query.fingerprint, self.query_manager.dataset_version)
+        response = await self.single_flight.run(key, execute)
+        if self.single_flight.requests % 100 == 0:
+            logger.info("🔗 Схлопнуто запросов: %s, очередь: %s", self.single_flight.stats(), self.admission.stats())
+        return response
 
-            # Если нет ID креатора, но есть дата - это запрос про все видео
-            if not creator_id and start_date:
-                end_date = parsed_query.get("end_date", start_date)
-            
-                if start_time and end_time:
-                    # Это запрос про прирост просмотров всех видео в интервале времени
-                    return "❌ Для запроса с временным интервалом нужен ID креатора."
-                else:
-                    # Это запрос про суммарные просмотры всех видео за период
-                    total_views = self.query_manager.get_total_views_for_all_videos_period(start_date, end_date)
-                
-                    if start_date == end_date:
-                        date_str = start_date.strftime('%d %B %Y')
-                        return f"{total_views}"
-                    else:
-                        date_str = f"с {start_date.strftime('%d %B %Y')} по {end_date.strftime('%d %B %Y')}"
-                        return f"{total_views}"
+    def _answer(self, parsed_query: ParsedQuery) -> str:
+        """Ответ в потоке пула; время делится на запросы к базе (query) и остальное (format)."""
+        reset_query_time()
+        started = clock.perf_counter()
+        response = self.answerer.answer(parsed_query)
+        elapsed = clock.perf_counter() - started
+        intent = parsed_query.intent.value
+        STAGE_SECONDS.observe(query_time(), stage='query', intent=intent)
+        STAGE_SECONDS.observe(max(elapsed - query_time(), 0.0), stage='format', intent=intent)
+        return response
 
-            if not creator_id:
-                return "❌ Не указан ID креатора."
-        
-            if not start_date:
-                return "❌ Не указана дата."
-        
-            if not start_time or not end_time:
-                return "❌ Не указан временной интервал."
-        
-            # Если указана конечная дата, используем ее, иначе используем начальную
-            end_date = parsed_query.get("end_date", start_date)
-        
-            growth = 0
-            # Если начальная и конечная даты одинаковые, считаем для одного дня
-            if start_date == end_date:
-                growth = self.query_manager.get_total_views_growth_for_creator_with_time_period(
-                    creator_id, start_date, start_time, end_time
-                )
-            else:
-                # Для диапазона дней считаем для каждого дня отдельно
-                current_date = start_date
-                while current_date <= end_date:
-                    daily_growth = self.query_manager.get_total_views_growth_for_creator_with_time_period(
-                        creator_id, current_date, start_time, end_time
-                    )
-                    growth += daily_growth
-                    current_date += timedelta(days=1)
-        
-            time_period_str = f"с {start_time.strftime('%H:%M')} до {end_time.strftime('%H:%M')}"
-            if start_date == end_date:
-                date_str = start_date.strftime('%d %B %Y')
-                return f"{growth}"
-            else:
-                date_str = f"с {start_date.strftime('%d %B %Y')} по {end_date.strftime('%d %B %Y')}"
-                return f"{growth}"
+    def _collect_metrics(self):
+        """Состояние компонентов для GET /metrics."""
+        if self.nlp.cache is not None:
+            cache = self.nlp.cache.stats()
+            yield 'bot_parse_cache_hits_total', 'counter', "Попадания в кэш разборов", {}, cache['hits']
+            yield 'bot_parse_cache_misses_total', 'counter', "Промахи кэша разборов", {}, cache['misses']
+        flight = self.single_flight.stats()
+        yield 'bot_single_flight_executed_total', 'counter', "Выполненные запросы к базе", {}, flight['executed']
+        yield 'bot_single_flight_coalesced_total', 'counter', "Вопросы, дождавшиеся чужого запроса", {}, flight['coalesced']
+        yield 'bot_single_flight_in_flight', 'gauge', "Запросы к базе в полете", {}, flight['in_flight']
+        admission = self.admission.stats()
+        yield 'bot_queue_running', 'gauge', "Запросы к базе, занявшие место", {}, admission['running']
+        yield 'bot_queue_depth', 'gauge', "Запросы в очереди к базе", {}, admission['queue_depth']
+        yield 'bot_queue_max_depth', 'gauge', "Наибольшая глубина очереди к базе", {}, admission['max_queue_depth']
+        for reason in ('chat', 'queue'):
+            yield ('bot_shed_total', 'counter', "Отклоненные вопросы (лимит чата или полная очередь)",
+                   {'reason': reason}, admission[f'shed_{reason}'])
+        pool = self.query_manager.pool_stats()
+        yield 'bot_db_pool_in_use', 'gauge', "Занятые соединения пула", {}, pool['in_use']
+        yield 'bot_db_pool_size', 'gauge', "Размер пула соединений", {}, pool['size']
+        sender = self.sender.stats()
+        yield 'bot_sender_sent_total', 'counter', "Отправленные сообщения", {}, sender['sent']
+        yield 'bot_sender_batched_total', 'counter', "Ответы, склеенные с другими в одно сообщение", {}, sender['batched']
+        yield 'bot_sender_retry_after_total', 'counter', "Паузы по retry_after от Telegram", {}, sender['retry_after']
+        yield 'bot_sender_failed_total', 'counter', "Ответы, которые не удалось отправить", {}, sender['failed']
+        yield 'bot_sender_pending', 'gauge', "Ответы в очереди отправки", {}, sender['pending']
 
-        elif parsed_query.intent == "total_views_period":
-            creator_id = parsed_query.get("creator_id")
-            start_date = parsed_query.get("start_date")
-            end_date = parsed_query.get("end_date", start_date)
-            start_time = parsed_query.get("start_time")
-            end_time = parsed_query.get("end_time")
-            logger.info(f"📊 Суммарные просмотры за период: start_date={start_date}, end_date={end_date}")
-        
-            original_query_lower = parsed_query.original_query.lower()
+    async def _metrics_handler(self, request: web.Request) -> web.Response:
+        return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
 
-            # Проверяем, не является ли это запросом об уникальных днях публикации
-            is_unique_days_query = any(keyword in original_query_lower for keyword in [
-                'сколки разных календарных днях',
-                'в скольких днях',
-                'публиковал хотя бы одно видео',
-                'дней публикации',
-                'разных днях',
-                'календарных днях'
-            ])
-    
-            if is_unique_days_query and creator_id and start_date and end_date:
-                # Это запрос об уникальных днях публикации
-                unique_days = self.query_manager.get_unique_publishing_days_for_creator(
-                    creator_id, start_date, end_date
-                )
-        
-                month_name = start_date.strftime('%B %Y').lower()
-                return f"{month_name}"
-    
-            # Если есть время - это запрос для конкретного креатора с временным интервалом
-            elif start_time and end_time:
-                if not creator_id:
-                    return "❌ Для запроса с временным интервалом нужен ID креатора."
-        
-                growth = self.query_manager.get_total_views_growth_for_creator_with_time_period(
-                    creator_id, start_date, start_time, end_time
-                )
-        
-                time_period_str = f"с {start_time.strftime('%H:%M')} до {end_time.strftime('%H:%M')}"
-                date_str = start_date.strftime('%d %B %Y')
-                return f"{growth}"
-    
-            # Если нет времени, но есть ID креатора - суммарные просмотры креатора
-            elif creator_id:
-                total_views = self.query_manager.get_total_views_for_creator_period(creator_id, start_date, end_date)
-        
-                if start_date == end_date:
-                    date_str = start_date.strftime('%d %B %Y')
-                    return f"{total_views}"
-                else:
-                    date_str = f"с {start_date.strftime('%d %B %Y')} по {end_date.strftime('%d %B %Y')}"
-                    return f"{total_views}"
-    
-            # Если нет ID креатора и нет времени - это запрос про все видео
-            else:
-                total_views = self.query_manager.get_total_views_for_all_videos_period(start_date, end_date)
-        
-                if start_date == end_date:
-                    date_str = start_date.strftime('%d %B %Y')
-                    return f"{total_views}"
-                else:
-                    date_str = f"с {start_date.strftime('%d %B %Y')} по {end_date.strftime('%d %B %Y')}"
-                    return f"{total_views:,}"
+    async def start_metrics_server(self, host: str = Config.METRICS_HOST, port: int = Config.METRICS_PORT):
+        """GET /metrics на отдельном порту (режим polling, где нет своего HTTP-сервера)."""
+        app = web.Application()
+        app.router.add_get('/metrics', self._metrics_handler)
+        self._metrics_runner = web.AppRunner(app)
+        await self._metrics_runner.setup()
+        await web.TCPSite(self._metrics_runner, host, port).start()
+        logger.info("Метрики: http://%s:%s/metrics", host, port)
 
-        elif parsed_query.intent == "negative_views_snapshots":
-            count = self.query_manager.get_negative_views_snapshots_count()
-            return f"{count}"
-    
-        elif parsed_query.intent == "videos_by_creator":
-            creator_id = parsed_query.parameters.get("creator_id")
-            start_date = parsed_query.parameters.get("start_date")
-            end_date = parsed_query.parameters.get("end_date")
-            logger.info(f"🔍 Поиск видео для creator_id={creator_id}")
-            logger.info(f"📅 start_date={start_date}, end_date={end_date}")
-            logger.info(f"📅 Тип start_date={type(start_date)}, тип end_date={type(end_date)}")
-            
-            if not creator_id:
-                return "❌ Не указан ID креатора. Пример: 'Сколько видео у креатора с id user123?'"
-            
-             # Проверяем, не является ли это запросом об уникальных днях
-            original_lower = parsed_query.original_query.lower()
-            if any(keyword in original_lower for keyword in ['разных календарных днях', 'дней публикации', 'публиковал хотя бы']):
-                # Это запрос об уникальных днях публикации
-                if not start_date or not end_date:
-                    return "❌ Для подсчета дней публикации нужно указать период."
-        
-                unique_days = self.query_manager.get_unique_publishing_days_for_creator(
-                    creator_id, start_date, end_date
-                )
-        
-                month_name = start_date.strftime('%B %Y').lower()
-                return f"{month_name}"
+    def create_webhook_app(self, path: str = Config.WEBHOOK_PATH,
+                           secret_token: Optional[str] = Config.WEBHOOK_SECRET) -> web.Application:
+        """
+        aiohttp приложение для webhook: POST path принимает обновления
+        (с проверкой секрета), GET /health — проверка живости, счетчики
+        схлопнутых запросов, глубина очереди к базе и очереди отправки,
+        GET /metrics — метрики в формате Prometheus.
+        Telegram сразу получает 200, а обработка идет в фоновой задаче.
+        """
+        async def health_handler(request: web.Request) -> web.Response:
+            return web.json_response({
+                'status': 'ok',
+                'single_flight': self.single_flight.stats(),
+                'admission': self.admission.stats(),
+                'sender': self.sender.stats(),
+            })
 
-            count = self.query_manager.get_videos_by_creator(
-                creator_id, start_date, end_date
-            )
-            try:
-                conn = self.query_manager._get_connection()
-                cursor = conn.cursor()
-        
-                # Выполняем тот же запрос что и в get_videos_by_creator
-                query = "SELECT id, video_created_at FROM videos WHERE creator_id = %s"
-                params = [creator_id]
-        
-                if start_date:
-                    query += " AND DATE(video_created_at) >= %s"
-                    params.append(start_date)
-        
-                if end_date:
-                    query += " AND DATE(video_created_at) <= %s"
-                    params.append(end_date)
-        
-                cursor.execute(query, params)
-                videos = cursor.fetchall()
-        
-                logger.info(f"📊 Найдено видео: {videos}")
-                logger.info(f"📊 Всего записей: {len(videos)}")
-        
-                cursor.close()
-                conn.close()
-            except Exception as e:
-                logger.error(f"Ошибка при проверке запроса: {e}")
-            date_info = ""
-            if start_date and end_date:
-                date_info = f" за период с {start_date} по {end_date}"
-            elif start_date:
-                date_info = f" начиная с {start_date}"
-            elif end_date:
-                date_info = f" до {end_date}"
-            
-            return f"{count}"
-        
-        elif parsed_query.intent == "videos_by_views":
-            min_views = parsed_query.parameters.get("min_views", 100000)
+        app = web.Application()
+        # Запуск/остановка диспетчера вместе с приложением. Регистрируется
+        # раньше обработчика webhook: при остановке очередь отправки
+        # дописывается до того, как он закроет сессию бота
+        setup_application(app, self.dp, bot=self.bot)
+        SimpleRequestHandler(
+            dispatcher=self.dp,
+            bot=self.bot,
+            secret_token=secret_token,
+            handle_in_background=True,
+        ).register(app, path=path)
+        app.router.add_get('/health', health_handler)
+        app.router.add_get('/metrics', self._metrics_handler)
+        return app
 
-            # Проверяем, не является ли это запросом об уникальных креаторах
-            original_query_lower = parsed_query.original_query.lower()
+    async def set_webhook(self):
+        """Регистрация webhook в Telegram (если задан публичный WEBHOOK_URL)."""
+        if not Config.WEBHOOK_URL:
+            logger.info("WEBHOOK_URL не задан, setWebhook не вызывается")
+            return
+        url = Config.WEBHOOK_URL.rstrip('/') + Config.WEBHOOK_PATH
+        await self.bot.set_webhook(
+            url,
+            secret_token=Config.WEBHOOK_SECRET,
+            allowed_updates=self.dp.resolve_used_update_types(),
+        )
+        logger.info("Webhook зарегистрирован: %s", url)
 
-            if any(keyword in original_query_lower for keyword in ['разных креаторов', 'уникальных авторов', 'сколько креаторов', 'сколько авторов']):
-                # Это запрос об уникальных креаторах
-                count = self.query_manager.get_unique_creators_with_high_views(min_views)
-                return f"{count}"
+    async def run_webhook(self, host: str = Config.WEBHOOK_HOST, port: int = Config.WEBHOOK_PORT,
+                          reuse_port: bool = False, sock=None, register: bool = True):
+        """
+        Прием обновлений через webhook. Воркеры под супервизором (main.py)
+        слушают один порт: каждый со своим сокетом и reuse_port=True
+        (SO_REUSEPORT) или общий сокет sock, открытый до fork. Webhook в
+        Telegram тогда регистрирует супервизор (register=False).
+        """
+        runner = web.AppRunner(self.create_webhook_app())
+        await runner.setup()
+        try:
+            if sock is not None:
+                await web.SockSite(runner, sock).start()
             else:
-                count = self.query_manager.get_videos_with_views_above(min_views)
-                return f"{count}"
-        
-        elif parsed_query.intent == "total_growth":
-            target_date = parsed_query.parameters.get("date")
-    
-            if not target_date:
-                # Пытаемся получить последнюю дату из данных
-                try:
-                    # Проверяем есть ли данные вообще
-                    conn = self.query_manager._get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT MAX(DATE(created_at)) FROM video_snapshots WHERE delta_views_count > 0")
-                    result = cursor.fetchone()
-                    cursor.close()
-                    conn.close()
-            
-                    if result and result[0]:
-                        target_date = result[0]
-                    else:
-                        return "❌ В данных нет информации о приросте просмотров"
-                
-                except Exception as e:
-                    logger.error(f"Ошибка при получении даты: {e}")
-                    return "❌ Не удалось определить дату для анализа"
-    
-            growth = self.query_manager.get_total_views_growth_on_date(target_date)    
-            return f"{growth}"
-        
-        elif parsed_query.intent == "unique_growth":
-            target_date = parsed_query.parameters.get("date")
-            if not target_date:
-                return "❌ Не указана дата. Пример: 'Сколько видео получали просмотры вчера?'"
-            
-            count = self.query_manager.get_unique_videos_with_growth_on_date(target_date)
-            return f"{count:,}"
-        
-        elif parsed_query.intent == "videos_by_creator_with_views":
-            creator_id = parsed_query.parameters.get("creator_id")
-            min_views = parsed_query.parameters.get("min_views", 10000)
-    
-            if not creator_id:
-                return "❌ Не указан ID креатора. Пример: 'Сколько видео у креатора с id abc123 набрало больше 10000 просмотров?'"
-    
-            count = self.query_manager.get_videos_by_creator_with_views(creator_id, min_views)
-            return f"{count}"
-        
-        else:
-            # Для unknown запросов даем подсказки
-            suggestions = ""
-            if "автор" in parsed_query.original_query.lower() or "креатор" in parsed_query.original_query.lower():
-                suggestions = "Укажите ID креатора, например: 'Сколько видео у креатора с id abc123'"
-            elif "просмотры" in parsed_query.original_query.lower():
-                suggestions = "Уточните запрос, например: 'Прирост просмотров за вчера' или 'Видео с более 10000 просмотров'"
-            return (
-                "🤔 Не удалось распознать запрос.\n\n"
-                "Попробуйте один из примеров:\n"
-                "• Сколько всего видео?\n"
-                "• Видео креатора id 123\n"
-                "• Видео с >50000 просмотров\n"
-                "• Прирост просмотров за вчера"
-            )
-    
-    async def run(self):
-        """Асинхронный запуск бота."""
+                await web.TCPSite(runner, host, port, reuse_port=reuse_port).start()
+            logger.info("Webhook слушает http://%s:%s%s (pid %d)", host, port, Config.WEBHOOK_PATH, os.getpid())
+            if register:
+                await self.set_webhook()
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    async def run(self, mode: str = 'polling', **webhook_options):
+        """Асинхронный запуск бота (mode: polling или webhook)."""
         try:
-            logger.info("Запускаем бота...")
-            await self.dp.start_polling(self.bot)
+            logger.info("Запускаем бота в режиме %s...", mode)
+            if mode == 'webhook':
+                await self.run_webhook(**webhook_options)
+            else:
+                if Config.METRICS_PORT:
+                    await self.start_metrics_server()
+                await self.dp.start_polling(self.bot)
         except Exception as e:
-            logger.error(f"Ошибка при запуске бота: {e}")
+            logger.error("Ошибка при запуске бота: %s", e)
             raise
         finally:
+            if self._metrics_runner is not None:
+                await self._metrics_runner.cleanup()
             await self.bot.session.close()
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bot import patterns
+
+UNKNOWN = "unknown"
+
+
+@dataclass(frozen=True)
+class ScoringRule:
+    """
+    Поправка к весам: применяется к строкам, где все признаки when истинны,
+    а все признаки unless ложны (и сумма весов меньше total_below, если задано).
+    """
+    when: Tuple[str, ...]
+    unless: Tuple[str, ...] = ()
+    add: Tuple[Tuple[str, int], ...] = ()
+    decrease: Tuple[Tuple[str, int], ...] = ()  # вычитание с отсечкой на нуле
+    zero: Tuple[str, ...] = ()
+    total_below: Optional[int] = None
+
+
+# Порядок важен: правила применяются последовательно, как шли условия
+# в прежнем _advanced_analysis
+SCORING_RULES = (
+    # "Суммарное количество просмотров" — почти наверняка total_views_period
+    ScoringRule(when=('суммарное количество просмотров',), add=(("total_views_period", 10),)),
+    # "Все видео" с датой, но без креатора
+    ScoringRule(when=('все видео', 'dates'), unless=('creator_word',),
+                add=(("total_views_all_videos_period", 5),)),
+    # Креатор + просмотры + порог ("больше" или число)
+    ScoringRule(when=('креатора', 'просмотров', 'more_or_number'),
+                add=(("videos_by_creator_with_views", 5),), decrease=(("videos_by_creator", 2),)),
+    # "Сколько видео у автора" без ID — unknown (до этого правила unknown всегда 0)
+    ScoringRule(when=('сколько видео', 'у автора'), unless=('loose_id',),
+                zero=("videos_by_creator",), add=((UNKNOWN, 5),)),
+    # "Новые просмотры за неделю" — total_growth, а не unique_growth
+    ScoringRule(when=('новые просмотры', 'недел'), unless=('unique_word',),
+                add=(("total_growth", 5),), decrease=(("unique_growth", 3),)),
+    # "Сколько" без других ключевых слов
+    ScoringRule(when=('сколько',), add=((UNKNOWN, 3),), total_below=3),
+    # "У автора" без настоящего ID
+    ScoringRule(when=('автор',), unless=('real_id',), zero=("videos_by_creator",)),
+)
+
+# Признаки, которые не являются ключевыми словами сканера
+DERIVED_FEATURES = ('creator_word', 'more_or_number', 'unique_word', 'dates', 'loose_id', 'real_id')
+
+
+class IntentScorer:
+    """
+    Подсчет весов интентов как произведение вектора попаданий ключевых слов
+    на матрицу весов (ключевое слово × интент) с поправками-масками.
+    """
+
+    def __init__(self, keyword_weights: Dict[str, Dict[str, int]], rules: Sequence[ScoringRule] = SCORING_RULES):
+        self.intents: List[str] = list(keyword_weights) + [UNKNOWN]
+        self._intent_index = {intent: i for i, intent in enumerate(self.intents)}
+
+        keywords = list(dict.fromkeys(keyword for weights in keyword_weights.values() for keyword in weights))
+        self._keyword_index = {keyword: i for i, keyword in enumerate(keywords)}
+        self.weights = np.zeros((len(keywords), len(self.intents)), dtype=np.int64)
+        for intent, weights in keyword_weights.items():
+            for keyword, weight in weights.items():
+                self.weights[self._keyword_index[keyword], self._intent_index[intent]] = weight
+
+        rule_keywords = [name for rule in rules for name in rule.when + rule.unless
+                         if name not in DERIVED_FEATURES]
+        self.features: List[str] = list(dict.fromkeys(rule_keywords)) + list(DERIVED_FEATURES)
+        self._feature_index = {name: i for i, name in enumerate(self.features)}
+        # Условия всех правил — две матрицы (признак × правило): маски для
+        # всей пачки считаются двумя умножениями, а не циклом по правилам
+        self._when = np.zeros((len(rules), len(self.features)), dtype=np.int64)
+        self._unless = np.zeros((len(rules), len(self.features)), dtype=np.int64)
+        for i, rule in enumerate(rules):
+            self._when[i, [self._feature_index[name] for name in rule.when]] = 1
+            self._unless[i, [self._feature_index[name] for name in rule.unless]] = 1
+        self._when_counts = self._when.sum(axis=1)
+        self._when, self._unless = self._when.T.copy(), self._unless.T.copy()
+        self._actions = [self._compile(rule) for rule in rules]
+
+    def _compile(self, rule: ScoringRule):
+        add = np.zeros(len(self.intents), dtype=np.int64)
+        for intent, value in rule.add:
+            add[self._intent_index[intent]] += value
+        return (
+            add if add.any() else None,
+            [(self._intent_index[intent], value) for intent, value in rule.decrease],
+            [self._intent_index[intent] for intent in rule.zero],
+            rule.total_below,
+        )
+
+    def _row_features(self, entities, row: np.ndarray):
+        """Признаки одного запроса; дорогие (даты, ID) считаются только когда нужны."""
+        found = entities.hits.positions
+        index = self._feature_index
+        for name, i in index.items():
+            if name in found:
+                row[i] = 1
+        row[index['creator_word']] = 'креатора' in found or 'автора' in found
+        row[index['unique_word']] = any(word in found for word in patterns.UNIQUE_WORDS)
+        row[index['more_or_number']] = 'больше' in found or any(word.isdigit() for word in entities.text.split())
+        if 'все видео' in found and not row[index['creator_word']]:
+            row[index['dates']] = bool(entities.dates)
+        if 'сколько видео' in found and 'у автора' in found:
+            row[index['loose_id']] = bool(patterns.LOOSE_ID.search(entities.text))
+        if 'автор' in found:
+            row[index['real_id']] = bool(patterns.LOOSE_ID_ALNUM.search(entities.text))
+
+    def score_many(self, entities_list: Sequence) -> np.ndarray:
+        """Матрица весов (запрос × интент) для пачки разобранных запросов."""
+        hits = np.zeros((len(entities_list), len(self._keyword_index)), dtype=np.int64)
+        features = np.zeros((len(entities_list), len(self.features)), dtype=np.int64)
+        for row, entities in enumerate(entities_list):
+            columns = [self._keyword_index[keyword] for keyword in entities.hits.positions
+                       if keyword in self._keyword_index]
+            hits[row, columns] = 1
+            self._row_features(entities, features[row])
+
+        scores = hits @ self.weights
+        masks = ((features @ self._when) == self._when_counts) & ((features @ self._unless) == 0)
+        for rule in np.flatnonzero(masks.any(axis=0)):
+            add, decrease, zero, total_below = self._actions[rule]
+            rows = np.flatnonzero(masks[:, rule])
+            if total_below is not None:
+                rows = rows[scores[rows].sum(axis=1) < total_below]
+            if add is not None:
+                scores[rows] += add
+            for column, value in decrease:
+                scores[rows, column] = np.maximum(0, scores[rows, column] - value)
+            for column in zero:
+                scores[rows, column] = 0
+        return scores
+
+    def best(self, scores: np.ndarray) -> List[Tuple[str, int]]:
+        """Лучший интент и его вес по строкам (при равенстве — первый по порядку)."""
+        best = scores.argmax(axis=1)
+        return [(self.intents[column], int(scores[row, column])) for row, column in enumerate(best)]
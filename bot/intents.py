@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from datetime import date, time
+from enum import Enum
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bot import patterns
+from bot.temporal import TEMPORAL_PARSER, TemporalExpression
+
+
+class Intent(str, Enum):
+    """Интенты NLP-слоя; значения совпадают с прежними строковыми именами."""
+    TOTAL_VIDEOS = "total_videos"
+    VIDEOS_BY_CREATOR = "videos_by_creator"
+    VIDEOS_BY_VIEWS = "videos_by_views"
+    VIDEOS_BY_CREATOR_WITH_VIEWS = "videos_by_creator_with_views"
+    TOTAL_GROWTH = "total_growth"
+    UNIQUE_GROWTH = "unique_growth"
+    TOTAL_VIEWS_PERIOD = "total_views_period"
+    TOTAL_VIEWS_ALL_VIDEOS_PERIOD = "total_views_all_videos_period"
+    NEGATIVE_VIEWS_SNAPSHOTS = "negative_views_snapshots"
+    UNIQUE_PUBLISHING_DAYS = "unique_publishing_days"
+    UNKNOWN = "unknown"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class QueryEntities:
+    """
+    Сущности запроса: попадания ключевых слов, ID креатора, даты,
+    временной интервал и числа. Каждая извлекается не более одного раза
+    и только если ее спросило какое-нибудь правило.
+    """
+
+    def __init__(self, processor, text: str):
+        self.processor = processor
+        self.text = text
+        self.hits = processor.KEYWORD_SCANNER.scan(text)
+        # Разбор зависит от индекса креаторов, а не только от текста
+        # (префикс ID разрешен или не разрешен по индексу) — такой разбор не кэшируется
+        self.uses_creator_index = False
+
+    @cached_property
+    def creator_id(self) -> Optional[str]:
+        """32-символьный hex ID после "id" или обрезанный ID, однозначно найденный в индексе креаторов."""
+        match = patterns.CREATOR_ID_HEX.search(self.text)
+        if match:
+            return match.group(1)
+        index = self.processor.creator_index
+        if index is not None:
+            match = patterns.CREATOR_ID_PREFIX.search(self.text)
+            if match:
+                self.uses_creator_index = True
+                return index.resolve(match.group(1))
+        return None
+
+    @cached_property
+    def creator_ref(self) -> Optional[str]:
+        """Любая ссылка "id ..." (hex, UUID или слово); префикс заменяется полным ID из индекса."""
+        match = patterns.CREATOR_ID_ANY.search(self.text)
+        if not match:
+            return None
+        index = self.processor.creator_index
+        if index is not None:
+            creator_id = index.resolve(match.group(1))
+            if creator_id is not None and creator_id != match.group(1):
+                self.uses_creator_index = True
+                return creator_id
+        return match.group(1)
+
+    @cached_property
+    def temporal(self) -> TemporalExpression:
+        return TEMPORAL_PARSER.parse(self.text)
+
+    @cached_property
+    def dates(self) -> Optional[Tuple[date, date]]:
+        """Первый и последний день периода (включительно)."""
+        return self.temporal.dates
+
+    @cached_property
+    def time_window(self) -> Optional[Tuple[time, time]]:
+        return self.temporal.time_window
+
+    @cached_property
+    def numbers(self) -> List[str]:
+        return patterns.DIGITS.findall(self.text.replace(' ', '').replace(',', ''))
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    """Строка таблицы интентов."""
+    intent: Intent
+    priority: int  # меньше — раньше
+    matcher: str  # имя метода NLPProcessor: (QueryEntities) -> параметры или None
+    all_of: Tuple[str, ...] = ()  # все эти слова должны быть в запросе
+    any_of: Tuple[Tuple[str, ...], ...] = ()  # из каждой группы хотя бы одно слово
+    requires: Tuple[str, ...] = ()  # непустые атрибуты QueryEntities
+
+
+# Ключевые слова здесь — необходимые условия: правило, чьи слова не найдены,
+# не вызывает свой матчер вовсе
+INTENT_RULES = (
+    IntentRule(Intent.UNIQUE_PUBLISHING_DAYS, 10, "_match_unique_publishing_days",
+               any_of=(patterns.PUBLISHING_DAYS_WORDS,), requires=('creator_ref',)),
+    IntentRule(Intent.TOTAL_VIEWS_ALL_VIDEOS_PERIOD, 20, "_match_total_views_all_videos_period",
+               any_of=(patterns.TOTAL_VIEWS_ALL_PHRASES,), requires=('dates',)),
+    IntentRule(Intent.TOTAL_VIEWS_PERIOD, 30, "_match_total_views_with_time_period",
+               any_of=(patterns.TIME_GROWTH_PHRASES,), requires=('time_window', 'creator_ref', 'dates')),
+    IntentRule(Intent.TOTAL_VIEWS_PERIOD, 40, "_match_total_views_period",
+               any_of=(patterns.TOTAL_WORDS, patterns.VIEWS_WORDS)),
+    IntentRule(Intent.NEGATIVE_VIEWS_SNAPSHOTS, 50, "_match_negative_views",
+               any_of=(patterns.NEGATIVE_WORDS,)),
+    IntentRule(Intent.VIDEOS_BY_CREATOR_WITH_VIEWS, 60, "_match_creator_with_views",
+               any_of=(patterns.VIEWS_GAIN_WORDS, patterns.COMPARISON_WORDS), requires=('creator_id',)),
+    IntentRule(Intent.TOTAL_VIDEOS, 70, "_match_total_videos"),
+    IntentRule(Intent.VIDEOS_BY_CREATOR, 80, "_match_creator_videos",
+               any_of=(('креатор', 'автор'),)),
+    IntentRule(Intent.VIDEOS_BY_VIEWS, 90, "_match_videos_by_views"),
+    IntentRule(Intent.TOTAL_GROWTH, 100, "_match_total_growth"),
+    IntentRule(Intent.UNIQUE_GROWTH, 110, "_match_unique_videos_growth"),
+)
+
+
+class IntentDispatcher:
+    """
+    Таблица интентов, скомпилированная для одного процессора.
+
+    Отбор правил по ключевым словам — операции над множествами попаданий,
+    поэтому новые интенты почти не удорожают разбор: матчер запускается,
+    только если совпали его слова и нашлись нужные сущности.
+    """
+
+    def __init__(self, processor, rules=INTENT_RULES):
+        vocabulary = processor.KEYWORD_SCANNER.vocabulary
+        self._rules: List[Tuple[IntentRule, frozenset, Tuple[frozenset, ...], Callable]] = []
+        for rule in sorted(rules, key=lambda rule: rule.priority):
+            keywords = set(rule.all_of).union(*rule.any_of)
+            missing = keywords - vocabulary
+            if missing:
+                raise ValueError(f"Слова правила {rule.intent} не зарегистрированы в сканере: {sorted(missing)}")
+            self._rules.append((
+                rule,
+                frozenset(rule.all_of),
+                tuple(frozenset(group) for group in rule.any_of),
+                getattr(processor, rule.matcher)
+            ))
+
+    def dispatch(self, entities: QueryEntities) -> Optional[Tuple[Intent, Dict[str, Any]]]:
+        """Первый по приоритету интент, чей матчер вернул параметры."""
+        found = entities.hits.positions.keys()
+        for rule, all_of, any_of, matcher in self._rules:
+            if not found >= all_of:
+                continue
+            if any(found.isdisjoint(group) for group in any_of):
+                continue
+            if not all(getattr(entities, name) for name in rule.requires):
+                continue
+            params = matcher(entities)
+            if params is not None:
+                return rule.intent, params
+        return None
@@ -0,0 +1,89 @@
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordHits:
+    """Найденные в тексте ключевые слова с позициями начала вхождений."""
+
+    __slots__ = ('text', 'positions', 'vocabulary')
+
+    def __init__(self, text: str, positions: Dict[str, List[int]], vocabulary: frozenset):
+        self.text = text
+        self.positions = positions
+        self.vocabulary = vocabulary
+
+    def __contains__(self, keyword: str) -> bool:
+        if keyword in self.positions:
+            return True
+        if keyword not in self.vocabulary:
+            # Слово, которого нет в автомате, всегда давало бы ложный промах
+            raise KeyError(f"Ключевое слово не зарегистрировано в сканере: {keyword!r}")
+        return False
+
+    def any(self, keywords: Iterable[str]) -> bool:
+        """Есть ли в тексте хотя бы одно из слов."""
+        return any(keyword in self for keyword in keywords)
+
+    def first(self, keyword: str) -> int:
+        """Позиция первого вхождения слова или -1."""
+        positions = self.positions.get(keyword)
+        return positions[0] if positions else -1
+
+    def __repr__(self):
+        return f"KeywordHits({sorted(self.positions)})"
+
+
+class KeywordScanner:
+    """
+    Автомат Ахо-Корасик над набором ключевых слов.
+
+    Строится один раз; scan() проходит текст за один проход и находит
+    все вхождения всех слов (в том числе перекрывающиеся).
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(keywords))
+        self.vocabulary = frozenset(self.keywords)
+
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[str]] = [[]]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(keyword)
+
+        # Обход в ширину: ссылки неудачи и полная таблица переходов (ДКА),
+        # чтобы при сканировании не откатываться по ссылкам неудачи
+        fail = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, next_state in goto[state].items():
+                fail[next_state] = transitions[fail[state]].get(char, 0) if state else 0
+                queue.append(next_state)
+
+        self._transitions = transitions
+        self._outputs = [tuple(output) for output in outputs]
+
+    def scan(self, text: str) -> KeywordHits:
+        """Все вхождения ключевых слов в текст."""
+        transitions = self._transitions
+        outputs = self._outputs
+        positions: Dict[str, List[int]] = {}
+        state = 0
+        for index, char in enumerate(text):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                for keyword in outputs[state]:
+                    positions.setdefault(keyword, []).append(index - len(keyword) + 1)
+        return KeywordHits(text, positions, self.vocabulary)
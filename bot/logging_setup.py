@@ -0,0 +1,112 @@
+"""
+Логирование бота без записи из event loop.
+
+Обработчик корня — QueueHandler: запись только кладется в очередь, а
+форматирование и вывод делает фоновый поток QueueListener. Формат —
+JSON по строке на запись (LOG_FORMAT=json) или обычный текст
+(LOG_FORMAT=text). Записи уровня DEBUG пропускаются с вероятностью
+LOG_DEBUG_SAMPLE_RATE, чтобы подробности по каждому вопросу не забивали
+вывод при LOG_LEVEL=DEBUG.
+
+В коде бота сообщения логируются с %-форматированием
+(logger.debug("Параметры: %s", params)): строка собирается только для
+записей, которые будут выведены, и уже в фоновом потоке.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from config.config import Config
+
+# Поля LogRecord, которые не считаются пользовательскими (extra=...)
+_STANDARD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[QueueListener] = None
+# Процесс, где запущен поток вывода: после fork (воркеры main.py) он запускается заново
+_listener_pid: Optional[int] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись в одну строку JSON: время, уровень, логгер, сообщение, extra и исключение."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+        }
+        for name, value in vars(record).items():
+            if name not in _STANDARD_FIELDS and not name.startswith('_'):
+                entry[name] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Пропускает долю rate записей DEBUG; записи INFO и выше — все."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке: стандартный
+    prepare() собирает сообщение сразу, здесь это делает QueueListener.
+    Аргументы записей бота — неизменяемые значения (строки, даты, числа).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: str = Config.LOG_LEVEL, log_format: str = Config.LOG_FORMAT,
+                  debug_sample_rate: float = Config.LOG_DEBUG_SAMPLE_RATE):
+    """Очередь и фоновый поток вывода для корневого логгера (повторный вызов ничего не делает)."""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if log_format == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    records: "queue.SimpleQueue" = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(records)
+    # Фильтр на обработчике очереди: отброшенные записи не попадают в очередь
+    handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Дописать очередь и остановить фоновый поток."""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,238 @@
+"""
+Метрики бота в текстовом формате Prometheus (без внешних зависимостей).
+
+Гистограммы и счетчики обновляются по ходу обработки вопроса (этапы
+parse, answer, queue, query, format, total — по интентам; время каждого метода
+QueryManager; отправка в Telegram), а состояние компонентов (кэш
+разборов, очередь к базе, пул соединений, очередь отправки) снимается
+сборщиками в момент запроса GET /metrics.
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Границы корзин гистограмм задержек, секунды
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Сэмпл сборщика: (имя, тип, описание, метки, значение)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Монотонный счетчик с метками."""
+
+    type = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+                for key, value in values]
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и метками."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [счетчики корзин..., сумма, количество]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines = []
+        for key, series in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {int(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-2]!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {int(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Метрики процесса и сборщики состояния; render() — текст для GET /metrics."""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+
+        described = set()
+        for collector in self._collectors:
+            for name, metric_type, help, labels, value in collector():
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {help}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter('bot_requests_total', "Вопросы по интентам", ('intent',))
+ERRORS = REGISTRY.counter('bot_errors_total', "Ошибки обработки вопросов", ('intent',))
+STAGE_SECONDS = REGISTRY.histogram(
+    'bot_stage_seconds',
+    "Время этапов: parse, answer (ответ с ожиданием очереди и схлопнутых запросов), "
+    "queue (ожидание места к базе), query, format, total",
+    ('stage', 'intent'),
+)
+DB_QUERY_SECONDS = REGISTRY.histogram('bot_db_query_seconds', "Время методов QueryManager", ('method',))
+SEND_SECONDS = REGISTRY.histogram(
+    'bot_send_seconds',
+    "Отправка ответа: wait (от постановки в очередь до отправки), request (вызов Bot API)",
+    ('stage',),
+)
+
+# Время запросов к базе в текущем потоке (для разделения query и format)
+_local = threading.local()
+
+
+def reset_query_time():
+    _local.query_seconds = 0.0
+
+
+def query_time() -> float:
+    return getattr(_local, 'query_seconds', 0.0)
+
+
+class TimedQueryManager:
+    """
+    Обертка QueryManager: время каждого метода get_* попадает в
+    bot_db_query_seconds и в счетчик времени запросов текущего потока.
+    Остальные атрибуты (dataset_version, _get_connection, ...) — без изменений.
+    """
+
+    def __init__(self, query_manager):
+        self._query_manager = query_manager
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._query_manager, name)
+        if not name.startswith('get_') or not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                DB_QUERY_SECONDS.observe(elapsed, method=name)
+                _local.query_seconds = query_time() + elapsed
+
+        return timed
+
+
+class RequestTimer:
+    """Этапы одного вопроса: with timer.span('parse'): ...; observe() пишет их в гистограмму."""
+
+    __slots__ = ('started', 'spans')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+
+    def span(self, stage: str) -> "_Span":
+        return _Span(self, stage)
+
+    def add(self, stage: str, seconds: float):
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    def observe(self, intent: str, total: Optional[float] = None):
+        for stage, seconds in self.spans.items():
+            STAGE_SECONDS.observe(seconds, stage=stage, intent=intent)
+        if total is None:
+            total = time.perf_counter() - self.started
+        STAGE_SECONDS.observe(total, stage='total', intent=intent)
+
+
+class _Span:
+    __slots__ = ('timer', 'stage', 'started')
+
+    def __init__(self, timer: RequestTimer, stage: str):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.add(self.stage, time.perf_counter() - self.started)
+        return False
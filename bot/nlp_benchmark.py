@@ -0,0 +1,257 @@
+"""
+Бенчмарк разбора запросов.
+
+Микробенчмарк этапов NLPProcessor (среднее время на один запрос):
+    python -m bot.nlp_benchmark --repeat 200
+
+Прогон размеченного корпуса: сообщений в секунду, p50/p99 задержки
+на сообщение, точность по интентам и матрица ошибок. Большие корпуса
+делятся на куски и разбираются в нескольких процессах:
+    python -m bot.nlp_benchmark --corpus bot/nlp_corpus.jsonl --repeat 1000 --workers 4
+
+Корпус — JSONL, по объекту на строку: {"query": ..., "intent": ...,
+"params": {...}}; params необязательны и сравниваются как строки.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from bot.nlp_processor import NLPProcessor
+from bot.temporal import TEMPORAL_PARSER
+from config.config import Config
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'nlp_corpus.jsonl')
+
+
+# Примеры из README и типичные формулировки пользователей
+SAMPLE_QUERIES = [
+    "Сколько всего видео есть в системе?",
+    "Сколько видео у креатора с id aca1061a9d324ecf8c3fa2bb32d7be63 вышло с 1 ноября 2025 по 5 ноября 2025 включительно?",
+    "Сколько видео набрало больше 100 000 просмотров за всё время?",
+    "На сколько просмотров в сумме выросли все видео 28 ноября 2025?",
+    "Сколько разных видео получали новые просмотры 27 ноября 2025?",
+    "Сколько всего есть замеров статистики, в которых число просмотров за час оказалось отрицательным?",
+    "Сколько видео у креатора с id aca1061a9d324ecf8c3fa2bb32d7be63 набрали больше 10 000 просмотров по итоговой статистике?",
+    "Какое суммарное количество просмотров набрали все видео, опубликованные в июне 2025 года?",
+    "На сколько просмотров суммарно выросли все видео креатора с id cd87be38b50b4fdd8342bb3c383f3c7d в промежутке с 10:00 до 15:00 28 ноября 2025 года?",
+    "Для креатора с id aca1061a9d324ecf8c3fa2bb32d7be63 посчитай, в скольких разных календарных днях ноября 2025 года он публиковал хотя бы одно видео.",
+    "Сколько разных креаторов имеют хотя бы одно видео, которое в итоге набрало больше 100000 просмотров?",
+    "Прирост просмотров за вчера",
+    "Видео с >50000 просмотров",
+    "Сколько видео у автора?",
+    "привет",
+]
+
+
+def measure(func: Callable[[str], object], queries: List[str], repeat: int) -> float:
+    """Среднее время одного вызова в микросекундах."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - started) / (repeat * len(queries)) * 1e6
+
+
+def run(repeat: int):
+    nlp = NLPProcessor(cache_size=0)
+    cached = NLPProcessor()
+    lowered = [query.lower() for query in SAMPLE_QUERIES]
+
+    stages = [
+        ('parse_query', nlp.parse_query, SAMPLE_QUERIES),
+        ('parse_query (кэш)', cached.parse_query, SAMPLE_QUERIES),
+        ('TemporalParser.parse', TEMPORAL_PARSER.parse, lowered),
+        ('_advanced_analysis', lambda query: nlp._advanced_analysis(query, query), lowered),
+    ]
+
+    print(f"Запросов: {len(SAMPLE_QUERIES)}, повторов: {repeat}")
+    for name, func, queries in stages:
+        print(f"  {name:<30} {measure(func, queries, repeat):>10.1f} мкс/запрос")
+    print(f"Кэш разборов: {cached.cache.stats()}")
+
+    # Пакетный подсчет весов: все повторы набора одной матрицей
+    batch = SAMPLE_QUERIES * repeat
+    started = time.perf_counter()
+    nlp.score_many(batch)
+    elapsed = (time.perf_counter() - started) / len(batch) * 1e6
+    print(f"  {'score_many (' + str(len(batch)) + ')':<30} {elapsed:>10.1f} мкс/запрос")
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """Размеченные запросы из JSONL (пустые строки пропускаются)."""
+    samples = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            sample = json.loads(line)
+            if 'query' not in sample or 'intent' not in sample:
+                raise ValueError(f"{path}:{line_number}: нужны поля query и intent")
+            samples.append(sample)
+    return samples
+
+
+def params_match(expected: Dict[str, Any], actual: Dict[str, Any]) -> bool:
+    """Все ожидаемые параметры есть в разборе (сравнение строковых представлений)."""
+    return all(name in actual and str(actual[name]) == str(value) for name, value in expected.items())
+
+
+# Процессор создается один раз на процесс пула
+_worker_nlp: Optional[NLPProcessor] = None
+
+
+def _init_worker(cache_size: int):
+    global _worker_nlp
+    _worker_nlp = NLPProcessor(cache_size=cache_size)
+
+
+def _evaluate_chunk(args: Tuple[Sequence[Dict[str, Any]], int]) -> Tuple[List[float], List[Tuple[str, str, Optional[bool]]]]:
+    """
+    Разбор куска корпуса пачками по batch_size через parse_many.
+    Задержка сообщения — время его пачки, деленное на размер пачки.
+    """
+    samples, batch_size = args
+    latencies: List[float] = []
+    outcomes: List[Tuple[str, str, Optional[bool]]] = []
+    for start in range(0, len(samples), batch_size):
+        batch = samples[start:start + batch_size]
+        started = time.perf_counter()
+        parsed = _worker_nlp.parse_many([sample['query'] for sample in batch])
+        per_message = (time.perf_counter() - started) / len(batch)
+        latencies.extend([per_message] * len(batch))
+        for sample, result in zip(batch, parsed):
+            expected_params = sample.get('params')
+            params_ok = None
+            if expected_params is not None and result.intent == sample['intent']:
+                params_ok = params_match(expected_params, result.parameters)
+            outcomes.append((sample['intent'], result.intent.value, params_ok))
+    return latencies, outcomes
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Процентиль по ближайшему рангу."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def evaluate(samples: List[Dict[str, Any]], workers: int = 1, batch_size: int = 1,
+             cache_size: int = 0, chunk_size: int = 1000) -> Dict[str, Any]:
+    """Прогон корпуса и сводный отчет (словарь, пригодный для json.dumps)."""
+    chunks = [(samples[i:i + chunk_size], batch_size) for i in range(0, len(samples), chunk_size)]
+
+    started = time.perf_counter()
+    if workers > 1:
+        with Pool(workers, initializer=_init_worker, initargs=(cache_size,)) as pool:
+            results = pool.map(_evaluate_chunk, chunks)
+    else:
+        _init_worker(cache_size)
+        results = [_evaluate_chunk(chunk) for chunk in chunks]
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for chunk_latencies, _ in results for latency in chunk_latencies)
+    outcomes = [outcome for _, chunk_outcomes in results for outcome in chunk_outcomes]
+
+    confusion: Dict[str, Counter] = defaultdict(Counter)
+    params_checked = params_failed = 0
+    for expected, predicted, params_ok in outcomes:
+        confusion[expected][predicted] += 1
+        if params_ok is not None:
+            params_checked += 1
+            params_failed += not params_ok
+
+    correct = sum(confusion[intent][intent] for intent in confusion)
+    per_intent = {
+        intent: {
+            'total': sum(row.values()),
+            'correct': row[intent],
+            'accuracy': round(row[intent] / sum(row.values()), 4),
+        }
+        for intent, row in sorted(confusion.items())
+    }
+    return {
+        'messages': len(outcomes),
+        'workers': workers,
+        'batch_size': batch_size,
+        'wall_seconds': round(wall, 4),
+        'messages_per_second': round(len(outcomes) / wall, 1) if wall else 0.0,
+        'latency_us': {
+            'p50': round(percentile(latencies, 0.50) * 1e6, 1),
+            'p99': round(percentile(latencies, 0.99) * 1e6, 1),
+        },
+        'accuracy': round(correct / len(outcomes), 4) if outcomes else 0.0,
+        'params_accuracy': round(1 - params_failed / params_checked, 4) if params_checked else None,
+        'per_intent': per_intent,
+        'confusion': {intent: dict(row) for intent, row in sorted(confusion.items())},
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Сообщений: {report['messages']}, процессов: {report['workers']}, "
+          f"размер пачки: {report['batch_size']}")
+    print(f"  Пропускная способность: {report['messages_per_second']:,.0f} сообщ./с "
+          f"({report['wall_seconds']} с)")
+    print(f"  Задержка на сообщение: p50 {report['latency_us']['p50']} мкс, "
+          f"p99 {report['latency_us']['p99']} мкс")
+    print(f"  Точность интентов: {report['accuracy']:.2%}")
+    if report['params_accuracy'] is not None:
+        print(f"  Точность параметров (при верном интенте): {report['params_accuracy']:.2%}")
+
+    print("Точность по интентам:")
+    for intent, row in report['per_intent'].items():
+        print(f"  {intent:<32} {row['correct']:>6}/{row['total']:<6} {row['accuracy']:.2%}")
+
+    # Матрица ошибок: строки — ожидаемый интент, столбцы — распознанный
+    confusion = report['confusion']
+    labels = sorted(set(confusion) | {predicted for row in confusion.values() for predicted in row})
+    width = max(6, max(len(str(count)) for row in confusion.values() for count in row.values()) + 1)
+    print("Матрица ошибок (строки — ожидаемый интент, столбцы — распознанный):")
+    print(' ' * 34 + ''.join(f"{i:>{width}}" for i in range(len(labels))))
+    for i, expected in enumerate(labels):
+        row = confusion.get(expected, {})
+        cells = ''.join(f"{row.get(predicted, 0) or '.':>{width}}" for predicted in labels)
+        print(f"  {i:>2} {expected:<29}{cells}")
+
+
+def run_corpus(path: str, repeat: int, workers: int, batch_size: int, cache: bool,
+               min_accuracy: Optional[float], output: Optional[str]) -> int:
+    samples = load_corpus(path) * repeat
+    cache_size = Config.PARSE_CACHE_SIZE if cache else 0
+    report = evaluate(samples, workers=workers, batch_size=batch_size, cache_size=cache_size)
+    report['corpus'] = path
+    print_report(report)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if min_accuracy is not None and report['accuracy'] < min_accuracy:
+        print(f"❌ Точность {report['accuracy']:.2%} ниже порога {min_accuracy:.2%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора запросов")
+    parser.add_argument('--repeat', type=int, default=200,
+                        help="Сколько раз прогнать набор запросов (с --corpus — размножить корпус)")
+    parser.add_argument('--corpus', nargs='?', const=DEFAULT_CORPUS,
+                        help="Размеченный корпус JSONL (по умолчанию bot/nlp_corpus.jsonl)")
+    parser.add_argument('--workers', type=int, default=1, help="Число процессов для прогона корпуса")
+    parser.add_argument('--batch', type=int, default=1, help="Размер пачки parse_many")
+    parser.add_argument('--cache', action='store_true', help="Включить кэш разборов (PARSE_CACHE_SIZE)")
+    parser.add_argument('--min-accuracy', type=float,
+                        help="Код выхода 1, если точность интентов ниже порога (0..1)")
+    parser.add_argument('--output', help="Сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    if args.corpus:
+        sys.exit(run_corpus(args.corpus, args.repeat, args.workers, args.batch, args.cache,
+                            args.min_accuracy, args.output))
+    run(args.repeat)
@@ -0,0 +1,156 @@
+import re
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+# ID креаторов и пороги просмотров заменяются в ключе плейсхолдерами,
+# поэтому "у креатора id <a> больше 10 000" и "... id <b> больше 50 000"
+# разбираются один раз. Дни, часы и годы остаются в ключе как есть:
+# от них зависит период, а не только значение параметра. Длинные числа
+# тоже бывают частью периода ("за последние 1000 дней") — такие разборы
+# не кэшируются (NLPProcessor._period_uses_template).
+TEMPLATE = re.compile(
+    r'(?P<uuid>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})'
+    r'|(?P<hex>[a-f0-9]{32})'
+    r'|(?P<num>\b\d{1,3}(?: \d{3})+\b|\b\d{4,}\b)'
+)
+YEAR_RANGE = range(1900, 2100)
+
+# Ссылка на исходный текст запроса в параметрах (интент unknown)
+ORIGINAL_QUERY = -1
+
+
+def normalize(query: str) -> str:
+    """Нижний регистр и одиночные пробелы — текст, который разбирает NLPProcessor."""
+    return ' '.join(query.lower().split())
+
+
+class _Slot:
+    """
+    Параметр шаблона, значение которого берется из запроса при попадании:
+    index — позиция в значениях шаблона, kind — тип параметра (str или int).
+    """
+
+    __slots__ = ('index', 'kind')
+
+    def __init__(self, index: int, kind: type = str):
+        self.index = index
+        self.kind = kind
+
+    def value(self, values: List[str], original_query: str) -> Any:
+        if self.index == ORIGINAL_QUERY:
+            return original_query
+        text = values[self.index]
+        return int(text.replace(' ', '')) if self.kind is int else text
+
+
+class ParseCache:
+    """
+    LRU-кэш разборов запросов.
+
+    Ключ — нормализованный текст с ID и порогами просмотров, замененными на
+    плейсхолдеры (у чисел в плейсхолдере остается количество цифр: от него
+    зависят проверки вида "не меньше 1000"). Параметры разбора, совпавшие
+    со значениями из запроса, хранятся ссылками и подставляются заново при
+    каждом попадании. Разборы с относительными датами ("вчера", дата по
+    умолчанию "сегодня") действительны только в день разбора.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any], Optional[date]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.uncacheable = 0
+
+    @staticmethod
+    def template(text: str) -> Tuple[str, List[str]]:
+        """Ключ кэша и исходный текст значений, вынесенных из нормализованного текста."""
+        values: List[str] = []
+
+        def substitute(match):
+            if match.lastgroup == 'num':
+                digits = match.group().replace(' ', '')
+                if len(digits) == 4 and int(digits) in YEAR_RANGE:
+                    return match.group()
+                values.append(match.group())
+                return f'<n{len(digits)}>'
+            values.append(match.group())
+            return f'<{match.lastgroup}>'
+
+        return TEMPLATE.sub(substitute, text), values
+
+    def get(self, key: str, values: List[str], original_query: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(интент, параметры) с подставленными значениями или None при промахе."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        intent, template, day = entry
+        if day is not None and day != date.today():
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        params = {}
+        for name, value in template.items():
+            params[name] = value.value(values, original_query) if isinstance(value, _Slot) else value
+        return intent, params
+
+    @staticmethod
+    def _positions(values: List[str], value: Any) -> List[int]:
+        """
+        Позиции значения в запросе. Строка сравнивается с исходным текстом
+        (ID "12345" — это текст, хоть и из цифр), число — с числом.
+        """
+        if isinstance(value, int):
+            return [i for i, text in enumerate(values)
+                    if text.replace(' ', '').isdecimal() and int(text.replace(' ', '')) == value]
+        return [i for i, text in enumerate(values) if text == value]
+
+    def put(self, key: str, values: List[str], original_query: str,
+            intent: str, params: Dict[str, Any], volatile: bool = False):
+        """Сохранение разбора; параметры, неоднозначно связанные с запросом, не кэшируются."""
+        if self.maxsize <= 0:
+            return
+
+        template = {}
+        for name, value in params.items():
+            if isinstance(value, str) and value == original_query:
+                template[name] = _Slot(ORIGINAL_QUERY)
+                continue
+            if isinstance(value, (str, int)) and not isinstance(value, bool):
+                positions = self._positions(values, value)
+                if len(positions) > 1:
+                    # Одно и то же значение встречается в запросе дважды — непонятно, какое подставлять
+                    self.uncacheable += 1
+                    return
+                if positions:
+                    template[name] = _Slot(positions[0], type(value))
+                    continue
+            template[name] = value
+
+        self._entries[key] = (intent, template, date.today() if volatile else None)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'uncacheable': self.uncacheable,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
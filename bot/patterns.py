@@ -0,0 +1,167 @@
+import re
+
+
+# Месяцы в родительном ("28 ноября") и предложном ("в ноябре") падежах
+MONTHS_GENITIVE = {
+    'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4,
+    'мая': 5, 'июня': 6, 'июля': 7, 'августа': 8,
+    'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12
+}
+MONTHS_PREPOSITIONAL = {
+    'январе': 1, 'феврале': 2, 'марте': 3, 'апреле': 4,
+    'мае': 5, 'июне': 6, 'июле': 7, 'августе': 8,
+    'сентябре': 9, 'октябре': 10, 'ноябре': 11, 'декабре': 12
+}
+MONTH_FORMS = {**MONTHS_GENITIVE, **MONTHS_PREPOSITIONAL}
+
+# Идентификаторы креаторов
+CREATOR_ID_HEX = re.compile(r'id\s+([a-f0-9]{32})', re.IGNORECASE)
+# Обрезанный ID: разрешается по индексу креаторов (database/creator_index.py)
+CREATOR_ID_PREFIX = re.compile(r'\bid\s+([a-f0-9]{6,31})\b', re.IGNORECASE)
+CREATOR_ID_ANY = re.compile(r'id\s+([a-f0-9]{32}|[a-f0-9-]{36}|\w+)', re.IGNORECASE)
+HEX_ID = re.compile(r'[a-f0-9]{32}')
+LOOSE_ID = re.compile(r'[a-f0-9]{32}|[a-f0-9-]{36}|\bid\s+\w+')
+LOOSE_ID_ALNUM = re.compile(r'[a-f0-9]{32}|[a-f0-9-]{36}|\bid\s+[a-z0-9]')
+LOOSE_ID_CAPTURE = re.compile(r'[a-f0-9]{32}|[a-f0-9-]{36}|\bid\s+([^\s]+)')
+
+# Порядок важен: берется первый совпавший шаблон
+CREATOR_ID_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'креатор(?:а|ом)?\s+(?:с\s+)?id\s+([a-f0-9]{32})',
+    r'автор(?:а|ом)?\s+(?:с\s+)?id\s+([a-f0-9]{32})',
+    r'id\s+([a-f0-9]{32})\s+креатор',
+    r'id\s+([a-f0-9]{32})\s+автор',
+    r'у\s+креатор(?:а|а\s+с\s+id)?\s+([a-f0-9]{32})',
+    r'у\s+автор(?:а|а\s+с\s+id)?\s+([a-f0-9]{32})',
+    r'креатор\s+([a-f0-9]{32})',
+    r'автор\s+([a-f0-9]{32})',
+    r'креатор\s+с\s+id\s+([a-f0-9]{32})',
+    r'автор\s+с\s+id\s+([a-f0-9]{32})'
+]]
+
+# Даты разбирает bot/temporal.py; здесь только то, что нужно матчерам
+YEAR_202X = re.compile(r'\b(202[0-9])\b')
+
+# Числа
+DIGITS = re.compile(r'\d+')
+DIGIT_GAP = re.compile(r'(\d)\s+(\d)')
+VIEWS_INDICATORS = ['больше', 'более', 'свыше', '>', 'набрали', 'набрало']
+VIEWS_INDICATOR_PATTERNS = [
+    re.compile(re.escape(indicator) + r'\s*(\d+)') for indicator in VIEWS_INDICATORS
+]
+VIEWS_THRESHOLD_PATTERNS = [re.compile(pattern) for pattern in [
+    r'больше\s+([\d\s]+)\s+просмотров',
+    r'набрало\s+([\d\s]+)\s+просмотров',
+    r'>\s*([\d\s]+)\s*просмотров',
+    r'превысило\s+([\d\s]+)\s+просмотров',
+    r'свыше\s+([\d\s]+)\s+просмотров',
+    r'более\s+([\d\s]+)\s+просмотров',
+    r'видео\s+с\s+([\d\s]+)\s+просмотрами',
+    r'видео\s+([\d\s]+)\s+просмотров'
+]]
+VIEWS_GENERAL = re.compile(r'сколько видео.*просмотров|видео.*просмотров.*сколько')
+
+# Шаблоны интентов (достаточно совпадения любой альтернативы)
+NEGATIVE_VIEWS = re.compile('|'.join([
+    r'сколько всего есть замеров статистики.*отрицательн',
+    r'замеров.*отрицательн.*просмотров',
+    r'просмотров за час.*отрицательн',
+    r'количество просмотров стало меньше',
+    r'по сравнению с предыдущим.*меньше'
+]))
+TOTAL_VIDEOS = re.compile('|'.join([
+    r'^сколько всего видео',
+    r'^сколько видео в системе',
+    r'^общее количество видео',
+    r'^всего видео$',
+    r'^количество всех видео',
+    r'^сколько роликов в системе',
+    r'^суммарное количество видео',
+    r'^сколько у вас видео',
+    r'^сколько всего роликов',
+    r'^общее число видео'
+]))
+TOTAL_GROWTH = re.compile('|'.join([
+    r'на сколько просмотров.*выросли',
+    r'суммарный прирост просмотров',
+    r'сумма просмотров.*выросла',
+    r'прирост просмотров',
+    r'сколько просмотров.*прибавилось',
+    r'общий прирост.*просмотров',
+    r'насколько.*выросли.*просмотры',
+    r'выросло.*просмотров.*сколько',
+    r'прирост.*за.*вчера',
+    r'прирост.*за.*сегодня',
+    r'прирост.*за.*неделю',
+    r'новые просмотры.*за.*недел',
+    r'просмотры.*за.*недел',
+    r'сколько.*просмотров.*за.*недел'
+]))
+UNIQUE_GROWTH = re.compile('|'.join([
+    r'сколько разных видео.*просмотры',
+    r'уникальных видео.*новые просмотры',
+    r'разных видео.*получали просмотры',
+    r'сколько видео.*новые просмотры',
+    r'видео.*получало.*просмотры',
+    r'какие видео.*просмотры',
+    r'уникальные видео.*просмотры',
+    r'разные видео.*просмотры',
+    r'видео.*получали.*новые',
+    r'новые просмотры.*видео',
+    r'какие.*видео.*просмотры',
+    r'видео.*получали.*просмотры'
+]))
+
+# Ключевые слова: ищутся не через "in", а одним проходом автомата
+# (см. bot/keyword_scanner.py), поэтому каждое слово должно попасть в NLP_KEYWORDS
+TOTAL_VIEWS_ALL_PHRASES = (
+    'суммарное количество просмотров',
+    'суммарное число просмотров',
+    'сколько всего просмотров',
+    'сумма просмотров',
+    'набрали все видео',
+    'всего просмотров набрали'
+)
+ALL_VIDEOS_WORDS = ('все видео', 'всех видео', 'любого автора', 'любого креатора')
+CREATOR_MENTION_WORDS = ('креатора', 'автора', 'id')
+TIME_GROWTH_PHRASES = (
+    'просмотров суммарно выросли',
+    'суммарно выросли все видео',
+    'сложить изменения просмотров',
+    'изменения просмотров между замерами',
+    'замерами попадающими в этот интервал'
+)
+TOTAL_WORDS = ('суммарное', 'сумма', 'общее', 'всего', 'набрали все', 'все видео')
+VIEWS_WORDS = ('просмотров', 'просмотры')
+VIEWS_GAIN_WORDS = ('просмотров', 'просмотры', 'набрали', 'набрало')
+COMPARISON_WORDS = ('больше', 'более', 'свыше', '>')
+NEGATIVE_WORDS = (
+    'отрицательн',  # отрицательных, отрицательное
+    'уменьшилось',
+    'стало меньше',
+    'по сравнению с предыдущим',
+    'просмотров за час',
+    'замеров статистики',
+    'количество просмотров стало меньше'
+)
+SNAPSHOT_WORDS = ('замеров', 'замеры', 'снапшотов', 'статистик')
+GROWTH_CONTEXT_WORDS = ('уникальн', 'разных', 'новые', 'прирост', 'вырос')
+UNIQUE_WORDS = ('уникальн', 'разных', 'разные', 'какие')
+UNIQUE_OR_RECEIVED_WORDS = UNIQUE_WORDS + ('получали',)
+# Подрежим ответа videos_by_views (флаг ParsedQuery)
+UNIQUE_CREATORS_WORDS = ('разных креаторов', 'уникальных авторов', 'сколько креаторов', 'сколько авторов')
+# Интент unique_publishing_days
+PUBLISHING_DAYS_WORDS = (
+    'разных календарных днях', 'календарных днях', 'разных днях', 'в скольких днях',
+    'дней публикации', 'публиковал хотя бы'
+)
+OTHER_KEYWORDS = (
+    'новые просмотры', 'за неделю', 'недел',
+    'сколько видео', 'у автора', 'сколько', 'автор'
+)
+
+NLP_KEYWORDS = tuple(dict.fromkeys(
+    TOTAL_VIEWS_ALL_PHRASES + ALL_VIDEOS_WORDS + CREATOR_MENTION_WORDS + TIME_GROWTH_PHRASES
+    + TOTAL_WORDS + VIEWS_GAIN_WORDS + COMPARISON_WORDS + NEGATIVE_WORDS + SNAPSHOT_WORDS
+    + GROWTH_CONTEXT_WORDS + UNIQUE_OR_RECEIVED_WORDS + UNIQUE_CREATORS_WORDS + PUBLISHING_DAYS_WORDS
+    + OTHER_KEYWORDS
+))
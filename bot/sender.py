@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+
+from bot.metrics import SEND_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Предел длины сообщения Telegram: склеенные ответы одному чату его не превышают
+MAX_MESSAGE_LENGTH = 4096
+BATCH_SEPARATOR = "\n\n"
+# Сколько раз повторять отправку при сетевой ошибке
+NETWORK_RETRIES = 3
+# Как часто удалять состояние чатов, которым давно ничего не отправлялось
+PRUNE_INTERVAL = 60.0
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity про запас."""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Через сколько секунд будет доступен токен (0 — уже есть)."""
+        self._refill(now)
+        # updated в будущем — ведро на паузе после retry_after
+        wait = max(self.updated - now, 0.0)
+        if self.tokens >= 1:
+            return wait
+        return wait + (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, seconds: float, now: float):
+        """Ни одного токена до now + seconds (ответ Telegram retry_after), затем один."""
+        self.tokens = 1
+        self.updated = max(self.updated, now + seconds)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _ChatQueue:
+    __slots__ = ('bucket', 'pending', 'scheduled')
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        # (текст, время постановки в очередь)
+        self.pending: Deque[Tuple[str, float]] = deque()
+        # Чат стоит в очереди готовых, ждет таймера или его сообщение отправляется
+        self.scheduled = False
+
+
+class OutboundSender:
+    """
+    Отправка ответов в Telegram в фоне с учетом лимитов.
+
+    send() только ставит текст в очередь чата и сразу возвращает
+    управление: обработчик не ждет ни сети, ни лимитов Telegram, а запросы
+    к базе не стоят за отправкой. Фоновая задача отправляет сообщения,
+    соблюдая два ведра токенов: общее (global_rate сообщений в секунду на
+    бота) и свое у каждого чата (chat_rate в секунду). Ответы, накопившиеся
+    для одного чата, уходят одним сообщением (не длиннее 4096 символов).
+    На TelegramRetryAfter чат ставится на паузу на retry_after секунд, и
+    сообщение отправляется снова; порядок сообщений в чате сохраняется.
+    """
+
+    def __init__(self, bot: Bot, global_rate: float, chat_rate: float):
+        self.bot = bot
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self._chats: Dict[Hashable, _ChatQueue] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._global: Optional[TokenBucket] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._deliveries = set()
+        # Счетчики: queued — ответов поставлено, sent — сообщений отправлено,
+        # batched — ответов, склеенных с другими, retry_after — пауз по 429,
+        # failed — ответов, которые не удалось отправить
+        self.queued = 0
+        self.sent = 0
+        self.batched = 0
+        self.retry_after = 0
+        self.failed = 0
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._ready = asyncio.Queue()
+        self._global = TokenBucket(self.global_rate, self.global_rate, loop.time())
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """Остановка: ждем отправки накопленного, но не дольше timeout секунд."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Не отправлено при остановке: %d ответов", self.pending)
+        self._worker.cancel()
+        for task in list(self._deliveries):
+            task.cancel()
+        self._worker = None
+
+    async def _drain(self):
+        while self.pending or self._deliveries:
+            await asyncio.sleep(0.05)
+
+    def send(self, chat_id: Hashable, text: str):
+        """Поставить ответ в очередь чата; не блокирует."""
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            now = asyncio.get_running_loop().time()
+            chat = self._chats[chat_id] = _ChatQueue(TokenBucket(self.chat_rate, 1, now))
+        chat.pending.append((text, asyncio.get_running_loop().time()))
+        self.queued += 1
+        if not chat.scheduled:
+            chat.scheduled = True
+            self._ready.put_nowait(chat_id)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        pruned = loop.time()
+        while True:
+            chat_id = await self._ready.get()
+            chat = self._chats[chat_id]
+            now = loop.time()
+            # Лимит чата не держит остальные чаты: чат вернется в очередь по таймеру
+            delay = chat.bucket.delay(now)
+            if delay > 0:
+                loop.call_later(delay, self._ready.put_nowait, chat_id)
+                continue
+            # Общий лимит бота держит всех
+            delay = self._global.delay(now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now = loop.time()
+            chat.bucket.take(now)
+            self._global.take(now)
+
+            items = self._take_batch(chat)
+            task = asyncio.create_task(self._deliver(chat_id, chat, items))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+            if now - pruned > PRUNE_INTERVAL:
+                self._prune(now)
+                pruned = now
+
+    @staticmethod
+    def _take_batch(chat: _ChatQueue) -> List[Tuple[str, float]]:
+        """Ответы из начала очереди чата, которые помещаются в одно сообщение."""
+        items = [chat.pending.popleft()]
+        length = len(items[0][0])
+        while chat.pending and length + len(BATCH_SEPARATOR) + len(chat.pending[0][0]) <= MAX_MESSAGE_LENGTH:
+            length += len(BATCH_SEPARATOR) + len(chat.pending[0][0])
+            items.append(chat.pending.popleft())
+        return items
+
+    async def _deliver(self, chat_id: Hashable, chat: _ChatQueue, items: List[Tuple[str, float]]):
+        loop = asyncio.get_running_loop()
+        texts = [text for text, _ in items]
+        text = BATCH_SEPARATOR.join(texts)
+        for attempt in range(NETWORK_RETRIES):
+            try:
+                started = loop.time()
+                await self.bot.send_message(chat_id, text)
+                SEND_SECONDS.observe(loop.time() - started, stage='request')
+                for _, enqueued in items:
+                    SEND_SECONDS.observe(started - enqueued, stage='wait')
+                self.sent += 1
+                self.batched += len(texts) - 1
+                break
+            except TelegramRetryAfter as e:
+                self.retry_after += 1
+                logger.warning("⏳ Лимит Telegram для чата %s: пауза %s с", chat_id, e.retry_after)
+                # Сообщение вернется в начало очереди и уйдет после паузы
+                chat.pending.extendleft(reversed(items))
+                chat.bucket.block(e.retry_after, loop.time())
+                break
+            except TelegramNetworkError as e:
+                logger.warning("Сетевая ошибка отправки в чат %s (попытка %d): %s", chat_id, attempt + 1, e)
+                await asyncio.sleep(2 ** attempt)
+            except Exception as e:
+                logger.error("Ошибка отправки в чат %s: %s", chat_id, e)
+                self.failed += len(texts)
+                break
+        else:
+            self.failed += len(texts)
+
+        if chat.pending:
+            self._ready.put_nowait(chat_id)
+        else:
+            chat.scheduled = False
+
+    def _prune(self, now: float):
+        """Состояние чата не нужно, если очередь пуста и лимит восстановился."""
+        for chat_id, chat in list(self._chats.items()):
+            if not chat.scheduled and chat.bucket.is_full(now):
+                del self._chats[chat_id]
+
+    @property
+    def pending(self) -> int:
+        return sum(len(chat.pending) for chat in self._chats.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'queued': self.queued,
+            'sent': self.sent,
+            'batched': self.batched,
+            'retry_after': self.retry_after,
+            'failed': self.failed,
+            'pending': self.pending,
+            'chats': len(self._chats),
+        }
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Схлопывание одинаковых запросов в полете: пока по ключу выполняется
+    запрос к базе, остальные вызовы с тем же ключом не запускают свой,
+    а ждут тот же future и получают тот же результат (или то же исключение).
+
+    Ключ — нормализованный запрос (ParsedQuery.fingerprint), поэтому
+    "Сколько всего видео?" и "сколько всего видео" выполняются один раз.
+    После завершения ключ удаляется: результаты здесь не кэшируются.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        # Счетчики: requests — все вызовы, executed — реально выполненные,
+        # coalesced — дождавшиеся чужого результата, failed — выполненные с ошибкой
+        self.requests = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Результат func() для key; одновременные вызовы с тем же key делят одно выполнение."""
+        self.requests += 1
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        # shield: отмена одного ожидающего (например, при остановке) не отменяет запрос остальных
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled() and future.exception() is not None:
+            self.failed += 1
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+        }
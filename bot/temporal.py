@@ -0,0 +1,394 @@
+"""
+Разбор выражений даты и времени за один проход по токенам запроса.
+
+Понимает абсолютные даты ("28 ноября 2025", "с 1 по 5 ноября 2025",
+"в июне 2025 года", "за 2025 год"), ISO ("2025-11-05"), относительные
+("вчера", "за последние 7 дней", "на прошлой неделе", "в прошлом месяце")
+и дневной интервал времени ("с 10:00 до 15:00").
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bot import patterns
+
+
+# Месяцы в именительном/винительном падеже: "за ноябрь 2025"
+MONTHS_NOMINATIVE = {
+    'январь': 1, 'февраль': 2, 'март': 3, 'апрель': 4,
+    'май': 5, 'июнь': 6, 'июль': 7, 'август': 8,
+    'сентябрь': 9, 'октябрь': 10, 'ноябрь': 11, 'декабрь': 12
+}
+MONTH_WORDS = {**patterns.MONTH_FORMS, **MONTHS_NOMINATIVE}
+
+YEAR_WORDS = {'год', 'года', 'году'}
+RANGE_END_WORDS = {'по', 'до'}
+HOUR_WORDS = {'час', 'часа', 'часов', 'ч'}
+LAST_WORDS = {'последние', 'последний', 'последнюю', 'последних'}
+PREVIOUS_WORDS = {'прошлой', 'прошлую', 'прошлом', 'прошлый', 'предыдущей', 'предыдущем'}
+CURRENT_WORDS = {'этой', 'эту', 'этом', 'этот', 'текущей', 'текущем'}
+
+# Длина единицы в днях ("месяц" — 30 дней, как и раньше в боте)
+UNIT_DAYS = {
+    'день': 1, 'дня': 1, 'дней': 1, 'сутки': 1, 'суток': 1,
+    'неделя': 7, 'неделю': 7, 'недели': 7, 'недель': 7,
+    'месяц': 30, 'месяца': 30, 'месяцев': 30
+}
+# Предел относительного периода ("за последние 1000000 дней"): дальше данных
+# все равно нет, а дата раньше date.min не вычисляется
+MAX_RELATIVE_DAYS = 100 * 365
+WEEK_WORDS = {'неделе', 'неделю', 'неделя'}
+MONTH_UNIT_WORDS = {'месяце', 'месяц'}
+DAY_OFFSETS = {'позавчера': -2, 'вчера': -1, 'сегодня': 0, 'завтра': 1}
+
+# Приоритет при нескольких выражениях: меньше — точнее
+RANK_DAYS = 0
+RANK_MONTH = 1
+RANK_YEAR = 2
+RANK_BARE_UNIT = 3
+
+TOKEN = re.compile(r'(\d{4}-\d{1,2}-\d{1,2})|(\d{1,2}:\d{2})|(\d+)|([а-яёa-z]+)')
+
+
+# Токен — кортеж (вид, текст); вид: iso, clock, num, word
+Token = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Period:
+    """Полуоткрытый интервал [start, end) с границами по началу суток."""
+    start: datetime
+    end: datetime
+
+    @classmethod
+    def from_dates(cls, first: date, last: date) -> 'Period':
+        """Период с first по last включительно."""
+        return cls(datetime.combine(first, time.min), datetime.combine(last + timedelta(days=1), time.min))
+
+    @property
+    def start_date(self) -> date:
+        return self.start.date()
+
+    @property
+    def end_date(self) -> date:
+        """Последний день периода (включительно)."""
+        return (self.end - timedelta(days=1)).date()
+
+
+@dataclass(frozen=True)
+class TemporalExpression:
+    """Итог разбора: период, дневной интервал времени и признак относительности."""
+    period: Optional[Period] = None
+    time_window: Optional[Tuple[time, time]] = None
+    relative: bool = False  # зависит от текущей даты ("вчера", "за неделю")
+    # Числа из разобранных выражений ("1000" в "за последние 1000 дней"):
+    # кэш разборов не подставляет их заново (см. NLPProcessor.parse_many)
+    numbers: Tuple[str, ...] = field(default=(), compare=False)
+
+    def __bool__(self):
+        return self.period is not None or self.time_window is not None
+
+    @property
+    def dates(self) -> Optional[Tuple[date, date]]:
+        """(первый день, последний день) включительно — форма параметров ParsedQuery."""
+        if self.period is None:
+            return None
+        return self.period.start_date, self.period.end_date
+
+
+TOKEN_KINDS = (None, 'iso', 'clock', 'num', 'word')
+
+
+def tokenize(text: str) -> List[Token]:
+    """Числа, время, ISO-даты и слова; пунктуация отбрасывается."""
+    tokens = []
+    for piece in text.lower().split():
+        # Обычные слова и числа разбираются без регулярного выражения
+        if piece.isalpha():
+            tokens.append(('word', piece))
+        elif piece.isdecimal():
+            tokens.append(('num', piece))
+        else:
+            tokens.extend((TOKEN_KINDS[match.lastindex], match.group(match.lastindex))
+                          for match in TOKEN.finditer(piece))
+    return tokens
+
+
+class TemporalParser:
+    """
+    Грамматика временных выражений.
+
+    Каждая продукция смотрит на токены с позиции i и возвращает
+    (число токенов, ранг, период или интервал времени, относительность)
+    либо None. Продукции выбираются по первому токену и пробуются от
+    длинных к коротким; совпавшие токены пропускаются, поэтому
+    "ноября 2025" внутри "5 ноября 2025" второй раз не разбирается.
+    """
+
+    def __init__(self):
+        # Продукции, которые могут начинаться с данного слова: остальные
+        # токены пропускаются без вызова правил
+        self._word_rules: Dict[str, Tuple[List[Callable], List[Callable]]] = {
+            'с': ([self._full_range, self._same_month_range], [self._clock_range, self._hour_range]),
+            'между': ([], [self._clock_range]),
+            'за': ([self._last_units, self._calendar_week_or_month], []),
+            'на': ([self._calendar_week_or_month], []),
+            'в': ([self._calendar_week_or_month], []),
+        }
+        for word in DAY_OFFSETS:
+            self._word_rules[word] = ([self._relative_day], [])
+        for word in MONTH_WORDS:
+            self._word_rules[word] = ([self._month_year], [])
+        for word in ('неделю', 'недели', 'месяц', 'месяца'):
+            self._word_rules[word] = ([self._bare_unit], [])
+        self._no_rules: Tuple[List[Callable], List[Callable]] = ([], [])
+
+    def _rules_for(self, token: Token) -> Tuple[List[Callable], List[Callable]]:
+        if token[0] == 'word':
+            return self._word_rules.get(token[1], self._no_rules)
+        if token[0] == 'iso':
+            return [self._iso_date], []
+        if token[0] == 'num':
+            return ([self._day_month_year] if len(token[1]) <= 2 else [self._year]), []
+        return self._no_rules
+
+    def parse(self, text: str, today: Optional[date] = None) -> TemporalExpression:
+        """Разбор текста; today подменяется в тестах и при кэшировании."""
+        today = today or date.today()
+        tokens = tokenize(text)
+        best = None  # (ранг, позиция, период, относительность, токены)
+        time_window = None
+        time_tokens: List[Token] = []
+
+        i = 0
+        while i < len(tokens):
+            date_rules, time_rules = self._rules_for(tokens[i])
+            consumed = 0
+            for rule in date_rules:
+                try:
+                    found = rule(tokens, i, today)
+                except (ValueError, OverflowError):
+                    # Дата вне допустимого диапазона: выражение не разбирается
+                    found = None
+                if found:
+                    consumed, rank, period, relative = found
+                    if best is None or rank < best[0]:
+                        best = (rank, i, period, relative, tokens[i:i + consumed])
+                    break
+            if not consumed and time_window is None:
+                for rule in time_rules:
+                    found = rule(tokens, i)
+                    if found:
+                        consumed, time_window = found
+                        time_tokens = tokens[i:i + consumed]
+                        break
+            i += consumed or 1
+
+        numbers = tuple(self._numbers(time_tokens + (best[4] if best else [])))
+        if best is None:
+            return TemporalExpression(time_window=time_window, numbers=numbers)
+        return TemporalExpression(period=best[2], time_window=time_window, relative=best[3], numbers=numbers)
+
+    # --- Помощники ---
+
+    @staticmethod
+    def _word(tokens, i, words) -> bool:
+        return i < len(tokens) and tokens[i][0] == 'word' and tokens[i][1] in words
+
+    @staticmethod
+    def _numbers(tokens) -> List[str]:
+        """Числа в токенах, в том числе части ISO-даты и времени."""
+        return [number for kind, text in tokens if kind != 'word' for number in re.findall(r'\d+', text)]
+
+    @staticmethod
+    def _day(tokens, i) -> Optional[int]:
+        if i < len(tokens) and tokens[i][0] == 'num' and len(tokens[i][1]) <= 2:
+            return int(tokens[i][1])
+        return None
+
+    @staticmethod
+    def _month(tokens, i) -> Optional[int]:
+        if i < len(tokens) and tokens[i][0] == 'word':
+            return MONTH_WORDS.get(tokens[i][1])
+        return None
+
+    @staticmethod
+    def _year_at(tokens, i) -> Optional[int]:
+        if i < len(tokens) and tokens[i][0] == 'num' and len(tokens[i][1]) == 4:
+            return int(tokens[i][1])
+        return None
+
+    @staticmethod
+    def _month_period(year: int, month: int) -> Period:
+        first = date(year, month, 1)
+        following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        return Period(datetime.combine(first, time.min), datetime.combine(following, time.min))
+
+    @staticmethod
+    def _last_days(today: date, days: int) -> Period:
+        """Последние days дней, включая сегодня: "последние 7 дней" — неделя по сегодня."""
+        return Period.from_dates(today - timedelta(days=days - 1), today)
+
+    # --- Абсолютные даты ---
+
+    def _full_range(self, tokens, i, today):
+        """с 1 ноября 2025 по 5 ноября 2025"""
+        if not self._word(tokens, i, {'с'}):
+            return None
+        d1, m1, y1 = self._day(tokens, i + 1), self._month(tokens, i + 2), self._year_at(tokens, i + 3)
+        if not (d1 and m1 and y1 and self._word(tokens, i + 4, RANGE_END_WORDS)):
+            return None
+        d2, m2, y2 = self._day(tokens, i + 5), self._month(tokens, i + 6), self._year_at(tokens, i + 7)
+        if not (d2 and m2 and y2):
+            return None
+        try:
+            return 8, RANK_DAYS, Period.from_dates(date(y1, m1, d1), date(y2, m2, d2)), False
+        except ValueError:
+            return None
+
+    def _same_month_range(self, tokens, i, today):
+        """с 1 по 5 ноября 2025"""
+        if not self._word(tokens, i, {'с'}):
+            return None
+        d1 = self._day(tokens, i + 1)
+        if not (d1 and self._word(tokens, i + 2, RANGE_END_WORDS)):
+            return None
+        d2, month, year = self._day(tokens, i + 3), self._month(tokens, i + 4), self._year_at(tokens, i + 5)
+        if not (d2 and month and year):
+            return None
+        try:
+            return 6, RANK_DAYS, Period.from_dates(date(year, month, d1), date(year, month, d2)), False
+        except ValueError:
+            return None
+
+    def _day_month_year(self, tokens, i, today):
+        """28 ноября 2025"""
+        day, month, year = self._day(tokens, i), self._month(tokens, i + 1), self._year_at(tokens, i + 2)
+        if not (day and month and year):
+            return None
+        try:
+            d = date(year, month, day)
+        except ValueError:
+            return None
+        return 3, RANK_DAYS, Period.from_dates(d, d), False
+
+    def _iso_date(self, tokens, i, today):
+        """2025-11-05"""
+        if tokens[i][0] != 'iso':
+            return None
+        try:
+            d = date(*map(int, tokens[i][1].split('-')))
+        except ValueError:
+            return None
+        return 1, RANK_DAYS, Period.from_dates(d, d), False
+
+    def _month_year(self, tokens, i, today):
+        """ноября 2025, в июне 2025 года, за ноябрь 2025"""
+        month, year = self._month(tokens, i), self._year_at(tokens, i + 1)
+        if not (month and year):
+            return None
+        consumed = 3 if self._word(tokens, i + 2, YEAR_WORDS) else 2
+        return consumed, RANK_MONTH, self._month_period(year, month), False
+
+    def _year(self, tokens, i, today):
+        """2025 год, в 2025 году"""
+        year = self._year_at(tokens, i)
+        if not (year and self._word(tokens, i + 1, YEAR_WORDS)):
+            return None
+        return 2, RANK_YEAR, Period.from_dates(date(year, 1, 1), date(year, 12, 31)), False
+
+    # --- Относительные даты ---
+
+    def _relative_day(self, tokens, i, today):
+        """вчера, сегодня, завтра, позавчера"""
+        if tokens[i][0] != 'word' or tokens[i][1] not in DAY_OFFSETS:
+            return None
+        d = today + timedelta(days=DAY_OFFSETS[tokens[i][1]])
+        return 1, RANK_DAYS, Period.from_dates(d, d), True
+
+    def _last_units(self, tokens, i, today):
+        """за последние 7 дней, за последнюю неделю, за 3 месяца, за неделю"""
+        if not self._word(tokens, i, {'за'}):
+            return None
+        j = i + 1
+        if self._word(tokens, j, LAST_WORDS):
+            j += 1
+        count = 1
+        if j < len(tokens) and tokens[j][0] == 'num':
+            digits = tokens[j][1]
+            # Число длиннее предела не переводится в int целиком
+            count = int(digits) if len(digits) <= len(str(MAX_RELATIVE_DAYS)) else MAX_RELATIVE_DAYS
+            j += 1
+        if not (j < len(tokens) and tokens[j][0] == 'word' and tokens[j][1] in UNIT_DAYS):
+            return None
+        if count < 1:
+            return None
+        days = min(count * UNIT_DAYS[tokens[j][1]], MAX_RELATIVE_DAYS)
+        return j + 1 - i, RANK_DAYS, self._last_days(today, days), True
+
+    def _calendar_week_or_month(self, tokens, i, today):
+        """на прошлой неделе, на этой неделе, в прошлом месяце, в этом месяце"""
+        if not self._word(tokens, i, {'на', 'в', 'за'}):
+            return None
+        if self._word(tokens, i + 1, PREVIOUS_WORDS):
+            previous = True
+        elif self._word(tokens, i + 1, CURRENT_WORDS):
+            previous = False
+        else:
+            return None
+
+        tomorrow = datetime.combine(today + timedelta(days=1), time.min)
+        if self._word(tokens, i + 2, WEEK_WORDS):
+            monday = datetime.combine(today - timedelta(days=today.weekday()), time.min)
+            if previous:
+                return 3, RANK_DAYS, Period(monday - timedelta(days=7), monday), True
+            return 3, RANK_DAYS, Period(monday, tomorrow), True
+        if self._word(tokens, i + 2, MONTH_UNIT_WORDS):
+            first = datetime.combine(today.replace(day=1), time.min)
+            if previous:
+                last_month = (today.replace(day=1) - timedelta(days=1))
+                return 3, RANK_DAYS, self._month_period(last_month.year, last_month.month), True
+            return 3, RANK_DAYS, Period(first, tomorrow), True
+        return None
+
+    def _bare_unit(self, tokens, i, today):
+        """Одиночные "неделю"/"месяц" без уточнений — последние 7/30 дней, включая сегодня."""
+        if not self._word(tokens, i, {'неделю', 'недели', 'месяц', 'месяца'}):
+            return None
+        return 1, RANK_BARE_UNIT, self._last_days(today, UNIT_DAYS[tokens[i][1]]), True
+
+    # --- Интервал времени ---
+
+    def _clock_range(self, tokens, i):
+        """с 10:00 до 15:00, между 10:00 и 15:00"""
+        if self._word(tokens, i, {'с'}):
+            separator = RANGE_END_WORDS
+        elif self._word(tokens, i, {'между'}):
+            separator = {'и'}
+        else:
+            return None
+        if not (i + 3 < len(tokens) and tokens[i + 1][0] == 'clock' and tokens[i + 3][0] == 'clock'
+                and self._word(tokens, i + 2, separator)):
+            return None
+        try:
+            start = datetime.strptime(tokens[i + 1][1], '%H:%M').time()
+            end = datetime.strptime(tokens[i + 3][1], '%H:%M').time()
+        except ValueError:
+            return None
+        return 4, (start, end)
+
+    def _hour_range(self, tokens, i):
+        """с 10 до 15 часов, с 10 до 15"""
+        if not self._word(tokens, i, {'с'}):
+            return None
+        start, end = self._day(tokens, i + 1), self._day(tokens, i + 3)
+        if start is None or end is None or not self._word(tokens, i + 2, RANGE_END_WORDS):
+            return None
+        if start > 23 or end > 23:
+            return None
+        consumed = 5 if self._word(tokens, i + 4, HOUR_WORDS) else 4
+        return consumed, (time(start, 0), time(end, 0))
+
+
+TEMPORAL_PARSER = TemporalParser()
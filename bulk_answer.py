@@ -0,0 +1,201 @@
+"""
+Пакетные ответы на вопросы без Telegram (для отчетов).
+
+Вопросы читаются из файла: .txt — по вопросу в строке, .jsonl/.ndjson —
+по JSON-объекту в строке с полем query, question, text, body или title
+(id берется из id или request_id, иначе — номер строки). Ответы пишутся
+потоком в JSONL в порядке вопросов:
+
+    python bulk_answer.py questions.txt --output answers.jsonl
+    python bulk_answer.py requests.jsonl --parse-workers 4 --db-workers 8
+
+Разбор идет в пуле процессов (пачками через parse_many, с кэшем разборов
+и индексом креаторов в каждом процессе), запросы к базе — в пуле потоков
+через пул соединений QueryManager. Одинаковые после разбора вопросы
+(тот же интент и параметры) отвечаются одним запросом к базе.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import Pool
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from config.config import Config
+
+QUESTION_FIELDS = ('query', 'question', 'text', 'body', 'title')
+ID_FIELDS = ('id', 'request_id')
+JSON_SUFFIXES = ('.jsonl', '.ndjson', '.json')
+
+# (id, вопрос)
+Question = Tuple[Any, str]
+
+
+def read_questions(path: str) -> Iterator[Question]:
+    """Вопросы из txt или JSONL (пустые строки пропускаются); '-' — stdin."""
+    is_json = path.lower().endswith(JSON_SUFFIXES)
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if not is_json:
+                yield line_number, line
+                continue
+            record = json.loads(line)
+            question = next((record[field] for field in QUESTION_FIELDS if record.get(field)), None)
+            if question is None:
+                raise ValueError(f"{path}:{line_number}: нет поля с вопросом ({', '.join(QUESTION_FIELDS)})")
+            question_id = next((record[field] for field in ID_FIELDS if field in record), line_number)
+            yield question_id, question
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Процессор создается один раз на процесс пула
+_worker_nlp = None
+
+
+def _init_parser(cache_size: int, creator_index):
+    global _worker_nlp
+    from bot.nlp_processor import NLPProcessor
+
+    _worker_nlp = NLPProcessor(cache_size=cache_size)
+    _worker_nlp.set_creator_index(creator_index)
+
+
+def _parse_chunk(chunk: List[Question]) -> List[Tuple[Any, str, Any]]:
+    parsed = _worker_nlp.parse_many([question for _, question in chunk])
+    return [(question_id, question, result) for (question_id, question), result in zip(chunk, parsed)]
+
+
+def parse_questions(questions: Iterable[Question], workers: int, batch_size: int,
+                    creator_index) -> Iterator[Tuple[Any, str, Any]]:
+    """(id, вопрос, ParsedQuery) в порядке вопросов."""
+    chunks = chunked(questions, batch_size)
+    if workers > 1:
+        with Pool(workers, initializer=_init_parser,
+                  initargs=(Config.PARSE_CACHE_SIZE, creator_index)) as pool:
+            for parsed in pool.imap(_parse_chunk, chunks):
+                yield from parsed
+    else:
+        _init_parser(Config.PARSE_CACHE_SIZE, creator_index)
+        for chunk in chunks:
+            yield from _parse_chunk(chunk)
+
+
+class BulkAnswerer:
+    """
+    Ответы в пуле потоков. Ответ хранится по ParsedQuery.fingerprint до
+    конца прогона: повторный вопрос получает уже готовый (или
+    выполняющийся) результат без запроса к базе.
+    """
+
+    def __init__(self, answerer, workers: int):
+        self.answerer = answerer
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='db')
+        self._answers: Dict[tuple, Future] = {}
+        self.executed = 0
+        self.reused = 0
+
+    def submit(self, parsed_query) -> Future:
+        future = self._answers.get(parsed_query.fingerprint)
+        if future is not None:
+            self.reused += 1
+            return future
+        self.executed += 1
+        future = self._answers[parsed_query.fingerprint] = self.executor.submit(self.answerer.answer, parsed_query)
+        return future
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def answer_record(question_id: Any, question: str, parsed_query, future: Future) -> Dict[str, Any]:
+    record = {'id': question_id, 'question': question, 'intent': parsed_query.intent.value}
+    try:
+        record['answer'] = future.result()
+    except Exception as e:
+        record['error'] = str(e)
+    return record
+
+
+def run(path: str, output: Optional[str], parse_workers: int, db_workers: int, batch_size: int) -> int:
+    from bot.answers import QueryAnswerer
+    from database.query_manager import QueryManager
+
+    query_manager = QueryManager()
+    # Индекс креаторов строится один раз и передается процессам разбора
+    creator_index = query_manager.get_creator_index()
+    bulk = BulkAnswerer(QueryAnswerer(query_manager), db_workers)
+
+    out: TextIO = open(output, 'w', encoding='utf-8') if output else sys.stdout
+    # Окно вопросов в работе: ответы пишутся по порядку, пока следующие уже считаются
+    window: Deque[Tuple[Any, str, Any, Future]] = deque()
+    max_window = db_workers * 4
+    answered = errors = 0
+
+    def write(item):
+        nonlocal answered, errors
+        record = answer_record(*item)
+        answered += 1
+        errors += 'error' in record
+        out.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    started = time.perf_counter()
+    try:
+        for question_id, question, parsed_query in parse_questions(
+                read_questions(path), parse_workers, batch_size, creator_index):
+            window.append((question_id, question, parsed_query, bulk.submit(parsed_query)))
+            while len(window) > max_window or (window and window[0][3].done()):
+                write(window.popleft())
+        while window:
+            write(window.popleft())
+    finally:
+        bulk.shutdown()
+        if out is not sys.stdout:
+            out.close()
+    wall = time.perf_counter() - started
+
+    # Отчет в stderr: stdout может быть занят ответами
+    print(f"✅ Вопросов: {answered}, запросов к базе: {bulk.executed}, "
+          f"повторов без запроса: {bulk.reused}, ошибок: {errors}", file=sys.stderr)
+    print(f"⏱️  {wall:.2f} с, {answered / wall if wall else 0:,.1f} вопросов/с", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетные ответы на вопросы о статистике видео")
+    parser.add_argument('path', help="Файл с вопросами (.txt или .jsonl; '-' — stdin)")
+    parser.add_argument('--output', '-o', help="Файл для ответов JSONL (по умолчанию stdout)")
+    parser.add_argument('--parse-workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help="Процессов для разбора вопросов")
+    parser.add_argument('--db-workers', type=int, default=Config.DB_POOL_MAX,
+                        help="Параллельных запросов к базе (не больше DB_POOL_MAX)")
+    parser.add_argument('--batch', type=int, default=256, help="Размер пачки разбора")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        sys.exit(run(args.path, args.output, args.parse_workers, args.db_workers, args.batch))
+    except KeyboardInterrupt:
+        print("\n⏹️ Остановлено", file=sys.stderr)
+        sys.exit(130)
@@ -11,6 +11,21 @@ class Config:
     
     # Telegram Bot
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+    # Другой адрес Bot API: локальный сервер Bot API или bot/fake_telegram.py
+    TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+
+    # Режим получения обновлений: polling или webhook
+    BOT_MODE = os.getenv('BOT_MODE', 'polling')
+    # Webhook: где слушает aiohttp-сервер, публичный адрес для setWebhook
+    # (без пути; если не задан, webhook регистрируется вручную) и секрет,
+    # который Telegram присылает в X-Telegram-Bot-Api-Secret-Token
+    WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+    # Число процессов-воркеров в режиме webhook (общий порт через SO_REUSEPORT)
+    BOT_WORKERS = int(os.getenv('BOT_WORKERS', '1'))
     
     # Database
     DB_HOST = os.getenv('DB_HOST', 'localhost')
@@ -18,12 +33,55 @@ class Config:
     DB_NAME = os.getenv('DB_NAME', 'video_stats')
     DB_USER = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
+    # Пул соединений бота (свой в каждом процессе-воркере)
+    DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+    # Журнал медленных запросов: порог в мс (0 — выключен), файл и сколько
+    # планов EXPLAIN (ANALYZE, BUFFERS) снимать в минуту (каждый — повтор запроса)
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '500'))
+    SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', 'logs/slow_queries.log')
+    SLOW_QUERY_EXPLAIN_PER_MINUTE = int(os.getenv('SLOW_QUERY_EXPLAIN_PER_MINUTE', '6'))
+
+    # Контроль нагрузки: сколько запросов к базе выполняется одновременно,
+    # сколько ждет в очереди (сверх этого бот отвечает "занят") и сколько
+    # вопросов одного чата может быть в работе одновременно
+    WORK_CONCURRENCY = int(os.getenv('WORK_CONCURRENCY', os.getenv('DB_POOL_MAX', '10')))
+    WORK_QUEUE_SIZE = int(os.getenv('WORK_QUEUE_SIZE', '100'))
+    CHAT_MAX_IN_FLIGHT = int(os.getenv('CHAT_MAX_IN_FLIGHT', '3'))
+
+    # Лимиты отправки ответов (сообщений в секунду): на бота и на один чат,
+    # как в ограничениях Telegram (около 30 в секунду всего и 1 в чат)
+    SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', '30'))
+    SEND_CHAT_RATE = float(os.getenv('SEND_CHAT_RATE', '1'))
+
+    # Метрики Prometheus: в режиме webhook — GET /metrics на порту webhook,
+    # в режиме polling — отдельный сервер на METRICS_PORT (0 — выключен)
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+    # Логирование: уровень, формат (json или text) и доля выводимых записей DEBUG
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.01'))
+
+    # NLP: размер кэша разборов запросов (0 — без кэша)
+    PARSE_CACHE_SIZE = int(os.getenv('PARSE_CACHE_SIZE', '4096'))
+
+    # Как часто (в секундах) сверять версию данных в базе: после загрузки
+    # каждый воркер перестраивает индекс ID креаторов и сбрасывает кэши
+    CREATOR_INDEX_TTL = float(os.getenv('CREATOR_INDEX_TTL', '30'))
     
     @classmethod
     def validate(cls):
         """Проверка обязательных переменных"""
         if not cls.TELEGRAM_BOT_TOKEN:
             raise ValueError("TELEGRAM_BOT_TOKEN не установлен в .env файле")
+
+        if cls.BOT_MODE not in ('polling', 'webhook'):
+            raise ValueError(f"BOT_MODE должен быть polling или webhook, а не {cls.BOT_MODE!r}")
+
+        if cls.BOT_MODE == 'webhook' and not cls.WEBHOOK_SECRET:
+            print("⚠️  Предупреждение: WEBHOOK_SECRET не установлен, webhook примет запрос от кого угодно")
         
         if not cls.DB_PASSWORD:
             print("⚠️  Предупреждение: DB_PASSWORD не установлен")
@@ -0,0 +1,170 @@
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, Iterable, Optional
+
+
+# Глобальные счетчики в таблице stats_counters (одна строка с id = 1)
+COUNTER_NAMES = ('total_videos', 'total_snapshots', 'negative_views_snapshots', 'total_views')
+# Признак в накопленных изменениях: запись добавила или убрала креатора
+CREATORS_CHANGED = 'creators_changed'
+
+CREATE_COUNTERS_SQL = """
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+        total_videos BIGINT NOT NULL DEFAULT 0,
+        total_snapshots BIGINT NOT NULL DEFAULT 0,
+        negative_views_snapshots BIGINT NOT NULL DEFAULT 0,
+        total_views BIGINT NOT NULL DEFAULT 0,
+        dataset_version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Для баз, созданных до появления версии данных
+ADD_DATASET_VERSION_SQL = """
+    ALTER TABLE stats_counters ADD COLUMN IF NOT EXISTS dataset_version BIGINT NOT NULL DEFAULT 0
+"""
+
+INIT_COUNTERS_SQL = "INSERT INTO stats_counters (id) VALUES (1) ON CONFLICT (id) DO NOTHING"
+
+# Версия данных меняется при полном пересчете и при записи, изменившей
+# набор креаторов (от него зависят индекс креаторов и кэши бота); новые
+# снапшоты известных видео версию не меняют. Берется время в миллисекундах
+# (но не меньше прежней версии + 1), поэтому версия растет и после
+# пересоздания таблиц загрузчиком
+BUMP_DATASET_VERSION = (
+    "dataset_version = GREATEST(dataset_version + 1, "
+    "(EXTRACT(EPOCH FROM clock_timestamp()) * 1000)::BIGINT)"
+)
+
+
+def create_counters_table(cursor):
+    """Создание таблицы счетчиков с единственной строкой (идемпотентно)."""
+    cursor.execute(CREATE_COUNTERS_SQL)
+    cursor.execute(ADD_DATASET_VERSION_SQL)
+    init_counters(cursor)
+
+
+def init_counters(cursor) -> bool:
+    """
+    Строка счетчиков, если ее еще нет. Новая строка сразу заполняется
+    пересчетом по таблицам: в базе уже могут быть данные, а нули в ней
+    инкрементальные изменения не исправят. True — строка создана сейчас.
+    """
+    cursor.execute(INIT_COUNTERS_SQL + " RETURNING id")
+    if cursor.fetchone() is None:
+        return False
+    refresh_counters(cursor)
+    return True
+
+
+def refresh_counters(cursor):
+    """Полный пересчет счетчиков по таблицам (для сверки после массовой загрузки)."""
+    cursor.execute(INIT_COUNTERS_SQL)
+    cursor.execute(f"""
+        UPDATE stats_counters SET
+            total_videos = v.total_videos,
+            total_views = v.total_views,
+            total_snapshots = s.total_snapshots,
+            negative_views_snapshots = s.negative_views_snapshots,
+            {BUMP_DATASET_VERSION},
+            updated_at = CURRENT_TIMESTAMP
+        FROM
+            (SELECT COUNT(*) AS total_videos, COALESCE(SUM(views_count), 0) AS total_views
+             FROM videos) v,
+            (SELECT COUNT(*) AS total_snapshots,
+                    COUNT(*) FILTER (WHERE delta_views_count < 0) AS negative_views_snapshots
+             FROM video_snapshots) s
+        WHERE stats_counters.id = 1
+    """)
+
+
+def measure_counters(cursor, video_ids: Iterable[str], snapshot_ids: Iterable[str]) -> Dict[str, int]:
+    """Вклад указанных видео и снапшотов в счетчики на текущий момент."""
+    cursor.execute(
+        "SELECT COUNT(*), COALESCE(SUM(views_count), 0) FROM videos WHERE id = ANY(%s)",
+        [list(video_ids)]
+    )
+    total_videos, total_views = cursor.fetchone()
+    cursor.execute(
+        """
+        SELECT COUNT(*), COUNT(*) FILTER (WHERE delta_views_count < 0)
+        FROM video_snapshots WHERE snapshot_id = ANY(%s)
+        """,
+        [list(snapshot_ids)]
+    )
+    total_snapshots, negative_views_snapshots = cursor.fetchone()
+    return {
+        'total_videos': int(total_videos),
+        'total_snapshots': int(total_snapshots),
+        'negative_views_snapshots': int(negative_views_snapshots),
+        'total_views': int(total_views),
+    }
+
+
+def measure_creators(cursor, creator_ids: Iterable[str]) -> FrozenSet[str]:
+    """Какие из указанных креаторов есть в таблице videos."""
+    cursor.execute("SELECT DISTINCT creator_id FROM videos WHERE creator_id = ANY(%s)", [list(creator_ids)])
+    return frozenset(row[0] for row in cursor.fetchall())
+
+
+@contextmanager
+def track_counter_changes(cursor, video_ids, snapshot_ids, changes: Dict[str, int], creator_ids=()):
+    """
+    Учет изменения счетчиков при записи пачки: вклад затронутых строк
+    замеряется до и после записи, разница добавляется в changes.
+
+    Набор креаторов может измениться только у креаторов пачки (creator_ids)
+    и прежних креаторов затронутых видео — их наличие тоже сравнивается до
+    и после записи (changes[CREATORS_CHANGED]).
+    """
+    video_ids = list(video_ids)
+    snapshot_ids = list(snapshot_ids)
+    cursor.execute("SELECT DISTINCT creator_id FROM videos WHERE id = ANY(%s)", [video_ids])
+    creators = {row[0] for row in cursor.fetchall()} | set(creator_ids)
+    before = measure_counters(cursor, video_ids, snapshot_ids)
+    creators_before = measure_creators(cursor, creators)
+    yield
+    after = measure_counters(cursor, video_ids, snapshot_ids)
+    for name in COUNTER_NAMES:
+        changes[name] = changes.get(name, 0) + after[name] - before[name]
+    if measure_creators(cursor, creators) != creators_before:
+        changes[CREATORS_CHANGED] = 1
+
+
+def apply_counter_changes(cursor, changes: Dict[str, int]):
+    """
+    Применение накопленных изменений; версия данных меняется, только если
+    изменился набор креаторов. Вызывается непосредственно перед commit,
+    чтобы блокировка строки счетчиков держалась как можно меньше.
+    """
+    if init_counters(cursor):
+        # Строка только что заполнена пересчетом, в котором записанная пачка уже учтена
+        return
+    assignments = [f'{name} = {name} + %s' for name in COUNTER_NAMES]
+    if changes.get(CREATORS_CHANGED):
+        assignments.append(BUMP_DATASET_VERSION)
+    cursor.execute(
+        f"""
+        UPDATE stats_counters SET
+            {', '.join(assignments)},
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+        """,
+        [changes.get(name, 0) for name in COUNTER_NAMES]
+    )
+
+
+def read_counter(cursor, name: str) -> Optional[int]:
+    """Значение одного счетчика или None, если таблицы счетчиков еще нет."""
+    if name not in COUNTER_NAMES:
+        raise ValueError(f"Неизвестный счетчик: {name}")
+    cursor.execute(f"SELECT {name} FROM stats_counters WHERE id = 1")
+    result = cursor.fetchone()
+    return int(result[0]) if result else None
+
+
+def read_dataset_version(cursor) -> Optional[int]:
+    """Текущая версия данных или None, если таблицы счетчиков еще нет."""
+    cursor.execute("SELECT dataset_version FROM stats_counters WHERE id = 1")
+    result = cursor.fetchone()
+    return int(result[0]) if result else None
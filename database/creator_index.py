@@ -0,0 +1,60 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+# Короче этого префикс не разрешается: "id 1" или "id ab" почти наверняка не обрезанный ID
+MIN_PREFIX_LENGTH = 6
+
+
+class CreatorIndex:
+    """
+    ID креаторов в памяти: словарь для проверки существования и
+    отсортированный список для поиска по префиксу (бинарный поиск).
+    Поиск не зависит от регистра, а возвращаются ID в том виде, в каком
+    они записаны в базе (по ним идут запросы).
+
+    Индекс неизменяемый; после загрузки данных строится новый (см.
+    QueryManager.get_creator_index), version — dataset_version из
+    stats_counters, на которой он построен.
+    """
+
+    def __init__(self, creator_ids: Iterable[str], version: Optional[int] = None):
+        # ID в нижнем регистре -> ID из базы
+        self._ids: Dict[str, str] = {creator_id.lower(): creator_id for creator_id in creator_ids}
+        self._sorted: List[str] = sorted(self._ids)
+        self.version = version
+
+    @classmethod
+    def load(cls, cursor, version: Optional[int] = None) -> "CreatorIndex":
+        """Все ID креаторов из таблицы videos (по индексу idx_videos_creator_id)."""
+        cursor.execute("SELECT DISTINCT creator_id FROM videos")
+        return cls((row[0] for row in cursor), version)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def __contains__(self, creator_id: str) -> bool:
+        return creator_id.lower() in self._ids
+
+    def matches(self, prefix: str, limit: int = 2) -> List[str]:
+        """Первые limit ID, начинающихся с prefix."""
+        prefix = prefix.lower()
+        found = []
+        for i in range(bisect_left(self._sorted, prefix), len(self._sorted)):
+            if len(found) >= limit or not self._sorted[i].startswith(prefix):
+                break
+            found.append(self._ids[self._sorted[i]])
+        return found
+
+    def resolve(self, creator_ref: str) -> Optional[str]:
+        """
+        Полный ID по ссылке из запроса: сам ID, если он есть в базе, или
+        единственный ID с таким префиксом. None — креатора нет или префикс
+        неоднозначен.
+        """
+        creator_id = self._ids.get(creator_ref.lower())
+        if creator_id is not None:
+            return creator_id
+        if len(creator_ref) < MIN_PREFIX_LENGTH:
+            return None
+        found = self.matches(creator_ref)
+        return found[0] if len(found) == 1 else None
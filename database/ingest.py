@@ -0,0 +1,322 @@
+"""
+Сервис приема снапшотов в реальном времени.
+
+События (по одному снапшоту) принимаются из stdin в формате NDJSON или
+по HTTP (POST /snapshots), буферизуются в asyncio-очереди и записываются
+микро-пачками через COPY во временные таблицы со слиянием.
+
+Запуск: python -m database.ingest --source http --port 8081
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+from database.counters import apply_counter_changes, create_counters_table, track_counter_changes
+from database.loader import (
+    SNAPSHOTS_ON_CONFLICT, copy_frame, create_staging_tables, get_db_connection
+)
+from database.validation import COUNTER_COLUMNS, DELTA_COLUMNS, SNAPSHOT_COLUMNS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Поля события, по которым можно создать еще неизвестное видео
+EVENT_VIDEO_COLUMNS = ['video_id', 'creator_id', 'video_created_at']
+
+# Маркер остановки цикла записи
+STOP = object()
+
+
+def build_event_frames(events: List[dict]):
+    """
+    Таблицы снапшотов и новых видео из пачки событий.
+
+    Приращения снапшотов, у которых в пачке есть предыдущий снапшот того же
+    видео, пересчитываются по накопительным значениям. У первого снапшота
+    видео в пачке незаполненные delta_* остаются пустыми и вычисляются при
+    слиянии относительно последнего снапшота в базе.
+    """
+    frame = pd.DataFrame.from_records(events)
+    if 'id' in frame.columns:
+        # Идентификатор снапшота допускается и в поле id, как в выгрузке videos.json
+        snapshot_ids = frame['snapshot_id'] if 'snapshot_id' in frame.columns else None
+        frame['snapshot_id'] = frame['id'] if snapshot_ids is None else snapshot_ids.fillna(frame['id'])
+    frame = frame.reindex(columns=list(dict.fromkeys(SNAPSHOT_COLUMNS + EVENT_VIDEO_COLUMNS)))
+    frame = frame.dropna(subset=['snapshot_id', 'video_id', 'created_at'])
+    frame = frame.drop_duplicates('snapshot_id', keep='last')
+
+    for column in COUNTER_COLUMNS:
+        frame[column] = frame[column].fillna(0).astype('int64')
+
+    frame = frame.assign(
+        _order=pd.to_datetime(frame['created_at'], utc=True, format='ISO8601', errors='coerce')
+    ).dropna(subset=['_order']).sort_values(['video_id', '_order'], kind='stable')
+
+    video_ids = frame['video_id'].to_numpy()
+    first = np.ones(len(frame), dtype=bool)
+    first[1:] = video_ids[1:] != video_ids[:-1]
+
+    for counter, delta in zip(COUNTER_COLUMNS, DELTA_COLUMNS):
+        values = frame[counter].to_numpy()
+        recomputed = np.zeros_like(values)
+        recomputed[1:] = values[1:] - values[:-1]
+        given = frame[delta].astype('Int64')
+        frame[delta] = given.where(first, pd.array(recomputed, dtype='Int64'))
+
+    videos_df = frame.dropna(subset=['creator_id', 'video_created_at'])[EVENT_VIDEO_COLUMNS]
+    videos_df = videos_df.drop_duplicates('video_id').rename(columns={'video_id': 'id'})
+
+    return videos_df, frame[SNAPSHOT_COLUMNS]
+
+
+class SnapshotIngestor:
+    """Прием событий в очередь и запись микро-пачками."""
+
+    def __init__(self, batch_size: int = 5000, flush_interval: float = 1.0,
+                 queue_size: int = 100000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.conn = None
+        self.stats: Dict[str, float] = {
+            'received': 0,
+            'written': 0,
+            'skipped_unknown_video': 0,
+            'failed': 0,
+            'batches': 0,
+            'last_flush_seconds': 0.0,
+        }
+
+    async def submit(self, event: dict):
+        """Поставить событие в очередь (ждет, если очередь заполнена)."""
+        await self.queue.put(event)
+        self.stats['received'] += 1
+
+    async def run(self):
+        """Основной цикл: собрать пачку по размеру или по времени и записать."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            event = await self.queue.get()
+            if event is STOP:
+                break
+            batch = [event]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    # Все, что уже лежит в очереди, забирается без ожидания
+                    event = self.queue.get_nowait() if not self.queue.empty() \
+                        else await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            await asyncio.to_thread(self._flush, batch)
+
+    async def stop(self):
+        """Попросить цикл записи дописать очередь и завершиться."""
+        await self.queue.put(STOP)
+
+    def _get_connection(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = get_db_connection()
+            with self.conn.cursor() as cursor:
+                create_staging_tables(cursor)
+                create_counters_table(cursor)
+            self.conn.commit()
+        return self.conn
+
+    def _flush(self, events: List[dict]):
+        """Запись пачки одной транзакцией (выполняется в отдельном потоке)."""
+        started = time.perf_counter()
+        try:
+            videos_df, snapshots_df = build_event_frames(events)
+            conn = self._get_connection()
+            changes = {}
+            video_ids = set(videos_df['id']) | set(snapshots_df['video_id'])
+            with conn.cursor() as cursor:
+                with track_counter_changes(cursor, video_ids, snapshots_df['snapshot_id'], changes,
+                                           videos_df['creator_id']):
+                    written = self._merge(cursor, videos_df, snapshots_df)
+                apply_counter_changes(cursor, changes)
+            conn.commit()
+
+            self.stats['written'] += written
+            self.stats['skipped_unknown_video'] += len(snapshots_df) - written
+            self.stats['batches'] += 1
+        except Exception as e:
+            if self.conn is not None and not self.conn.closed:
+                self.conn.rollback()
+            self.stats['failed'] += len(events)
+            logger.error(f"Ошибка записи пачки из {len(events)} событий: {e}", exc_info=True)
+        finally:
+            self.stats['last_flush_seconds'] = time.perf_counter() - started
+
+    def _merge(self, cursor, videos_df, snapshots_df) -> int:
+        """Слияние пачки с основными таблицами. Возвращает число записанных снапшотов."""
+        cursor.execute("TRUNCATE stage_videos, stage_snapshots")
+        if not videos_df.empty:
+            copy_frame(cursor, 'stage_videos', videos_df)
+            cursor.execute("""
+                INSERT INTO videos (id, creator_id, video_created_at)
+                SELECT id, creator_id, video_created_at FROM stage_videos
+                ON CONFLICT (id) DO NOTHING
+            """)
+        if snapshots_df.empty:
+            return 0
+        copy_frame(cursor, 'stage_snapshots', snapshots_df)
+
+        # Пустые приращения считаются от последнего снапшота видео в базе
+        cursor.execute(f"""
+            INSERT INTO video_snapshots ({', '.join(SNAPSHOT_COLUMNS)})
+            SELECT
+                s.snapshot_id, s.video_id,
+                s.views_count, s.likes_count, s.comments_count, s.reports_count,
+                COALESCE(s.delta_views_count, s.views_count - COALESCE(p.views_count, 0)),
+                COALESCE(s.delta_likes_count, s.likes_count - COALESCE(p.likes_count, 0)),
+                COALESCE(s.delta_comments_count, s.comments_count - COALESCE(p.comments_count, 0)),
+                COALESCE(s.delta_reports_count, s.reports_count - COALESCE(p.reports_count, 0)),
+                s.created_at
+            FROM stage_snapshots s
+            JOIN videos v ON v.id = s.video_id
+            LEFT JOIN LATERAL (
+                SELECT views_count, likes_count, comments_count, reports_count
+                FROM video_snapshots vs
+                WHERE vs.video_id = s.video_id AND vs.created_at < s.created_at
+                ORDER BY vs.created_at DESC
+                LIMIT 1
+            ) p ON TRUE
+        """ + SNAPSHOTS_ON_CONFLICT)
+        written = cursor.rowcount
+
+        # Текущие значения видео берем из самого свежего снапшота
+        cursor.execute("""
+            UPDATE videos v SET
+                views_count = s.views_count,
+                likes_count = s.likes_count,
+                comments_count = s.comments_count,
+                reports_count = s.reports_count,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT DISTINCT ON (video_id)
+                    video_id, views_count, likes_count, comments_count, reports_count, created_at
+                FROM stage_snapshots
+                ORDER BY video_id, created_at DESC
+            ) s
+            WHERE v.id = s.video_id
+            AND NOT EXISTS (
+                SELECT 1 FROM video_snapshots vs
+                WHERE vs.video_id = s.video_id AND vs.created_at > s.created_at
+            )
+        """)
+        return written
+
+    def close(self):
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+
+
+def parse_events(payload: bytes) -> List[dict]:
+    """Разбор тела запроса: JSON объект, JSON массив или NDJSON."""
+    payload = payload.strip()
+    if not payload:
+        return []
+    if payload.startswith(b'['):
+        return json.loads(payload)
+    return [json.loads(line) for line in payload.splitlines() if line.strip()]
+
+
+async def read_stdin(ingestor: SnapshotIngestor):
+    """Чтение NDJSON событий из stdin блоками строк."""
+    stream = sys.stdin.buffer
+    while True:
+        lines = await asyncio.to_thread(stream.readlines, 1 << 16)
+        if not lines:
+            break
+        for line in lines:
+            if line.strip():
+                try:
+                    await ingestor.submit(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Пропущена некорректная строка: {line[:100]!r}")
+
+
+def create_app(ingestor: SnapshotIngestor) -> web.Application:
+    """HTTP приложение: POST /snapshots принимает события, GET /health — статистика."""
+
+    async def snapshots_handler(request: web.Request) -> web.Response:
+        try:
+            events = parse_events(await request.read())
+        except ValueError as e:
+            return web.json_response({'error': f'invalid json: {e}'}, status=400)
+        for event in events:
+            await ingestor.submit(event)
+        return web.json_response({'accepted': len(events)}, status=202)
+
+    async def health_handler(request: web.Request) -> web.Response:
+        return web.json_response({**ingestor.stats, 'queue_size': ingestor.queue.qsize()})
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post('/snapshots', snapshots_handler)
+    app.router.add_get('/health', health_handler)
+    return app
+
+
+async def main_async(args):
+    ingestor = SnapshotIngestor(
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        queue_size=args.queue_size,
+    )
+    writer = asyncio.create_task(ingestor.run())
+
+    try:
+        if args.source == 'stdin':
+            await read_stdin(ingestor)
+        else:
+            runner = web.AppRunner(create_app(ingestor))
+            await runner.setup()
+            await web.TCPSite(runner, args.host, args.port).start()
+            logger.info(f"Прием снапшотов на http://{args.host}:{args.port}/snapshots")
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await runner.cleanup()
+    finally:
+        await ingestor.stop()
+        await writer
+        ingestor.close()
+        logger.info(f"Итог приема: {ingestor.stats}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Прием снапшотов в реальном времени")
+    parser.add_argument('--source', choices=['stdin', 'http'], default='stdin')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--batch-size', type=int, default=5000, help="Максимальный размер пачки")
+    parser.add_argument('--flush-interval', type=float, default=1.0,
+                        help="Максимальное время ожидания пачки (сек)")
+    parser.add_argument('--queue-size', type=int, default=100000, help="Размер буфера событий")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main_async(parse_args()))
+    except KeyboardInterrupt:
+        print("\n⏹️ Прием остановлен")
@@ -0,0 +1,90 @@
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+# Фазы загрузки в порядке выполнения
+PHASES = ('read', 'parse', 'transform', 'transfer', 'merge', 'index', 'commit')
+
+
+def peak_rss_mb() -> float:
+    """
+    Пиковое потребление памяти процессом и его дочерними процессами (МБ).
+    Это пик за всю жизнь процесса: сравнивать замеры можно только из
+    разных процессов (бенчмарк запускает каждый сценарий в новом).
+    """
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # В Linux ru_maxrss в килобайтах, в macOS — в байтах
+    divider = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return peak / divider
+
+
+class LoadStats:
+    """Время по фазам загрузки и количество загруженных строк."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.videos = 0
+        self.snapshots = 0
+        self.wall_seconds = 0.0
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замер времени блока кода в указанной фазе."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+    def add(self, name: str, seconds: float):
+        """Добавить уже измеренное время к фазе."""
+        self.seconds[name] += seconds
+
+    def merge(self, other: 'LoadStats'):
+        """Сложение статистики другого процесса (время фаз суммируется)."""
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+        self.videos += other.videos
+        self.snapshots += other.snapshots
+
+    @property
+    def rows(self) -> int:
+        return self.videos + self.snapshots
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall = self.wall_seconds or sum(self.seconds.values())
+        return {
+            'videos': self.videos,
+            'snapshots': self.snapshots,
+            'wall_seconds': round(wall, 4),
+            'rows_per_sec': round(self.rows / wall, 1) if wall else 0.0,
+            'phases': {
+                name: {
+                    'seconds': round(seconds, 4),
+                    'rows_per_sec': round(self.rows / seconds, 1) if seconds else None,
+                }
+                for name, seconds in self.seconds.items()
+            },
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        }
+
+    def print_summary(self):
+        """Вывод таблицы времени по фазам."""
+        summary = self.to_dict()
+        print(f"⏱️  Время загрузки: {summary['wall_seconds']} с, "
+              f"{summary['rows_per_sec']} строк/с, пик памяти {summary['peak_rss_mb']} МБ")
+        for name, phase in summary['phases'].items():
+            rate = f"{phase['rows_per_sec']} строк/с" if phase['rows_per_sec'] else "-"
+            print(f"  {name:<10} {phase['seconds']:>10.3f} с  {rate}")
+
+    def write(self, path: str):
+        """Сохранение статистики в JSON файл."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
@@ -1,8 +1,84 @@
+import argparse
+import glob
+import gzip
+import io
 import json
+import os
+import re
+import time
 from datetime import datetime
+from functools import partial
+from multiprocessing import Pool
+from typing import Iterator, List, Optional, Tuple
 import psycopg2
 from psycopg2.extras import execute_values
 from config.config import Config
+from database.counters import (
+    apply_counter_changes, create_counters_table, refresh_counters, track_counter_changes
+)
+from database.load_stats import LoadStats
+from database.validation import (
+    SNAPSHOT_COLUMNS, VIDEO_COLUMNS, ValidationReport, build_frames, validate_frames
+)
+
+try:
+    import zstandard
+except ImportError:  # zstd-сжатие поддерживается только при установленном zstandard
+    zstandard = None
+
+# Сигнатуры сжатых файлов (определяем формат по содержимому, а не по расширению)
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Расширения файлов с одним видео на строку
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+# Количество видео в одной пачке вставки
+BATCH_SIZE = 1000
+
+# Минимальный размер куска NDJSON файла для отдельного воркера
+MIN_CHUNK_BYTES = 1024 * 1024
+
+# Размер куска чтения входного файла: время чтения и разбора замеряется
+# на кусок, а не на каждую строку
+READ_CHUNK_BYTES = 1024 * 1024
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Режимы записи: построчная вставка или COPY во временные таблицы со слиянием
+LOAD_MODES = ('insert', 'copy')
+
+VIDEOS_ON_CONFLICT = """
+    ON CONFLICT (id) DO UPDATE SET
+        views_count = EXCLUDED.views_count,
+        likes_count = EXCLUDED.likes_count,
+        comments_count = EXCLUDED.comments_count,
+        reports_count = EXCLUDED.reports_count,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+SNAPSHOTS_ON_CONFLICT = """
+    ON CONFLICT (snapshot_id) DO UPDATE SET
+        views_count = EXCLUDED.views_count,
+        likes_count = EXCLUDED.likes_count,
+        comments_count = EXCLUDED.comments_count,
+        reports_count = EXCLUDED.reports_count,
+        delta_views_count = EXCLUDED.delta_views_count,
+        delta_likes_count = EXCLUDED.delta_likes_count,
+        delta_comments_count = EXCLUDED.delta_comments_count,
+        delta_reports_count = EXCLUDED.delta_reports_count,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+# Вторичные индексы; при полной перезагрузке строятся после вставки данных
+INDEX_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_videos_creator_id ON videos(creator_id)",
+    "CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos(video_created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_videos_views ON videos(views_count)",
+    "CREATE INDEX IF NOT EXISTS idx_snapshots_video_id ON video_snapshots(video_id)",
+    "CREATE INDEX IF NOT EXISTS idx_snapshots_created_at ON video_snapshots(created_at)",
+]
 
 
 def get_db_connection():
@@ -10,8 +86,11 @@ def get_db_connection():
     params = Config.get_db_params()
     return psycopg2.connect(**params)
 
-def recreate_tables():
-    """Пересоздание таблиц с правильной схемой."""
+def recreate_tables(with_indexes: bool = True):
+    """
+    Пересоздание таблиц с правильной схемой.
+    При with_indexes=False вторичные индексы не создаются (см. create_indexes).
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -19,6 +98,7 @@ def recreate_tables():
         # Удаляем старые таблицы если есть
         cursor.execute("DROP TABLE IF EXISTS video_snapshots CASCADE")
         cursor.execute("DROP TABLE IF EXISTS videos CASCADE")
+        cursor.execute("DROP TABLE IF EXISTS stats_counters")
         
         # Создаем таблицы заново
         cursor.execute("""
@@ -52,12 +132,12 @@ def recreate_tables():
             )
         """)
         
+        create_counters_table(cursor)
+        
         # Создаем индексы
-        cursor.execute("CREATE INDEX idx_videos_creator_id ON videos(creator_id)")
-        cursor.execute("CREATE INDEX idx_videos_created_at ON videos(video_created_at)")
-        cursor.execute("CREATE INDEX idx_videos_views ON videos(views_count)")
-        cursor.execute("CREATE INDEX idx_snapshots_video_id ON video_snapshots(video_id)")
-        cursor.execute("CREATE INDEX idx_snapshots_created_at ON video_snapshots(created_at)")
+        if with_indexes:
+            for statement in INDEX_STATEMENTS:
+                cursor.execute(statement)
         
         conn.commit()
         print("✅ Таблицы пересозданы с правильной схемой")
@@ -70,125 +150,534 @@ def recreate_tables():
         cursor.close()
         conn.close()
 
-def load_json_to_db(json_file_path: str):
-    """Загрузка данных из JSON файла в базу данных."""
-    # Проверяем конфигурацию
-    Config.validate()
+def create_indexes(stats: Optional[LoadStats] = None):
+    """Построение вторичных индексов (быстрее, чем поддерживать их при вставке)."""
+    stats = stats or LoadStats()
     conn = get_db_connection()
     cursor = conn.cursor()
-    
+
     try:
-        # Чтение JSON файла
-        print(f"📖 Чтение файла: {json_file_path}")
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Извлекаем список видео
-        if isinstance(data, dict) and 'videos' in data:
-            videos_list = data['videos']
+        with stats.phase('index'):
+            for statement in INDEX_STATEMENTS:
+                cursor.execute(statement)
+            conn.commit()
+        print("✅ Индексы построены")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Ошибка при создании индексов: {e}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def _refresh_counters():
+    """Полный пересчет stats_counters в отдельной транзакции."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            refresh_counters(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+def expand_input_paths(patterns) -> List[str]:
+    """Раскрытие путей и glob-шаблонов в отсортированный список файлов."""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if matches:
+            paths.extend(matches)
+        elif os.path.exists(pattern):
+            paths.append(pattern)
+
+    # Убираем дубликаты, сохраняя порядок
+    return list(dict.fromkeys(paths))
+
+def detect_compression(path: str) -> Optional[str]:
+    """Определение сжатия файла по сигнатуре: 'gzip', 'zstd' или None."""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if magic.startswith(ZSTD_MAGIC):
+        return 'zstd'
+    return None
+
+def open_input(path: str) -> io.BufferedIOBase:
+    """Открытие файла на чтение с потоковой распаковкой (без копии на диске)."""
+    compression = detect_compression(path)
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError(
+                f"Файл {path} сжат zstd, установите пакет: pip install zstandard"
+            )
+        raw = open(path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.BufferedReader(reader)
+    return open(path, 'rb')
+
+def is_ndjson(path: str) -> bool:
+    """Проверка, что файл содержит по одному видео на строку (NDJSON)."""
+    name = path.lower()
+    for suffix in ('.gz', '.zst', '.zstd'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    if name.endswith(NDJSON_EXTENSIONS):
+        return True
+    if name.endswith('.json'):
+        return False
+
+    # Неизвестное расширение: первая непустая строка должна быть целым объектом видео
+    with open_input(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                first = json.loads(line)
+            except ValueError:
+                return False
+            return isinstance(first, dict) and 'videos' not in first
+    return False
+
+def split_ndjson(path: str, parts: int) -> List[Tuple[int, int]]:
+    """
+    Разбиение несжатого NDJSON файла на диапазоны байт,
+    выровненные по границам строк.
+    """
+    size = os.path.getsize(path)
+    parts = max(1, min(parts, size // MIN_CHUNK_BYTES or 1))
+    if parts == 1:
+        return [(0, size)]
+
+    offsets = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(size * i // parts)
+            f.readline()  # дочитываем строку, чтобы кусок начинался с новой строки
+            offset = f.tell()
+            if offsets[-1] < offset < size:
+                offsets.append(offset)
+    offsets.append(size)
+    return list(zip(offsets[:-1], offsets[1:]))
+
+def iter_ndjson(path: str, start: int = 0, end: Optional[int] = None,
+                stats: Optional[LoadStats] = None) -> Iterator[dict]:
+    """Потоковое чтение видео из NDJSON (опционально только из диапазона байт)."""
+    stats = stats or LoadStats()
+    # Диапазоны байт имеют смысл только для несжатых файлов
+    ranged = bool(start) or end is not None
+
+    with (open(path, 'rb') if ranged else open_input(path)) as f:
+        if ranged:
+            f.seek(start)
+        # Диапазоны из split_ndjson кончаются на границе строки
+        remaining = None if end is None else end - start
+        tail = b''
+        while remaining is None or remaining > 0:
+            size = READ_CHUNK_BYTES if remaining is None else min(READ_CHUNK_BYTES, remaining)
+            with stats.phase('read'):
+                chunk = f.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()  # строка, которая продолжается в следующем куске
+            with stats.phase('parse'):
+                videos = [json.loads(line) for line in lines if line.strip()]
+            yield from videos
+        if tail.strip():
+            with stats.phase('parse'):
+                video = json.loads(tail)
+            yield video
+
+class _JsonStream:
+    """
+    Текст JSON, читаемый кусками по READ_CHUNK_BYTES: значения разбираются
+    json.JSONDecoder.raw_decode по мере чтения, в памяти — только
+    неразобранный хвост.
+    """
+
+    def __init__(self, f: io.BufferedIOBase, stats: LoadStats):
+        self._reader = io.TextIOWrapper(f, encoding='utf-8')
+        self._decoder = json.JSONDecoder()
+        self._stats = stats
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        with self._stats.phase('read'):
+            chunk = self._reader.read(READ_CHUNK_BYTES)
+        if chunk:
+            self.text = self.text[self.pos:] + chunk
+            self.pos = 0
         else:
-            videos_list = data
-        
-        print(f"✅ Найдено {len(videos_list)} видео")
-        
-        # Подготовка данных
-        videos_data = []
-        snapshots_data = []
-        
-        for i, video in enumerate(videos_list, 1):
-            # Видео
-            videos_data.append((
-                video['id'],
-                video['creator_id'],
-                video['video_created_at'],
-                video.get('views_count', 0),
-                video.get('likes_count', 0),
-                video.get('comments_count', 0),
-                video.get('reports_count', 0)
-            ))
-            
-            # Снапшоты
-            for snapshot in video.get('snapshots', []):
-                snapshots_data.append((
-                    snapshot.get('id'),  # snapshot_id
-                    video['id'],          # video_id
-                    snapshot.get('views_count', 0),
-                    snapshot.get('likes_count', 0),
-                    snapshot.get('comments_count', 0),
-                    snapshot.get('reports_count', 0),
-                    snapshot.get('delta_views_count', 0),
-                    snapshot.get('delta_likes_count', 0),
-                    snapshot.get('delta_comments_count', 0),
-                    snapshot.get('delta_reports_count', 0),
-                    snapshot.get('created_at')
-                ))
-            
-            # Прогресс
-            if i % 100 == 0:
-                print(f"  📦 Обработано {i} видео...")
-        
-        print(f"📊 Подготовлено: {len(videos_data)} видео, {len(snapshots_data)} снапшотов")
-        
-        # Вставка видео
-        print("💾 Вставка видео...")
+            self.eof = True
+
+    def _skip_whitespace(self):
+        self.pos = JSON_WHITESPACE.match(self.text, self.pos).end()
+
+    def expect(self, chars: str) -> str:
+        """Следующий непробельный символ, один из chars."""
+        while True:
+            self._skip_whitespace()
+            if self.pos < len(self.text) or self.eof:
+                break
+            self._fill()
+        char = self.text[self.pos:self.pos + 1]
+        if not char or char not in chars:
+            raise ValueError(f"Неверный JSON: ожидался один из символов {chars!r}, найдено {char!r}")
+        self.pos += 1
+        return char
+
+    def _decode(self):
+        """Значение с текущей позиции или None, если оно еще не дочитано."""
+        self._skip_whitespace()
+        try:
+            value, end = self._decoder.raw_decode(self.text, self.pos)
+        except json.JSONDecodeError:
+            if self.eof:
+                raise
+            return None
+        if end == len(self.text) and not self.eof:
+            return None  # число могло продолжиться в следующем куске
+        self.pos = end
+        return (value,)
+
+    def value(self):
+        """Следующее значение целиком."""
+        while True:
+            decoded = self._decode()
+            if decoded is not None:
+                return decoded[0]
+            self._fill()
+
+    def items(self) -> Iterator:
+        """Элементы массива, чья '[' уже прочитана; разбираются пачкой на каждый прочитанный кусок."""
+        need_separator = False
+        closed = False
+        while not closed:
+            batch = []
+            with self._stats.phase('parse'):
+                while True:
+                    self._skip_whitespace()
+                    if self.pos >= len(self.text):
+                        break
+                    char = self.text[self.pos]
+                    if char == ']':
+                        self.pos += 1
+                        closed = True
+                        break
+                    if need_separator:
+                        if char != ',':
+                            raise ValueError(f"Неверный JSON: ожидалась ',' в списке, найдено {char!r}")
+                        self.pos += 1
+                        need_separator = False
+                        continue
+                    decoded = self._decode()
+                    if decoded is None:
+                        break
+                    batch.append(decoded[0])
+                    need_separator = True
+            yield from batch
+            if closed:
+                return
+            if self.eof:
+                raise ValueError("Неверный JSON: список не закрыт")
+            self._fill()
+
+def iter_json_videos(f: io.BufferedIOBase, stats: LoadStats) -> Iterator[dict]:
+    """
+    Потоковый разбор выгрузки {"videos": [...]} или [...]: видео
+    разбираются по мере чтения, весь файл и его дерево в памяти не держатся.
+    """
+    stream = _JsonStream(f, stats)
+    if stream.expect('[{') == '{':
+        while True:
+            if stream.expect('"}') == '}':
+                return  # в объекте нет списка videos
+            stream.pos -= 1  # ключ разбирается вместе с кавычкой
+            key = stream.value()
+            stream.expect(':')
+            if key == 'videos':
+                stream.expect('[')
+                break
+            stream.value()  # прочие поля выгрузки пропускаются
+            if stream.expect(',}') == '}':
+                return
+    yield from stream.items()
+
+def iter_videos(path: str, stats: Optional[LoadStats] = None) -> Iterator[dict]:
+    """Потоковое чтение видео из JSON или NDJSON файла (в том числе сжатого)."""
+    stats = stats or LoadStats()
+    if is_ndjson(path):
+        yield from iter_ndjson(path, stats=stats)
+        return
+
+    with open_input(path) as f:
+        yield from iter_json_videos(f, stats)
+
+def plan_load_units(paths: List[str], workers: int) -> List[Tuple[str, int, Optional[int]]]:
+    """
+    Разбиение входных файлов на независимые единицы загрузки.
+    Несжатые NDJSON файлы делятся по смещениям байт, остальные читаются целиком.
+    """
+    units = []
+    for path in paths:
+        if workers > 1 and detect_compression(path) is None and is_ndjson(path):
+            for start, end in split_ndjson(path, workers):
+                units.append((path, start, end))
+        else:
+            units.append((path, 0, None))
+    return units
+
+def _iter_unit_videos(unit: Tuple[str, int, Optional[int]],
+                      stats: Optional[LoadStats] = None) -> Iterator[dict]:
+    """Видео одной единицы загрузки."""
+    path, start, end = unit
+    if end is not None:
+        return iter_ndjson(path, start, end, stats=stats)
+    return iter_videos(path, stats=stats)
+
+def _insert_rows(cursor, videos_df, snapshots_df):
+    """Вставка пачки через INSERT ... VALUES."""
+    video_columns = ', '.join(VIDEO_COLUMNS)
+    execute_values(
+        cursor,
+        f"INSERT INTO videos ({video_columns}) VALUES %s" + VIDEOS_ON_CONFLICT,
+        list(videos_df.astype(object).itertuples(index=False, name=None))
+    )
+
+    if not snapshots_df.empty:
+        snapshot_columns = ', '.join(SNAPSHOT_COLUMNS)
         execute_values(
             cursor,
-            """
-            INSERT INTO videos 
-            (id, creator_id, video_created_at, views_count, likes_count, comments_count, reports_count)
-            VALUES %s
-            ON CONFLICT (id) DO UPDATE SET
-                views_count = EXCLUDED.views_count,
-                likes_count = EXCLUDED.likes_count,
-                comments_count = EXCLUDED.comments_count,
-                reports_count = EXCLUDED.reports_count,
-                updated_at = CURRENT_TIMESTAMP
-            """,
-            videos_data
+            f"INSERT INTO video_snapshots ({snapshot_columns}) VALUES %s" + SNAPSHOTS_ON_CONFLICT,
+            list(snapshots_df.astype(object).itertuples(index=False, name=None))
         )
-        
-        # Вставка снапшотов
-        print("💾 Вставка снапшотов...")
-        execute_values(
-            cursor,
-            """
-            INSERT INTO video_snapshots 
-            (snapshot_id, video_id, views_count, likes_count, comments_count, reports_count,
-             delta_views_count, delta_likes_count, delta_comments_count, delta_reports_count, created_at)
-            VALUES %s
-            ON CONFLICT (snapshot_id) DO UPDATE SET
-                views_count = EXCLUDED.views_count,
-                likes_count = EXCLUDED.likes_count,
-                comments_count = EXCLUDED.comments_count,
-                reports_count = EXCLUDED.reports_count,
-                delta_views_count = EXCLUDED.delta_views_count,
-                delta_likes_count = EXCLUDED.delta_likes_count,
-                delta_comments_count = EXCLUDED.delta_comments_count,
-                delta_reports_count = EXCLUDED.delta_reports_count,
-                updated_at = CURRENT_TIMESTAMP
-            """,
-            snapshots_data
+
+def create_staging_tables(cursor):
+    """Временные таблицы для COPY (живут до конца сессии)."""
+    cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS stage_videos AS
+        SELECT {', '.join(VIDEO_COLUMNS)} FROM videos WITH NO DATA
+    """)
+    cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS stage_snapshots AS
+        SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM video_snapshots WITH NO DATA
+    """)
+
+def copy_frame(cursor, table: str, frame):
+    """Передача таблицы в PostgreSQL через COPY ... FROM STDIN."""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+def _copy_rows(cursor, videos_df, snapshots_df, stats: LoadStats):
+    """Вставка пачки через COPY во временные таблицы и слияние с основными."""
+    with stats.phase('transfer'):
+        cursor.execute("TRUNCATE stage_videos, stage_snapshots")
+        copy_frame(cursor, 'stage_videos', videos_df)
+        if not snapshots_df.empty:
+            copy_frame(cursor, 'stage_snapshots', snapshots_df)
+
+    with stats.phase('merge'):
+        video_columns = ', '.join(VIDEO_COLUMNS)
+        cursor.execute(
+            f"INSERT INTO videos ({video_columns}) SELECT {video_columns} FROM stage_videos"
+            + VIDEOS_ON_CONFLICT
         )
-        
-        conn.commit()
-        print(f"🎉 УСПЕХ! Загружено: {len(videos_data)} видео и {len(snapshots_data)} снапшотов")
-        
-    except Exception as e:
+        snapshot_columns = ', '.join(SNAPSHOT_COLUMNS)
+        cursor.execute(
+            f"INSERT INTO video_snapshots ({snapshot_columns}) SELECT {snapshot_columns} FROM stage_snapshots"
+            + SNAPSHOTS_ON_CONFLICT
+        )
+
+def _write_batch(cursor, videos: List[dict], mode: str, validate: bool,
+                 report: ValidationReport, stats: LoadStats, changes: dict):
+    """Подготовка, проверка и запись одной пачки видео."""
+    with stats.phase('transform'):
+        videos_df, snapshots_df = build_frames(videos)
+        if validate:
+            videos_df, snapshots_df = validate_frames(videos_df, snapshots_df, report)
+
+    with track_counter_changes(cursor, videos_df['id'], snapshots_df['snapshot_id'], changes,
+                               videos_df['creator_id']):
+        if mode == 'copy':
+            _copy_rows(cursor, videos_df, snapshots_df, stats)
+        else:
+            # INSERT ... VALUES передает и сливает строки одной командой
+            with stats.phase('transfer'):
+                _insert_rows(cursor, videos_df, snapshots_df)
+
+    stats.videos += len(videos_df)
+    stats.snapshots += len(snapshots_df)
+
+def _load_unit(unit: Tuple[str, int, Optional[int]], mode: str = 'insert',
+               validate: bool = True) -> Tuple[LoadStats, ValidationReport]:
+    """Загрузка одной единицы в отдельной транзакции. Возвращает (статистику, отчет)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    report = ValidationReport()
+    stats = LoadStats()
+    changes = {}
+
+    try:
+        if mode == 'copy':
+            create_staging_tables(cursor)
+
+        batch = []
+        for video in _iter_unit_videos(unit, stats):
+            batch.append(video)
+            if len(batch) >= BATCH_SIZE:
+                _write_batch(cursor, batch, mode, validate, report, stats, changes)
+                batch = []
+                print(f"  📦 {unit[0]}: обработано {stats.videos} видео...")
+
+        if batch:
+            _write_batch(cursor, batch, mode, validate, report, stats, changes)
+
+        with stats.phase('commit'):
+            apply_counter_changes(cursor, changes)
+            conn.commit()
+        return stats, report
+
+    except Exception:
         conn.rollback()
-        print(f"❌ Ошибка: {e}")
-        import traceback
-        traceback.print_exc()
+        raise
     finally:
         cursor.close()
         conn.close()
 
+def load_json_to_db(json_file_path, workers: int = 1, mode: str = 'insert',
+                    validate: bool = True, report_path: Optional[str] = None,
+                    build_indexes: bool = False,
+                    stats_path: Optional[str] = None) -> Optional[LoadStats]:
+    """
+    Загрузка данных в базу данных.
+
+    Принимает путь, glob-шаблон или список путей. Поддерживаются JSON
+    (список видео или {"videos": [...]}) и NDJSON (одно видео на строку),
+    в том числе сжатые gzip/zstd. Несжатые NDJSON файлы при workers > 1
+    делятся по смещениям байт и загружаются параллельно.
+    При validate=True приращения delta_* пересчитываются по накопительным
+    значениям, а найденные проблемы записываются в отчет report_path.
+    Возвращает статистику по фазам загрузки или None при ошибке.
+    """
+    # Проверяем конфигурацию
+    Config.validate()
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Неизвестный режим загрузки: {mode}")
+
+    paths = expand_input_paths(json_file_path)
+    if not paths:
+        print(f"❌ Файлы не найдены: {json_file_path}")
+        return None
+
+    stats = LoadStats()
+    started = time.perf_counter()
+    try:
+        units = plan_load_units(paths, workers)
+        print(f"📖 Файлов: {len(paths)}, частей для загрузки: {len(units)}, режим: {mode}")
+
+        load_unit = partial(_load_unit, mode=mode, validate=validate)
+        if workers > 1 and len(units) > 1:
+            with Pool(processes=min(workers, len(units))) as pool:
+                results = pool.map(load_unit, units)
+        else:
+            results = [load_unit(unit) for unit in units]
+
+        for unit_stats, _ in results:
+            stats.merge(unit_stats)
+
+        if len(results) > 1:
+            # Параллельные воркеры могли пересекаться по идентификаторам — сверяем счетчики
+            _refresh_counters()
+        print(f"🎉 УСПЕХ! Загружено: {stats.videos} видео и {stats.snapshots} снапшотов")
+
+        if validate:
+            report = ValidationReport()
+            for _, unit_report in results:
+                report.merge(unit_report)
+            if report.has_issues:
+                print(f"⚠️  Найдены проблемы в данных: {report.counts}")
+            if report_path:
+                report.write(report_path)
+                print(f"📝 Отчет проверки: {report_path}")
+
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        stats = None
+
+    if build_indexes:
+        create_indexes(stats)
+
+    if stats is not None:
+        stats.wall_seconds = time.perf_counter() - started
+        stats.print_summary()
+        if stats_path:
+            stats.write(stats_path)
+    return stats
+
+def parse_args(argv=None):
+    """Аргументы командной строки загрузчика."""
+    parser = argparse.ArgumentParser(description="Загрузка видео в базу данных")
+    parser.add_argument(
+        'inputs', nargs='*', default=["data/videos.json"],
+        help="Файлы или glob-шаблоны (JSON/NDJSON, можно .gz/.zst)"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="Количество параллельных процессов загрузки"
+    )
+    parser.add_argument(
+        '--mode', choices=LOAD_MODES, default='insert',
+        help="insert — INSERT ... VALUES, copy — COPY во временные таблицы и слияние"
+    )
+    parser.add_argument(
+        '--no-validate', action='store_true',
+        help="Не проверять снапшоты и не пересчитывать delta_*"
+    )
+    parser.add_argument(
+        '--report', default="validation_report.json",
+        help="Куда записать отчет проверки данных"
+    )
+    parser.add_argument(
+        '--stats', default=None,
+        help="Куда записать время по фазам загрузки (JSON)"
+    )
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    # 1. Пересоздаем таблицы с правильной схемой
-    recreate_tables()
+    args = parse_args()
+
+    # 1. Пересоздаем таблицы с правильной схемой (индексы строятся после загрузки)
+    recreate_tables(with_indexes=False)
     
     # 2. Загружаем данные
-    json_file = "data/videos.json"
-    if os.path.exists(json_file):
-        load_json_to_db(json_file)
+    if expand_input_paths(args.inputs):
+        load_json_to_db(
+            args.inputs,
+            workers=args.workers,
+            mode=args.mode,
+            validate=not args.no_validate,
+            report_path=args.report,
+            build_indexes=True,
+            stats_path=args.stats,
+        )
     else:
-        print(f"❌ Файл не найден: {json_file}")
+        print(f"❌ Файл не найден: {', '.join(args.inputs)}")
+        create_indexes()
@@ -0,0 +1,151 @@
+"""
+Бенчмарк загрузчика: генерирует синтетический videos.json заданного размера
+и прогоняет все режимы загрузки на локальном PostgreSQL.
+
+Запуск: python -m database.loader_benchmark --videos 10000 --snapshots 24
+Внимание: таблицы videos и video_snapshots пересоздаются перед каждым прогоном.
+"""
+import argparse
+import gzip
+import json
+import os
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from database.loader import load_json_to_db, recreate_tables
+
+
+# Сценарии: (название, режим записи, формат файла, количество процессов)
+SCENARIOS: List[Tuple[str, str, str, str]] = [
+    ('insert-json', 'insert', 'json', 'single'),
+    ('copy-json', 'copy', 'json', 'single'),
+    ('insert-ndjson-parallel', 'insert', 'ndjson', 'parallel'),
+    ('copy-ndjson-parallel', 'copy', 'ndjson', 'parallel'),
+    ('copy-ndjson-gzip', 'copy', 'ndjson.gz', 'single'),
+]
+
+
+def generate_videos(videos: int, snapshots: int, seed: int):
+    """Синтетические видео с почасовыми снапшотами и согласованными приращениями."""
+    rng = random.Random(seed)
+    creators = ['%032x' % rng.getrandbits(128) for _ in range(max(1, videos // 20))]
+    base_time = datetime(2025, 11, 1)
+
+    for _ in range(videos):
+        created_at = base_time + timedelta(minutes=rng.randrange(30 * 24 * 60))
+        counters = {'views_count': 0, 'likes_count': 0, 'comments_count': 0, 'reports_count': 0}
+        video_snapshots = []
+
+        for hour in range(snapshots):
+            deltas = {
+                'views_count': rng.randrange(-5, 500),
+                'likes_count': rng.randrange(0, 50),
+                'comments_count': rng.randrange(0, 10),
+                'reports_count': rng.randrange(0, 2),
+            }
+            snapshot = {'id': '%032x' % rng.getrandbits(128)}
+            for name, delta in deltas.items():
+                counters[name] += delta
+                snapshot[name] = counters[name]
+                snapshot[f'delta_{name}'] = delta
+            snapshot['created_at'] = (created_at + timedelta(hours=hour + 1)).isoformat()
+            video_snapshots.append(snapshot)
+
+        yield {
+            'id': '%032x' % rng.getrandbits(128),
+            'creator_id': rng.choice(creators),
+            'video_created_at': created_at.isoformat(),
+            **counters,
+            'snapshots': video_snapshots,
+        }
+
+
+def write_inputs(output_dir: str, videos: int, snapshots: int, seed: int) -> dict:
+    """Запись одного и того же набора данных в форматах json, ndjson и ndjson.gz."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {
+        'json': os.path.join(output_dir, 'videos.json'),
+        'ndjson': os.path.join(output_dir, 'videos.ndjson'),
+        'ndjson.gz': os.path.join(output_dir, 'videos.ndjson.gz'),
+    }
+
+    with open(paths['json'], 'w', encoding='utf-8') as json_file, \
+            open(paths['ndjson'], 'w', encoding='utf-8') as ndjson_file, \
+            gzip.open(paths['ndjson.gz'], 'wt', encoding='utf-8') as gzip_file:
+        json_file.write('{"videos": [')
+        for i, video in enumerate(generate_videos(videos, snapshots, seed)):
+            line = json.dumps(video)
+            json_file.write((',' if i else '') + line)
+            ndjson_file.write(line + '\n')
+            gzip_file.write(line + '\n')
+        json_file.write(']}')
+
+    return paths
+
+
+def run_scenario(path: str, mode: str, workers: int) -> Optional[dict]:
+    """Один сценарий: пересоздание таблиц и загрузка; статистика словарем или None при ошибке."""
+    recreate_tables(with_indexes=False)
+    stats = load_json_to_db(path, workers=workers, mode=mode, build_indexes=True)
+    return stats.to_dict() if stats is not None else None
+
+
+def run_benchmark(args) -> List[dict]:
+    """Прогон выбранных сценариев, результаты дописываются в JSONL."""
+    print(f"🧪 Генерация данных: {args.videos} видео × {args.snapshots} снапшотов (seed={args.seed})")
+    paths = write_inputs(args.output_dir, args.videos, args.snapshots, args.seed)
+
+    results = []
+    for name, mode, file_format, parallelism in SCENARIOS:
+        if args.scenarios and name not in args.scenarios:
+            continue
+
+        print(f"\n▶️  Сценарий {name}")
+        workers = args.workers if parallelism == 'parallel' else 1
+        # Каждый сценарий — в новом процессе: ru_maxrss считает пик за всю
+        # жизнь процесса, и в общем процессе сценарии повторяли бы пик предыдущих
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            stats = executor.submit(run_scenario, paths[file_format], mode, workers).result()
+        if stats is None:
+            print(f"❌ Сценарий {name} завершился ошибкой")
+            continue
+
+        result = {
+            'scenario': name,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'videos_requested': args.videos,
+            'snapshots_per_video': args.snapshots,
+            'seed': args.seed,
+            'workers': workers,
+            **stats,
+        }
+        results.append(result)
+        with open(args.results, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    print("\n📊 Итог:")
+    for result in results:
+        print(f"  {result['scenario']:<24} {result['wall_seconds']:>9.2f} с  "
+              f"{result['rows_per_sec']:>12} строк/с  {result['peak_rss_mb']} МБ")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк загрузчика видео")
+    parser.add_argument('--videos', type=int, default=10000, help="Количество видео")
+    parser.add_argument('--snapshots', type=int, default=24, help="Снапшотов на видео")
+    parser.add_argument('--seed', type=int, default=42, help="Seed генератора данных")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Процессов для параллельных сценариев")
+    parser.add_argument('--output-dir', default="data/benchmark", help="Куда писать синтетические файлы")
+    parser.add_argument('--results', default="loader_benchmark.jsonl", help="Файл истории результатов")
+    parser.add_argument('--scenarios', nargs='*', choices=[name for name, *_ in SCENARIOS],
+                        help="Запустить только указанные сценарии")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run_benchmark(parse_args())
@@ -1,8 +1,33 @@
 import psycopg2
+from psycopg2 import errors
+from psycopg2.pool import ThreadedConnectionPool
 from datetime import date, datetime, time, timedelta
 from typing import Optional, Tuple
 import os
+import threading
+import time as clock
 from config.config import Config
+from database.counters import read_counter, read_dataset_version
+from database.creator_index import CreatorIndex
+from database.slow_query_log import SlowQueryLog
+
+
+class _PooledConnection:
+    """Соединение из пула: close() откатывает транзакцию и возвращает его в пул."""
+
+    __slots__ = ('_manager', '_conn')
+
+    def __init__(self, manager: "QueryManager", conn):
+        self._manager = manager
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._manager._put_connection(conn)
 
 
 class QueryManager:
@@ -10,17 +35,173 @@ class QueryManager:
     
     def __init__(self):
         self.conn_params = Config.get_db_params()
+        self.creator_index: Optional[CreatorIndex] = None
+        self.dataset_version: Optional[int] = None
+        self._dataset_checked = float('-inf')
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_pid: Optional[int] = None
+        self._pool_lock = threading.Lock()
+        self._pool_slots = threading.BoundedSemaphore(Config.DB_POOL_MAX)
+        self._connections_in_use = 0
+        self._slow_query_log: Optional[SlowQueryLog] = None
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Пул соединений текущего процесса (после fork создается заново)."""
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ThreadedConnectionPool(Config.DB_POOL_MIN, Config.DB_POOL_MAX, **self.conn_params)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _get_connection(self, blocking: bool = True):
+        """
+        Соединение из пула; close() возвращает его в пул. Если все
+        соединения заняты, ждет освобождения, а не падает с PoolError
+        (blocking=False — сразу возвращает None).
+        """
+        if not self._pool_slots.acquire(blocking=blocking):
+            return None
+        try:
+            conn = _PooledConnection(self, self._get_pool().getconn())
+        except Exception:
+            self._pool_slots.release()
+            raise
+        with self._pool_lock:
+            self._connections_in_use += 1
+        return conn
+
+    def _put_connection(self, conn):
+        try:
+            broken = bool(conn.closed)
+            if not broken:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            self._get_pool().putconn(conn, close=broken)
+        finally:
+            with self._pool_lock:
+                self._connections_in_use -= 1
+            self._pool_slots.release()
+
+    def _execute(self, method: str, cursor, sql: str, params=None):
+        """
+        cursor.execute с замером времени: запрос дольше SLOW_QUERY_MS попадает
+        в журнал медленных запросов (см. database/slow_query_log.py) с именем
+        method — метода QueryManager, выполнившего запрос.
+        """
+        started = clock.perf_counter()
+        cursor.execute(sql, params)
+        elapsed = clock.perf_counter() - started
+        if Config.SLOW_QUERY_MS and elapsed * 1000 >= Config.SLOW_QUERY_MS:
+            self._get_slow_query_log().record(method, sql, params, elapsed)
+
+    def _get_slow_query_log(self) -> SlowQueryLog:
+        with self._pool_lock:
+            if self._slow_query_log is None:
+                self._slow_query_log = SlowQueryLog(
+                    Config.SLOW_QUERY_LOG, Config.SLOW_QUERY_EXPLAIN_PER_MINUTE,
+                    lambda: self._get_connection(blocking=False)
+                )
+            return self._slow_query_log
+
+    def pool_stats(self) -> dict:
+        """Занятые соединения пула и его размер (для метрик)."""
+        return {'in_use': self._connections_in_use, 'size': Config.DB_POOL_MAX}
     
-    def _get_connection(self):
-        """Получение соединения с базой данных."""
-        return psycopg2.connect(**self.conn_params)
-    
+    @staticmethod
+    def _day_bounds(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+        """
+        Полуоткрытый интервал [начало start_date, начало дня после end_date).
+        Сравнение столбца с границами, а не DATE(столбец) с датами, использует индексы.
+        """
+        return (datetime.combine(start_date, time.min),
+                datetime.combine(end_date + timedelta(days=1), time.min))
+
+    def _get_counter(self, conn, name: str) -> Optional[int]:
+        """Значение из stats_counters или None, если счетчиков в базе нет."""
+        try:
+            with conn.cursor() as cursor:
+                return read_counter(cursor, name)
+        except errors.UndefinedTable:
+            conn.rollback()
+            return None
+
+    def check_dataset_version(self, force: bool = False) -> bool:
+        """
+        Сверка версии данных (stats_counters.dataset_version) не чаще раза в
+        CREATOR_INDEX_TTL секунд. Если версия изменилась, индекс креаторов
+        строится заново. Возвращает True, если данные изменились (кэши,
+        зависящие от данных, пора сбросить).
+        """
+        now = clock.monotonic()
+        if not force and now - self._dataset_checked < Config.CREATOR_INDEX_TTL:
+            return False
+        self._dataset_checked = now
+
+        try:
+            conn = self._get_connection()
+        except psycopg2.Error:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                try:
+                    version = read_dataset_version(cursor)
+                except (errors.UndefinedTable, errors.UndefinedColumn):
+                    # Счетчиков нет — версию не узнать, индекс строится заново при каждой сверке
+                    conn.rollback()
+                    version = None
+                if self.creator_index is not None and version is not None and version == self.dataset_version:
+                    return False
+                self.creator_index = CreatorIndex.load(cursor, version)
+                self.dataset_version = version
+                return True
+        except psycopg2.Error:
+            return False
+        finally:
+            conn.close()
+
+    def get_creator_index(self) -> Optional[CreatorIndex]:
+        """
+        Индекс ID креаторов (перестраивается после загрузки данных, см.
+        check_dataset_version). None — индекс построить не удалось
+        (запросы идут в базу).
+        """
+        self.check_dataset_version()
+        return self.creator_index
+
+    def _resolve_creator(self, creator_id: str) -> Optional[str]:
+        """
+        Полный ID креатора (как он записан в базе) по ID или его префиксу.
+        None — такого креатора в базе нет, и ответ (0) известен без запроса.
+
+        Новый креатор мог появиться после построения индекса, поэтому на
+        промахе версия данных сверяется сразу (одна строка stats_counters),
+        а индекс перестраивается, только если она изменилась. Без счетчиков
+        версии нет, и ID запрашивается как есть.
+        """
+        index = self.get_creator_index()
+        if index is None:
+            return creator_id
+        resolved = index.resolve(creator_id)
+        if resolved is not None:
+            return resolved
+        if self.dataset_version is None:
+            return creator_id
+        if self.check_dataset_version(force=True):
+            return self.creator_index.resolve(creator_id)
+        return None
+
     def get_total_videos(self) -> int:
         """Сколько всего видео есть в системе?"""
         conn = self._get_connection()
         try:
+            count = self._get_counter(conn, 'total_videos')
+            if count is not None:
+                return count
+
             with conn.cursor() as cursor:
-                cursor.execute("SELECT COUNT(*) FROM videos")
+                self._execute('get_total_videos', cursor, "SELECT COUNT(*) FROM videos")
                 result = cursor.fetchone()
                 return result[0] if result else 0
         finally:
@@ -30,23 +211,25 @@ class QueryManager:
                          start_date: Optional[date] = None,
                          end_date: Optional[date] = None) -> int:
         """Сколько видео у креатора за период (по дате публикации видео)."""
+        creator_id = self._resolve_creator(creator_id)
+        if creator_id is None:
+            return 0
         conn = self._get_connection()
         try:
             query = "SELECT COUNT(*) FROM videos WHERE creator_id = %s"
             params = [creator_id]
         
             if start_date:
-                # Используем DATE() для сравнения только дат (включительно)
-                query += " AND DATE(video_created_at) >= %s"
-                params.append(start_date)
+                query += " AND video_created_at >= %s"
+                params.append(self._day_bounds(start_date, start_date)[0])
         
             if end_date:
-                # Используем DATE() для сравнения только дат (включительно)
-                query += " AND DATE(video_created_at) <= %s"
-                params.append(end_date)
+                # Конец дня end_date включительно — строго меньше начала следующего дня
+                query += " AND video_created_at < %s"
+                params.append(self._day_bounds(end_date, end_date)[1])
         
             with conn.cursor() as cursor:
-                cursor.execute(query, params)
+                self._execute('get_videos_by_creator', cursor, query, params)
                 result = cursor.fetchone()
                 return result[0] if result else 0
         finally:
@@ -56,39 +239,25 @@ class QueryManager:
                                          start_date: date, 
                                          end_date: date) -> int:
         """Сколько разных календарных дней креатор публиковал видео в указанный период."""
+        creator_id = self._resolve_creator(creator_id)
+        if creator_id is None:
+            return 0
         conn = self._get_connection()
         try:
-            # Основной запрос - используем DATE() для сравнения с датами
+            period_start, period_end = self._day_bounds(start_date, end_date)
             query = """
                 SELECT COUNT(DISTINCT DATE(video_created_at)) as unique_days
                 FROM videos
                 WHERE creator_id = %s
-                AND DATE(video_created_at) >= %s
-                AND DATE(video_created_at) <= %s
+                AND video_created_at >= %s
+                AND video_created_at < %s
             """
 
             with conn.cursor() as cursor:
-                cursor.execute(query, (creator_id, start_date, end_date))
+                self._execute('get_unique_publishing_days_for_creator', cursor, query,
+                              (creator_id, period_start, period_end))
                 result = cursor.fetchone()
-                unique_days = result[0] if result else 0
-
-                diagnostic_query = """
-                    SELECT DISTINCT DATE(video_created_at) as pub_date
-                    FROM videos
-                    WHERE creator_id = %s
-                    AND DATE(video_created_at) >= %s
-                    AND DATE(video_created_at) <= %s
-                    ORDER BY pub_date
-                """
-            
-                cursor.execute(diagnostic_query, (creator_id, start_date, end_date))
-
-                return unique_days
-            
-        except Exception as e:
-            # В случае ошибки все равно возвращаем результат из основного запроса
-            # который уже выполнился успешно
-            return unique_days if 'unique_days' in locals() else 0
+                return result[0] if result else 0
         finally:
             conn.close()
 
@@ -99,52 +268,29 @@ class QueryManager:
         """
         conn = self._get_connection()
         try:
-            # Используем максимальное значение просмотров из всех снапшотов видео
+            # Максимум просмотров видео: текущее значение в videos или больший замер из снапшотов
             query = """
-                SELECT COUNT(DISTINCT v.creator_id) as unique_creators
-                FROM videos v
-                WHERE (
-                    -- Либо текущее значение в videos больше порога
-                    v.views_count > %s
-                    -- Либо максимальное значение из снапшотов больше порога
-                    OR EXISTS (
-                        SELECT 1 
-                        FROM video_snapshots vs 
-                        WHERE vs.video_id = v.id 
-                        AND vs.views_count > %s
-                    )
+                WITH video_max_views AS (
+                    SELECT 
+                        v.creator_id,
+                        v.id as video_id,
+                        GREATEST(
+                            v.views_count,
+                            COALESCE(MAX(vs.views_count), 0)
+                        ) as max_views_ever
+                    FROM videos v
+                    LEFT JOIN video_snapshots vs ON v.id = vs.video_id
+                    GROUP BY v.id, v.creator_id, v.views_count
                 )
+                SELECT COUNT(DISTINCT creator_id)
+                FROM video_max_views
+                WHERE max_views_ever > %s
             """
-        
+
             with conn.cursor() as cursor:
-                cursor.execute(query, [min_views, min_views])
+                self._execute('get_unique_creators_with_high_views', cursor, query, [min_views])
                 result = cursor.fetchone()
-                count = result[0] if result else 0
-            
-                # Более точный запрос
-                query_alt = """
-                    WITH video_max_views AS (
-                        SELECT 
-                            v.creator_id,
-                            v.id as video_id,
-                            GREATEST(
-                                v.views_count,
-                                COALESCE(MAX(vs.views_count), 0)
-                            ) as max_views_ever
-                        FROM videos v
-                        LEFT JOIN video_snapshots vs ON v.id = vs.video_id
-                        GROUP BY v.id, v.creator_id, v.views_count
-                    )
-                    SELECT COUNT(DISTINCT creator_id)
-                    FROM video_max_views
-                    WHERE max_views_ever > %s
-                """
-            
-                cursor.execute(query_alt, [min_views])
-                result_alt = cursor.fetchone()
-                count_alt = result_alt[0] if result_alt else 0
-            
-                return count_alt  # Возвращаем более точный результат
+                return result[0] if result else 0
         finally:
             conn.close()
 
@@ -152,34 +298,20 @@ class QueryManager:
         """Суммарное количество просмотров всех видео за период."""
         conn = self._get_connection()
         try:
-            start_datetime = datetime.combine(start_date, datetime.min.time())
-            end_datetime = datetime.combine(end_date, datetime.max.time())
+            start_datetime, end_datetime = self._day_bounds(start_date, end_date)
         
             # Вариант 1: Сумма views_count из таблицы videos (итоговые просмотры на момент последнего замера)
             query = """
                 SELECT COALESCE(SUM(v.views_count), 0)
                 FROM videos v
                 WHERE v.video_created_at >= %s
-                AND v.video_created_at <= %s
+                AND v.video_created_at < %s
             """
         
             with conn.cursor() as cursor:
-                cursor.execute(query, (start_datetime, end_datetime))
+                self._execute('get_total_views_for_all_videos_period', cursor, query, (start_datetime, end_datetime))
                 result = cursor.fetchone()
-                total_views = int(result[0]) if result else 0
-            
-                # Дополнительная диагностика
-                cursor.execute("""
-                    SELECT COUNT(*) as video_count, 
-                        SUM(views_count) as total_views_raw
-                    FROM videos 
-                    WHERE video_created_at >= %s 
-                    AND video_created_at <= %s
-                """, (start_datetime, end_datetime))
-            
-                stats = cursor.fetchone()
-            
-                return total_views
+                return int(result[0]) if result else 0
         finally:
             conn.close()
 
@@ -191,9 +323,13 @@ class QueryManager:
         На сколько просмотров суммарно выросли все видео
         креатора в указанный временной интервал.
         """
+        creator_id = self._resolve_creator(creator_id)
+        if creator_id is None:
+            return 0
         conn = self._get_connection()
         try:
-            # Создаем полные datetime объекты
+            # Создаем полные datetime объекты; конец интервала времени
+            # включительно: "до 15:00" учитывает замер ровно в 15:00
             start_datetime = datetime.combine(target_date, start_time)
             end_datetime = datetime.combine(target_date, end_time)
         
@@ -208,23 +344,10 @@ class QueryManager:
             """
         
             with conn.cursor() as cursor:
-                cursor.execute(query, (creator_id, start_datetime, end_datetime))
+                self._execute('get_total_views_growth_for_creator_with_time_period', cursor, query,
+                              (creator_id, start_datetime, end_datetime))
                 result = cursor.fetchone()
-                total_growth = int(result[0]) if result else 0
-            
-                # Дополнительная диагностика
-                cursor.execute("""
-                    SELECT vs.video_id, vs.created_at, vs.delta_views_count
-                    FROM video_snapshots vs
-                    JOIN videos v ON vs.video_id = v.id
-                    WHERE v.creator_id = %s
-                    AND vs.created_at >= %s
-                    AND vs.created_at <= %s
-                    AND vs.delta_views_count > 0
-                    ORDER BY vs.created_at
-                """, (creator_id, start_datetime, end_datetime))
-            
-                return total_growth
+                return int(result[0]) if result else 0
         finally:
             conn.close()
 
@@ -233,12 +356,12 @@ class QueryManager:
         conn = self._get_connection()
         try:
             with conn.cursor() as cursor:
-                cursor.execute("""
+                self._execute('get_total_views_for_period', cursor, """
                     SELECT COALESCE(SUM(views_count), 0)
                     FROM videos 
-                    WHERE DATE(video_created_at) >= %s 
-                    AND DATE(video_created_at) <= %s
-                """, [start_date, end_date])
+                    WHERE video_created_at >= %s 
+                    AND video_created_at < %s
+                """, self._day_bounds(start_date, end_date))
             
                 result = cursor.fetchone()
                 return int(result[0]) if result else 0
@@ -249,9 +372,13 @@ class QueryManager:
         """Сколько замеров статистики с отрицательными просмотрами."""
         conn = self._get_connection()
         try:
+            count = self._get_counter(conn, 'negative_views_snapshots')
+            if count is not None:
+                return count
+
             with conn.cursor() as cursor:
                 # Ищем снапшоты где delta_views_count < 0
-                cursor.execute("""
+                self._execute('get_negative_views_snapshots_count', cursor, """
                     SELECT COUNT(*) 
                     FROM video_snapshots 
                     WHERE delta_views_count < 0
@@ -266,7 +393,7 @@ class QueryManager:
         conn = self._get_connection()
         try:
             with conn.cursor() as cursor:
-                cursor.execute(
+                self._execute('get_videos_with_views_above', cursor,
                     "SELECT COUNT(*) FROM videos WHERE views_count > %s",
                     [min_views]
                 )
@@ -275,18 +402,17 @@ class QueryManager:
         finally:
             conn.close()
     
-    def get_total_views_growth_on_date(self, target_date: date) -> int:
-        """На сколько просмотров в сумме выросли все видео за дату."""
+    def get_total_views_growth_for_period(self, start_date: date, end_date: date) -> int:
+        """На сколько просмотров в сумме выросли все видео за период (по дням включительно)."""
         conn = self._get_connection()
         try:
-            start_datetime = datetime.combine(target_date, datetime.min.time())
-            end_datetime = datetime.combine(target_date, datetime.max.time())
+            start_datetime, end_datetime = self._day_bounds(start_date, end_date)
             
             with conn.cursor() as cursor:
-                cursor.execute("""
+                self._execute('get_total_views_growth_for_period', cursor, """
                     SELECT COALESCE(SUM(delta_views_count), 0)
                     FROM video_snapshots
-                    WHERE created_at >= %s AND created_at <= %s
+                    WHERE created_at >= %s AND created_at < %s
                 """, [start_datetime, end_datetime])
                 
                 result = cursor.fetchone()
@@ -294,19 +420,18 @@ class QueryManager:
         finally:
             conn.close()
     
-    def get_unique_videos_with_growth_on_date(self, target_date: date) -> int:
-        """Сколько разных видео получали новые просмотры за дату."""
+    def get_unique_videos_with_growth_for_period(self, start_date: date, end_date: date) -> int:
+        """Сколько разных видео получали новые просмотры за период (по дням включительно)."""
         conn = self._get_connection()
         try:
-            start_datetime = datetime.combine(target_date, datetime.min.time())
-            end_datetime = datetime.combine(target_date, datetime.max.time())
+            start_datetime, end_datetime = self._day_bounds(start_date, end_date)
             
             with conn.cursor() as cursor:
-                cursor.execute("""
+                self._execute('get_unique_videos_with_growth_for_period', cursor, """
                     SELECT COUNT(DISTINCT video_id)
                     FROM video_snapshots
                     WHERE created_at >= %s 
-                    AND created_at <= %s
+                    AND created_at < %s
                     AND delta_views_count > 0
                 """, [start_datetime, end_datetime])
                 
@@ -317,6 +442,9 @@ class QueryManager:
 
     def get_videos_by_creator_with_views(self, creator_id: str, min_views: int) -> int:
         """Сколько видео у креатора набрало больше X просмотров"""
+        creator_id = self._resolve_creator(creator_id)
+        if creator_id is None:
+            return 0
         conn = self._get_connection()
         try:
             query = """
@@ -326,7 +454,7 @@ class QueryManager:
             """
         
             with conn.cursor() as cursor:
-                cursor.execute(query, (creator_id, min_views))
+                self._execute('get_videos_by_creator_with_views', cursor, query, (creator_id, min_views))
                 result = cursor.fetchone()
                 return result[0] if result else 0
         finally:
@@ -337,7 +465,7 @@ class QueryManager:
         conn = self._get_connection()
         try:
             with conn.cursor() as cursor:
-                cursor.execute(sql, params or ())
+                self._execute('execute_custom_query', cursor, sql, params or ())
                 result = cursor.fetchone()
                 return result[0] if result else None
         except Exception as e:
@@ -26,6 +26,26 @@ CREATE TABLE IF NOT EXISTS video_snapshots (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Глобальные счетчики (одна строка), поддерживаются загрузчиком и сервисом приема
+CREATE TABLE IF NOT EXISTS stats_counters (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    total_videos BIGINT NOT NULL DEFAULT 0,
+    total_snapshots BIGINT NOT NULL DEFAULT 0,
+    negative_views_snapshots BIGINT NOT NULL DEFAULT 0,
+    total_views BIGINT NOT NULL DEFAULT 0,
+    dataset_version BIGINT NOT NULL DEFAULT 0,  -- меняется при смене набора креаторов и полном пересчете
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+-- Строка создается один раз и сразу заполняется по уже загруженным данным
+INSERT INTO stats_counters (id, total_videos, total_views, total_snapshots, negative_views_snapshots)
+SELECT 1, v.total_videos, v.total_views, s.total_snapshots, s.negative_views_snapshots
+FROM (SELECT COUNT(*) AS total_videos, COALESCE(SUM(views_count), 0) AS total_views FROM videos) v,
+     (SELECT COUNT(*) AS total_snapshots,
+             COUNT(*) FILTER (WHERE delta_views_count < 0) AS negative_views_snapshots
+      FROM video_snapshots) s
+WHERE NOT EXISTS (SELECT 1 FROM stats_counters)
+ON CONFLICT (id) DO NOTHING;
+
 -- Индексы для ускорения запросов
 CREATE INDEX IF NOT EXISTS idx_videos_creator_id ON videos(creator_id);
 CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos(video_created_at);
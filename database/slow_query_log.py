@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Optional, Sequence
+
+# Ротация журнала: размер файла и число старых файлов
+MAX_LOG_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+# Очередь на запись; переполненная — записи отбрасываются, а не тормозят запросы
+QUEUE_SIZE = 1000
+# Ограничение времени самого EXPLAIN ANALYZE (он выполняет запрос еще раз)
+EXPLAIN_TIMEOUT_MS = 10000
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов: SQL, параметры, время и план
+    EXPLAIN (ANALYZE, BUFFERS) в JSON по строке на запрос, с ротацией файла.
+
+    record() вызывается из потока запроса и только кладет запись в
+    очередь; план снимается и пишется в фоновом потоке. EXPLAIN ANALYZE
+    выполняет запрос повторно, поэтому планов не больше explain_per_minute
+    и только при свободном соединении пула (connect возвращает None, если
+    все заняты) — в пик нагрузки пишется запись без плана.
+    """
+
+    def __init__(self, path: str, explain_per_minute: int,
+                 connect: Callable[[], Optional[Any]]):
+        self.explain_per_minute = explain_per_minute
+        self._connect = connect
+        self._queue: "queue.Queue" = queue.Queue(QUEUE_SIZE)
+        self._explain_times = []
+        self.dropped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._logger = logging.getLogger(f"{__name__}.{path}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=MAX_LOG_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+
+        self._worker = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+        self._worker.start()
+
+    def record(self, method: str, sql: str, params: Optional[Sequence[Any]], seconds: float):
+        try:
+            self._queue.put_nowait((datetime.now(), method, sql, params, seconds))
+        except queue.Full:
+            self.dropped += 1
+
+    def _explain_allowed(self) -> bool:
+        """Не больше explain_per_minute планов за последние 60 секунд."""
+        now = time.monotonic()
+        self._explain_times = [moment for moment in self._explain_times if now - moment < 60]
+        if len(self._explain_times) >= self.explain_per_minute:
+            return False
+        self._explain_times.append(now)
+        return True
+
+    def _explain(self, sql: str, params) -> Optional[str]:
+        # Повторно выполняются только чтения
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')) or not self._explain_allowed():
+            return None
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+        finally:
+            # Соединение из пула: close() откатывает транзакцию и возвращает его
+            conn.close()
+
+    def _run(self):
+        while True:
+            logged_at, method, sql, params, seconds = self._queue.get()
+            entry = {
+                'time': logged_at.isoformat(timespec='milliseconds'),
+                'method': method,
+                'duration_ms': round(seconds * 1000, 1),
+                'sql': ' '.join(sql.split()),
+                'params': params,
+            }
+            try:
+                plan = self._explain(sql, params)
+                if plan is not None:
+                    entry['plan'] = plan
+            except Exception as e:
+                entry['plan_error'] = str(e)
+            self._logger.info(json.dumps(entry, ensure_ascii=False, default=str))
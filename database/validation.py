@@ -0,0 +1,159 @@
+import json
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+
+VIDEO_COLUMNS = [
+    'id', 'creator_id', 'video_created_at',
+    'views_count', 'likes_count', 'comments_count', 'reports_count',
+]
+
+SNAPSHOT_COLUMNS = [
+    'snapshot_id', 'video_id',
+    'views_count', 'likes_count', 'comments_count', 'reports_count',
+    'delta_views_count', 'delta_likes_count', 'delta_comments_count', 'delta_reports_count',
+    'created_at',
+]
+
+# Накопительные счетчики снапшота и соответствующие им приращения
+COUNTER_COLUMNS = ['views_count', 'likes_count', 'comments_count', 'reports_count']
+DELTA_COLUMNS = ['delta_' + column for column in COUNTER_COLUMNS]
+
+# Сколько идентификаторов проблемных снапшотов сохранять в отчете
+SAMPLE_LIMIT = 20
+
+
+class ValidationReport:
+    """Отчет о проверке снапшотов при загрузке (суммируется по пачкам)."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {
+            'videos': 0,
+            'snapshots': 0,
+            'duplicate_videos': 0,
+            'duplicate_snapshot_ids': 0,
+            'duplicate_timestamps': 0,
+            'out_of_order': 0,
+            'invalid_created_at': 0,
+            'negative_deltas_before': 0,
+            'negative_deltas_after': 0,
+        }
+        for column in DELTA_COLUMNS:
+            self.counts[f'{column}_mismatch'] = 0
+        self.samples: Dict[str, List[str]] = {}
+
+    def add(self, key: str, count: int, sample_ids=None):
+        """Добавить найденные проблемы и примеры идентификаторов."""
+        self.counts[key] = self.counts.get(key, 0) + int(count)
+        if sample_ids is not None and count:
+            samples = self.samples.setdefault(key, [])
+            free = SAMPLE_LIMIT - len(samples)
+            if free > 0:
+                samples.extend(str(value) for value in list(sample_ids[:free]))
+
+    def merge(self, other: 'ValidationReport'):
+        """Объединение с отчетом другой пачки или процесса."""
+        for key, count in other.counts.items():
+            self.add(key, count)
+        for key, sample_ids in other.samples.items():
+            samples = self.samples.setdefault(key, [])
+            samples.extend(sample_ids[:max(0, SAMPLE_LIMIT - len(samples))])
+
+    @property
+    def has_issues(self) -> bool:
+        """Есть ли хоть одна найденная проблема."""
+        return any(
+            count for key, count in self.counts.items()
+            if key not in ('videos', 'snapshots', 'negative_deltas_before', 'negative_deltas_after')
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'counts': dict(self.counts), 'samples': dict(self.samples)}
+
+    def write(self, path: str):
+        """Сохранение отчета в JSON файл."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def build_frames(videos: List[dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Построение таблиц видео и снапшотов из пачки видео."""
+    videos_df = pd.DataFrame.from_records(videos, columns=VIDEO_COLUMNS)
+    for column in COUNTER_COLUMNS:
+        videos_df[column] = videos_df[column].fillna(0).astype('int64')
+
+    snapshots = [snapshot for video in videos for snapshot in video.get('snapshots') or ()]
+    lengths = [len(video.get('snapshots') or ()) for video in videos]
+
+    snapshots_df = pd.DataFrame.from_records(
+        snapshots, columns=['id'] + SNAPSHOT_COLUMNS[2:]
+    ).rename(columns={'id': 'snapshot_id'})
+    snapshots_df.insert(1, 'video_id', np.repeat(videos_df['id'].to_numpy(), lengths))
+    for column in COUNTER_COLUMNS + DELTA_COLUMNS:
+        snapshots_df[column] = snapshots_df[column].fillna(0).astype('int64')
+
+    return videos_df, snapshots_df
+
+
+def validate_frames(videos_df: pd.DataFrame, snapshots_df: pd.DataFrame,
+                    report: ValidationReport) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Векторная проверка пачки и пересчет приращений.
+
+    Снапшоты каждого видео упорядочиваются по времени, дубликаты
+    идентификаторов отбрасываются (остается последний), delta_* пересчитываются
+    как разность соседних накопительных значений. Для первого снапшота видео
+    в пачке предыдущее значение неизвестно, поэтому его приращение берется из файла.
+    """
+    duplicate_videos = videos_df['id'].duplicated(keep='last').to_numpy()
+    report.add('duplicate_videos', duplicate_videos.sum(), videos_df['id'].to_numpy()[duplicate_videos])
+    videos_df = videos_df[~duplicate_videos]
+    report.add('videos', len(videos_df))
+
+    if snapshots_df.empty:
+        return videos_df, snapshots_df
+
+    snapshot_ids = snapshots_df['snapshot_id'].to_numpy()
+    created = pd.to_datetime(snapshots_df['created_at'], utc=True, format='ISO8601', errors='coerce')
+
+    invalid = created.isna().to_numpy() | pd.isna(snapshot_ids)
+    report.add('invalid_created_at', invalid.sum(), snapshot_ids[invalid])
+
+    previous = created.groupby(snapshots_df['video_id'], sort=False).shift()
+    out_of_order = (created < previous).to_numpy()
+    report.add('out_of_order', out_of_order.sum(), snapshot_ids[out_of_order])
+
+    duplicate_ids = snapshots_df['snapshot_id'].duplicated(keep='last').to_numpy() & ~invalid
+    report.add('duplicate_snapshot_ids', duplicate_ids.sum(), snapshot_ids[duplicate_ids])
+
+    keep = ~(invalid | duplicate_ids)
+    frame = snapshots_df[keep].assign(_order=created[keep].to_numpy())
+    frame = frame.sort_values(['video_id', '_order'], kind='stable')
+    if frame.empty:
+        # Все снапшоты пачки отброшены — пересчитывать нечего
+        return videos_df, frame.drop(columns='_order')
+
+    duplicate_times = frame.duplicated(['video_id', '_order'], keep='first').to_numpy()
+    report.add('duplicate_timestamps', duplicate_times.sum(), frame['snapshot_id'].to_numpy()[duplicate_times])
+
+    video_ids = frame['video_id'].to_numpy()
+    first = np.ones(len(frame), dtype=bool)
+    first[1:] = video_ids[1:] != video_ids[:-1]
+
+    report.add('negative_deltas_before', (frame['delta_views_count'].to_numpy() < 0).sum())
+    for counter, delta in zip(COUNTER_COLUMNS, DELTA_COLUMNS):
+        values = frame[counter].to_numpy()
+        given = frame[delta].to_numpy()
+        recomputed = np.empty_like(values)
+        recomputed[0] = 0
+        recomputed[1:] = values[1:] - values[:-1]
+        recomputed = np.where(first, given, recomputed)
+
+        mismatch = recomputed != given
+        report.add(f'{delta}_mismatch', mismatch.sum(), frame['snapshot_id'].to_numpy()[mismatch])
+        frame[delta] = recomputed
+    report.add('negative_deltas_after', (frame['delta_views_count'].to_numpy() < 0).sum())
+    report.add('snapshots', len(frame))
+
+    return videos_df, frame.drop(columns='_order')
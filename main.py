@@ -1,7 +1,23 @@
 import os
 import asyncio
+import multiprocessing
+import signal
+import socket
 import sys
+import time
 from config.config import Config
+from bot.logging_setup import setup_logging
+
+
+def print_config_error(e: Exception):
+    print(f"❌ Ошибка конфигурации: {e}")
+    print("\nСоздайте файл config/.env с содержимым:")
+    print("TELEGRAM_BOT_TOKEN=ваш_токен_бота")
+    print("DB_HOST=localhost")
+    print("DB_PORT=5432")
+    print("DB_NAME=video_stats")
+    print("DB_USER=postgres")
+    print("DB_PASSWORD=ваш_пароль_postgres")
 
 
 async def main_async():
@@ -10,20 +26,13 @@ async def main_async():
         # Проверяем конфигурацию
         Config.validate()
         from bot.handlers import VideoStatsBot
-        
+
         print("🚀 Запуск бота статистики видео...")
-        bot = VideoStatsBot(Config.TELEGRAM_BOT_TOKEN)
-        await bot.run()
-        
+        bot = VideoStatsBot(Config.TELEGRAM_BOT_TOKEN, api_url=Config.TELEGRAM_API_URL)
+        await bot.run(Config.BOT_MODE)
+
     except ValueError as e:
-        print(f"❌ Ошибка конфигурации: {e}")
-        print("\nСоздайте файл config/.env с содержимым:")
-        print("TELEGRAM_BOT_TOKEN=ваш_токен_бота")
-        print("DB_HOST=localhost")
-        print("DB_PORT=5432")
-        print("DB_NAME=video_stats")
-        print("DB_USER=postgres")
-        print("DB_PASSWORD=ваш_пароль_postgres")
+        print_config_error(e)
     except ImportError as e:
         print(f"❌ Ошибка импорта: {e}")
         print("Установите зависимости: pip install -r requirements.txt")
@@ -32,8 +41,103 @@ async def main_async():
     except Exception as e:
         print(f"❌ Ошибка: {e}")
 
+
+def run_worker(number: int, sock: socket.socket = None):
+    """
+    Процесс-воркер: свой бот, пул соединений с базой и индексы в памяти.
+    Слушает общий порт (SO_REUSEPORT) или сокет, открытый супервизором.
+    """
+    # SIGTERM от супервизора — штатная остановка с закрытием сервера и сессии
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    # Поток вывода логов после fork не наследуется — свой в каждом воркере
+    setup_logging()
+    from bot.handlers import VideoStatsBot
+
+    bot = VideoStatsBot(Config.TELEGRAM_BOT_TOKEN, api_url=Config.TELEGRAM_API_URL)
+    options = {'register': False}
+    if sock is not None:
+        options['sock'] = sock
+    else:
+        options['reuse_port'] = True
+    try:
+        asyncio.run(bot.run('webhook', **options))
+    except KeyboardInterrupt:
+        pass
+
+
+async def register_webhook():
+    """Регистрация webhook в Telegram один раз, до запуска воркеров."""
+    from bot.handlers import VideoStatsBot
+
+    bot = VideoStatsBot(Config.TELEGRAM_BOT_TOKEN, api_url=Config.TELEGRAM_API_URL)
+    try:
+        await bot.set_webhook()
+    finally:
+        await bot.bot.session.close()
+
+
+def run_supervisor(workers: int):
+    """
+    Супервизор режима webhook: workers процессов на одном порту, упавший
+    воркер перезапускается. Общего состояния у воркеров нет: каждый сам
+    сверяет версию данных в базе и сбрасывает свои кэши.
+    """
+    try:
+        Config.validate()
+    except ValueError as e:
+        print_config_error(e)
+        return
+
+    asyncio.run(register_webhook())
+
+    sock = None
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        # Без SO_REUSEPORT — один сокет, открытый до fork и общий для всех воркеров
+        sock = socket.create_server((Config.WEBHOOK_HOST, Config.WEBHOOK_PORT), backlog=1024)
+        sock.set_inheritable(True)
+
+    processes = {}
+
+    def start(number: int):
+        process = multiprocessing.Process(target=run_worker, args=(number, sock), name=f"bot-worker-{number}")
+        process.start()
+        processes[number] = process
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"🚀 Запуск {workers} воркеров на порту {Config.WEBHOOK_PORT}...")
+    for number in range(workers):
+        start(number)
+
+    try:
+        while not stopping:
+            for number, process in list(processes.items()):
+                if not process.is_alive() and not stopping:
+                    print(f"⚠️  Воркер {number} (pid {process.pid}) завершился с кодом {process.exitcode}, перезапуск")
+                    start(number)
+            time.sleep(1)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in processes.values():
+            process.join(timeout=10)
+        print("\n⏹️ Бот остановлен")
+
+
 def main():
-    asyncio.run(main_async())
+    setup_logging()
+    if Config.BOT_MODE == 'webhook' and Config.BOT_WORKERS > 1:
+        run_supervisor(Config.BOT_WORKERS)
+    else:
+        asyncio.run(main_async())
 
 if __name__ == "__main__":
     main()
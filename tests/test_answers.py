@@ -0,0 +1,65 @@
+from datetime import date, time
+
+from bot.answers import QueryAnswerer
+from bot.intents import Intent
+from bot.nlp_processor import ParsedQuery
+
+
+class FakeQueryManager:
+    """Записывает вызовы вместо запросов к базе."""
+
+    def __init__(self, result=42):
+        self.result = result
+        self.calls = []
+
+    def __getattr__(self, name):
+        def method(*args):
+            self.calls.append((name, args))
+            return self.result
+        return method
+
+
+def answer(intent, result=42, **params):
+    query_manager = FakeQueryManager(result)
+    text = QueryAnswerer(query_manager).answer(ParsedQuery(intent, **params))
+    return text, query_manager.calls
+
+
+def test_total_growth_queries_whole_period():
+    text, calls = answer(Intent.TOTAL_GROWTH, start_date=date(2025, 11, 1), end_date=date(2025, 11, 7))
+    assert text == "42"
+    assert calls == [('get_total_views_growth_for_period', (date(2025, 11, 1), date(2025, 11, 7)))]
+
+
+def test_unique_growth_queries_whole_period():
+    text, calls = answer(Intent.UNIQUE_GROWTH, start_date=date(2025, 11, 17), end_date=date(2025, 11, 23))
+    assert text == "42"
+    assert calls == [('get_unique_videos_with_growth_for_period', (date(2025, 11, 17), date(2025, 11, 23)))]
+
+
+def test_unique_growth_without_date():
+    text, calls = answer(Intent.UNIQUE_GROWTH)
+    assert text.startswith("❌")
+    assert calls == []
+
+
+def test_all_videos_views_for_one_day_and_for_a_month():
+    day, _ = answer(Intent.TOTAL_VIEWS_ALL_VIDEOS_PERIOD, result=12345, start_date=date(2025, 11, 5))
+    month, _ = answer(Intent.TOTAL_VIEWS_ALL_VIDEOS_PERIOD, result=12345,
+                      start_date=date(2025, 11, 1), end_date=date(2025, 11, 30))
+    assert (day, month) == ("12345", "12,345")
+
+
+def test_views_period_without_creator_counts_all_videos():
+    text, calls = answer(Intent.TOTAL_VIEWS_PERIOD, result=12345,
+                         start_date=date(2025, 11, 1), end_date=date(2025, 11, 30))
+    assert text == "12345"
+    assert calls == [('get_total_views_for_all_videos_period', (date(2025, 11, 1), date(2025, 11, 30)))]
+
+
+def test_views_period_with_time_window_sums_each_day():
+    text, calls = answer(Intent.TOTAL_VIEWS_PERIOD, creator_id='a' * 32,
+                         start_date=date(2025, 11, 28), end_date=date(2025, 11, 29),
+                         start_time=time(10), end_time=time(15))
+    assert text == "84"
+    assert [args[1] for _, args in calls] == [date(2025, 11, 28), date(2025, 11, 29)]
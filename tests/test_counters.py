@@ -0,0 +1,140 @@
+import pytest
+
+from database.counters import (
+    COUNTER_NAMES, CREATORS_CHANGED, apply_counter_changes, create_counters_table, read_counter,
+    read_dataset_version, track_counter_changes
+)
+
+
+class FakeCounterCursor:
+    """
+    Курсор с таблицами в памяти: понимает только запросы database/counters.py
+    к строке stats_counters и пересчет по "таблицам" data.
+    """
+
+    def __init__(self, data, row=None):
+        self.data = data
+        self.row = row
+        self.statements = []
+        self._result = None
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        self._result = None
+        if sql.startswith("INSERT INTO stats_counters"):
+            if self.row is None:
+                self.row = dict.fromkeys(COUNTER_NAMES, 0) | {'dataset_version': 0}
+                self._result = (1,)
+        elif "UPDATE stats_counters" in sql and "FROM videos" in sql:
+            self.row.update(self.data)
+            self.row['dataset_version'] += 1
+        elif "UPDATE stats_counters" in sql:
+            for name, change in zip(COUNTER_NAMES, params):
+                self.row[name] += change
+            if "dataset_version" in sql:
+                self.row['dataset_version'] += 1
+        elif sql.startswith("SELECT") and "FROM stats_counters" in sql:
+            name = sql.split()[1]
+            self._result = (self.row[name],) if self.row is not None else None
+
+    def fetchone(self):
+        return self._result
+
+
+DATA = {'total_videos': 10, 'total_snapshots': 240, 'negative_views_snapshots': 3, 'total_views': 5000}
+
+
+def test_new_row_is_seeded_from_existing_data():
+    cursor = FakeCounterCursor(DATA)
+    create_counters_table(cursor)
+
+    assert {name: read_counter(cursor, name) for name in COUNTER_NAMES} == DATA
+    assert read_dataset_version(cursor) == 1
+
+
+def test_existing_row_is_not_recounted():
+    row = dict(DATA, dataset_version=7)
+    cursor = FakeCounterCursor({name: 0 for name in COUNTER_NAMES}, row=dict(row))
+    create_counters_table(cursor)
+
+    assert cursor.row == row
+    assert not any("FROM videos" in sql for sql in cursor.statements)
+
+
+def test_changes_are_added_to_existing_row():
+    cursor = FakeCounterCursor(DATA, row=dict(DATA, dataset_version=1))
+    apply_counter_changes(cursor, {'total_videos': 2, 'total_views': 100})
+
+    assert read_counter(cursor, 'total_videos') == 12
+    assert read_counter(cursor, 'total_views') == 5100
+    assert read_counter(cursor, 'total_snapshots') == 240
+
+
+def test_changes_are_not_added_twice_to_a_seeded_row():
+    # Пересчет при создании строки уже видит записанную пачку
+    cursor = FakeCounterCursor(DATA)
+    apply_counter_changes(cursor, {'total_videos': 2, 'total_views': 100})
+
+    assert {name: read_counter(cursor, name) for name in COUNTER_NAMES} == DATA
+
+
+def test_version_changes_only_with_the_creator_set():
+    cursor = FakeCounterCursor(DATA, row=dict(DATA, dataset_version=1))
+    apply_counter_changes(cursor, {'total_snapshots': 5})
+    assert read_dataset_version(cursor) == 1
+
+    apply_counter_changes(cursor, {'total_videos': 1, CREATORS_CHANGED: 1})
+    assert read_dataset_version(cursor) == 2
+
+
+class FakeVideosCursor:
+    """Таблица videos в памяти (id -> creator_id) для track_counter_changes."""
+
+    def __init__(self, videos):
+        self.videos = dict(videos)
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        ids = set(params[0]) if params else set()
+        if "creator_id = ANY" in sql:
+            self._rows = [(creator,) for creator in set(self.videos.values()) & ids]
+        elif "SELECT DISTINCT creator_id FROM videos WHERE id = ANY" in sql:
+            self._rows = [(self.videos[video_id],) for video_id in ids if video_id in self.videos]
+        elif "FROM videos" in sql:
+            self._rows = [(len(ids & self.videos.keys()), 0)]
+        else:
+            self._rows = [(0, 0)]
+
+    def fetchone(self):
+        return self._rows[0]
+
+    def fetchall(self):
+        return self._rows
+
+
+def track(videos, written, creator_ids):
+    cursor = FakeVideosCursor(videos)
+    changes = {}
+    with track_counter_changes(cursor, written, [], changes, creator_ids):
+        cursor.videos.update(written)
+    return changes
+
+
+def test_new_video_of_known_creator_keeps_creator_set():
+    changes = track({'v1': 'c1'}, {'v2': 'c1'}, ['c1'])
+    assert changes['total_videos'] == 1
+    assert CREATORS_CHANGED not in changes
+
+
+def test_new_creator_changes_creator_set():
+    assert track({'v1': 'c1'}, {'v2': 'c2'}, ['c2'])[CREATORS_CHANGED] == 1
+
+
+def test_moved_video_changes_creator_set():
+    # Единственное видео c1 перешло к c2: c1 пропал из базы
+    assert track({'v1': 'c1', 'v2': 'c2'}, {'v1': 'c2'}, ['c2'])[CREATORS_CHANGED] == 1
+
+
+def test_unknown_counter_name():
+    with pytest.raises(ValueError):
+        read_counter(FakeCounterCursor(DATA), 'likes')
@@ -0,0 +1,60 @@
+from database.creator_index import CreatorIndex
+from database.query_manager import QueryManager
+
+FIRST = '123456' + 'a' * 26
+SECOND = '654321' + 'b' * 26
+MIXED_CASE = 'ABCDEF' + 'C' * 26
+
+
+def make_index():
+    return CreatorIndex([FIRST, SECOND, MIXED_CASE, FIRST])
+
+
+def test_full_id_and_unique_prefix():
+    index = make_index()
+    assert len(index) == 3
+    assert index.resolve(FIRST) == FIRST
+    assert index.resolve('654321') == SECOND
+    assert FIRST.upper() in index
+
+
+def test_ids_keep_their_case_from_the_database():
+    index = make_index()
+    assert index.resolve(MIXED_CASE.lower()) == MIXED_CASE
+    assert index.resolve('abcdef') == MIXED_CASE
+    assert index.matches('ABC') == [MIXED_CASE]
+
+
+def test_unknown_short_and_ambiguous_refs():
+    index = CreatorIndex(['aaaaaa11', 'aaaaaa22'])
+    assert index.resolve('ffffff') is None
+    assert index.resolve('aaa') is None
+    assert index.resolve('aaaaaa') is None
+    assert index.resolve('aaaaaa1') == 'aaaaaa11'
+
+
+def resolver(index):
+    query_manager = QueryManager()
+    query_manager.creator_index = index
+    # Сверка версии не нужна: индекс задан в тесте
+    query_manager._dataset_checked = float('inf')
+    return query_manager
+
+
+def test_query_manager_resolves_prefix_to_database_id():
+    query_manager = resolver(make_index())
+    assert query_manager._resolve_creator('abcdef') == MIXED_CASE
+    assert query_manager._resolve_creator('123456') == FIRST
+
+
+def test_query_manager_without_counters_queries_unknown_ids_as_is():
+    # Без версии данных новизну индекса не проверить: ответ дает база
+    query_manager = resolver(make_index())
+    assert query_manager._resolve_creator('f' * 32) == 'f' * 32
+
+
+def test_query_manager_knows_unknown_ids_when_version_is_unchanged(monkeypatch):
+    query_manager = resolver(make_index())
+    query_manager.dataset_version = 1
+    monkeypatch.setattr(query_manager, 'check_dataset_version', lambda force=False: False)
+    assert query_manager._resolve_creator('f' * 32) is None
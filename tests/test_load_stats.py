@@ -0,0 +1,31 @@
+from database.load_stats import PHASES, LoadStats
+
+
+def test_merge_sums_phases_and_rows():
+    stats = LoadStats()
+    stats.add('parse', 1.0)
+    stats.videos, stats.snapshots = 10, 90
+
+    other = LoadStats()
+    other.add('parse', 0.5)
+    other.add('merge', 2.0)
+    other.videos, other.snapshots = 5, 45
+    stats.merge(other)
+
+    assert stats.seconds['parse'] == 1.5
+    assert stats.seconds['merge'] == 2.0
+    assert stats.rows == 150
+
+
+def test_to_dict_rates():
+    stats = LoadStats()
+    stats.add('transfer', 2.0)
+    stats.videos, stats.snapshots = 100, 300
+    stats.wall_seconds = 4.0
+
+    summary = stats.to_dict()
+    assert summary['rows_per_sec'] == 100.0
+    assert summary['phases']['transfer']['rows_per_sec'] == 200.0
+    assert summary['phases']['read']['rows_per_sec'] is None
+    assert list(summary['phases']) == list(PHASES)
+    assert summary['peak_rss_mb'] > 0
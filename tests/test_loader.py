@@ -0,0 +1,58 @@
+import gzip
+import json
+
+import pytest
+
+from database import loader
+from database.load_stats import LoadStats
+
+VIDEOS = [
+    {'id': f'video-{i}', 'views_count': i * 1000, 'title': 'ролик "№1"\n', 'snapshots': [{'views_count': i}]}
+    for i in range(20)
+]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Значения и строки разрезаются границами кусков
+    monkeypatch.setattr(loader, 'READ_CHUNK_BYTES', 7)
+
+
+def write(path, text, compress=False):
+    data = text.encode('utf-8')
+    path.write_bytes(gzip.compress(data) if compress else data)
+    return str(path)
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_json_export_is_streamed(tmp_path, compress):
+    text = json.dumps({'exported_at': 12345, 'meta': {'a': [1, 2]}, 'videos': VIDEOS, 'total': 20},
+                      ensure_ascii=False, indent=2)
+    path = write(tmp_path / 'videos.json', text, compress)
+    stats = LoadStats()
+
+    assert list(loader.iter_videos(path, stats)) == VIDEOS
+    assert stats.seconds['read'] > 0 and stats.seconds['parse'] > 0
+
+
+def test_json_array_and_empty_list(tmp_path):
+    assert list(loader.iter_videos(write(tmp_path / 'a.json', json.dumps(VIDEOS)))) == VIDEOS
+    assert list(loader.iter_videos(write(tmp_path / 'b.json', '{"videos": [ ]}'))) == []
+
+
+def test_truncated_json_is_an_error(tmp_path):
+    path = write(tmp_path / 'videos.json', json.dumps({'videos': VIDEOS})[:-10])
+    with pytest.raises(ValueError):
+        list(loader.iter_videos(path))
+
+
+def test_ndjson_ranges_cover_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(loader, 'MIN_CHUNK_BYTES', 100)
+    lines = [json.dumps(video, ensure_ascii=False) for video in VIDEOS]
+    path = write(tmp_path / 'videos.ndjson', '\n'.join(lines) + '\n\n')
+
+    ranges = loader.split_ndjson(path, 4)
+    assert len(ranges) > 1
+    videos = [video for start, end in ranges for video in loader.iter_ndjson(path, start, end)]
+    assert videos == VIDEOS
+    assert list(loader.iter_videos(path)) == VIDEOS
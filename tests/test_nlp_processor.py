@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+import pytest
+
+from bot.intents import Intent
+from bot.nlp_processor import NLPProcessor, ParsedQuery
+
+
+@pytest.fixture
+def nlp():
+    return NLPProcessor(cache_size=0)
+
+
+@pytest.mark.parametrize('query, intent', [
+    ("прирост просмотров с 1 по 7 ноября 2025", Intent.TOTAL_GROWTH),
+    ("сколько разных видео получали новые просмотры с 1 по 7 ноября 2025", Intent.UNIQUE_GROWTH),
+])
+def test_growth_keeps_whole_period(nlp, query, intent):
+    parsed = nlp.parse_query(query)
+    assert parsed.intent == intent
+    assert (parsed.start_date, parsed.end_date) == (date(2025, 11, 1), date(2025, 11, 7))
+
+
+def test_growth_for_last_days(nlp):
+    parsed = nlp.parse_query("прирост просмотров за последние 7 дней")
+    today = date.today()
+    assert parsed.intent == Intent.TOTAL_GROWTH
+    assert (parsed.start_date, parsed.end_date) == (today - timedelta(days=6), today)
+
+
+def test_growth_defaults_to_today(nlp):
+    parsed = nlp.parse_query("насколько выросли просмотры")
+    assert parsed.intent == Intent.TOTAL_GROWTH
+    assert parsed.start_date == parsed.end_date == date.today()
+
+
+def test_single_day_growth(nlp):
+    parsed = nlp.parse_query("Сколько разных видео получали новые просмотры 27 ноября 2025?")
+    assert parsed.intent == Intent.UNIQUE_GROWTH
+    assert parsed.start_date == parsed.end_date == date(2025, 11, 27)
+
+
+def test_fingerprint_ignores_original_text():
+    first = ParsedQuery.from_parameters('total_videos', {}, "Сколько всего видео?")
+    second = ParsedQuery.from_parameters('total_videos', {}, "сколько   всего видео")
+    assert first == second
+    assert first.fingerprint == second.fingerprint
+
+
+def test_unknown_keeps_no_query_parameter(nlp):
+    parsed = nlp.parse_query("привет")
+    assert parsed.intent == Intent.UNKNOWN
+    assert parsed.parameters == {}
+    assert parsed.original_query == "привет"
@@ -0,0 +1,119 @@
+from datetime import date
+
+import pytest
+
+from bot.nlp_processor import NLPProcessor
+from bot.parse_cache import ParseCache, normalize
+from database.creator_index import CreatorIndex
+
+PUBLISHING_DAYS = ("Для креатора с id {} посчитай, в скольких разных календарных днях "
+                   "ноября 2025 года он публиковал хотя бы одно видео")
+LAST_DAYS_GROWTH = "На сколько просмотров выросли все видео за последние {} дней?"
+CREATOR_WITH_VIEWS = ("Сколько видео у креатора с id {} набрали больше {} просмотров "
+                      "по итоговой статистике?")
+
+
+@pytest.fixture
+def nlp():
+    return NLPProcessor(cache_size=100)
+
+
+def parse_twice(nlp, first, second):
+    nlp.parse_query(first)
+    return nlp.parse_query(second)
+
+
+def test_numeric_creator_ids_one_after_another(nlp):
+    first = nlp.parse_query(PUBLISHING_DAYS.format('12345'))
+    second = nlp.parse_query(PUBLISHING_DAYS.format('67890'))
+
+    assert first.creator_id == '12345'
+    assert second.creator_id == '67890'
+    assert nlp.cache.hits == 1
+
+
+def test_hex_creator_id_and_threshold_are_substituted(nlp):
+    first_id, second_id = 'a' * 32, 'b' * 32
+    parsed = parse_twice(nlp, CREATOR_WITH_VIEWS.format(first_id, '10 000'),
+                         CREATOR_WITH_VIEWS.format(second_id, '20 000'))
+
+    assert parsed.creator_id == second_id
+    assert parsed.min_views == 20000
+    assert nlp.cache.hits == 1
+
+
+def test_hit_matches_uncached_parse(nlp):
+    uncached = NLPProcessor(cache_size=0)
+    query = CREATOR_WITH_VIEWS.format('c' * 32, '50 000')
+    assert parse_twice(nlp, CREATOR_WITH_VIEWS.format('d' * 32, '30 000'), query) == uncached.parse_query(query)
+
+
+def test_day_count_is_not_taken_from_cache(nlp):
+    uncached = NLPProcessor(cache_size=0)
+    for days in (1000, 3000):
+        query = LAST_DAYS_GROWTH.format(days)
+        parsed = nlp.parse_query(query)
+        assert parsed == uncached.parse_query(query)
+        assert (parsed.end_date - parsed.start_date).days == days - 1
+    assert nlp.cache.hits == 0
+
+
+def test_years_stay_in_key():
+    key, values = ParseCache.template(normalize("Видео за 2025 год и 12 345 просмотров"))
+    assert key == "видео за 2025 год и <n5> просмотров"
+    assert values == ['12 345']
+
+
+def test_repeated_value_is_not_cached():
+    cache = ParseCache()
+    key, values = cache.template("id 12345 и 12345")
+    cache.put(key, values, "id 12345 и 12345", 'videos_by_views', {'min_views': 12345})
+
+    assert cache.uncacheable == 1
+    assert cache.get(key, values, "id 12345 и 12345") is None
+
+
+def test_string_and_number_slots_keep_their_type():
+    cache = ParseCache()
+    key, values = cache.template("id 12345 больше 10 000")
+    cache.put(key, values, "", 'x', {'creator_id': '12345', 'min_views': 10000})
+
+    _, other_values = cache.template("id 67890 больше 20 000")
+    assert cache.get(key, other_values, "") == ('x', {'creator_id': '67890', 'min_views': 20000})
+
+
+def test_volatile_entry_expires_next_day(monkeypatch):
+    cache = ParseCache()
+    cache.put("вчера", [], "вчера", 'total_growth', {'start_date': date(2025, 11, 27)}, volatile=True)
+    assert cache.get("вчера", [], "вчера") is not None
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.max
+
+    monkeypatch.setattr('bot.parse_cache.date', Tomorrow)
+    assert cache.get("вчера", [], "вчера") is None
+    assert cache.expired == 1
+
+
+def test_lru_eviction():
+    cache = ParseCache(maxsize=2)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, [], key, 'total_videos', {})
+    assert cache.get('a', [], 'a') is None
+    assert cache.get('c', [], 'c') == ('total_videos', {})
+
+
+def test_prefix_resolved_by_creator_index_is_not_cached(nlp):
+    first, second = '123456' + 'a' * 26, '654321' + 'b' * 26
+    nlp.set_creator_index(CreatorIndex([first, second]))
+    uncached = NLPProcessor(cache_size=0)
+    uncached.set_creator_index(nlp.creator_index)
+
+    for prefix, creator_id in (('123456', first), ('654321', second)):
+        query = CREATOR_WITH_VIEWS.format(prefix, '10 000')
+        parsed = nlp.parse_query(query)
+        assert parsed.creator_id == creator_id
+        assert parsed == uncached.parse_query(query)
+    assert nlp.cache.hits == 0
@@ -0,0 +1,151 @@
+from datetime import date, time
+
+import pytest
+
+from config.config import Config
+from database.query_manager import QueryManager
+
+
+class FakeCursor:
+    def __init__(self, result):
+        self.result = result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchone(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, result):
+        self.result = result
+
+    def cursor(self):
+        return FakeCursor(self.result)
+
+    def close(self):
+        pass
+
+
+class RecordingSlowLog:
+    """Вместо журнала медленных запросов: запоминает имена методов."""
+
+    def __init__(self):
+        self.methods = []
+
+    def record(self, method, sql, params, seconds):
+        self.methods.append(method)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    # Любой запрос считается медленным
+    monkeypatch.setattr(Config, 'SLOW_QUERY_MS', 1e-9)
+    manager = QueryManager()
+    manager._slow_query_log = RecordingSlowLog()
+    monkeypatch.setattr(manager, '_get_connection', lambda blocking=True: FakeConnection((7,)))
+    return manager
+
+
+def test_slow_query_is_logged_with_method_name(manager):
+    assert manager.get_videos_with_views_above(100000) == 7
+    assert manager._slow_query_log.methods == ['get_videos_with_views_above']
+
+
+def test_method_name_survives_wrapping(manager):
+    def timed(*args):
+        return manager._execute(*args)
+
+    timed('get_total_videos', FakeCursor(None), "SELECT COUNT(*) FROM videos")
+    assert manager._slow_query_log.methods == ['get_total_videos']
+
+
+def test_fast_queries_are_not_logged(manager, monkeypatch):
+    monkeypatch.setattr(Config, 'SLOW_QUERY_MS', 0)
+    manager.get_videos_with_views_above(100000)
+    assert manager._slow_query_log.methods == []
+
+
+class FakeDatabase:
+    """Таблица videos из одних креаторов и строка stats_counters с версией данных."""
+
+    def __init__(self, creators, version=1):
+        self.creators = list(creators)
+        self.version = version
+        self.statements = []
+
+    def cursor(self):
+        return FakeDatabaseCursor(self)
+
+    def close(self):
+        pass
+
+    def aggregates(self):
+        return [sql for sql in self.statements if 'COUNT' in sql]
+
+
+class FakeDatabaseCursor(FakeCursor):
+    def __init__(self, database):
+        super().__init__(None)
+        self.database = database
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.database.statements.append(sql)
+        if 'dataset_version' in sql:
+            self.rows = [(self.database.version,)]
+        elif sql == "SELECT DISTINCT creator_id FROM videos":
+            self.rows = [(creator_id,) for creator_id in self.database.creators]
+        else:
+            self.rows = [(5,)]
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase(['a' * 32])
+    manager = QueryManager()
+    monkeypatch.setattr(manager, '_get_connection', lambda blocking=True: database)
+    manager.check_dataset_version(force=True)
+    database.statements.clear()
+    return manager, database
+
+
+def test_unknown_creator_is_answered_without_aggregate(database):
+    manager, database = database
+    assert manager.get_videos_by_creator('f' * 32) == 0
+    assert database.statements == ["SELECT dataset_version FROM stats_counters WHERE id = 1"]
+
+
+def test_creator_added_after_index_build_is_found(database):
+    manager, database = database
+    database.creators.append('f' * 32)
+    database.version += 1
+
+    assert manager.get_videos_by_creator('f' * 32) == 5
+    assert len(database.aggregates()) == 1
+    assert 'f' * 32 in manager.creator_index
+
+
+@pytest.mark.parametrize('method, args', [
+    ('get_unique_publishing_days_for_creator', ('a' * 32, date(2025, 11, 1), date(2025, 11, 30))),
+    ('get_total_views_for_all_videos_period', (date(2025, 11, 1), date(2025, 11, 30))),
+    ('get_total_views_growth_for_creator_with_time_period', ('a' * 32, date(2025, 11, 28), time(10), time(15))),
+    ('get_unique_creators_with_high_views', (100000,)),
+])
+def test_one_query_per_answer(database, method, args):
+    manager, database = database
+    assert getattr(manager, method)(*args) == 5
+    assert len(database.statements) == 1
@@ -0,0 +1,81 @@
+from datetime import date, time
+
+import pytest
+
+from bot.temporal import MAX_RELATIVE_DAYS, TEMPORAL_PARSER, tokenize
+
+TODAY = date(2025, 11, 28)  # пятница
+
+
+def dates(text):
+    return TEMPORAL_PARSER.parse(text, TODAY).dates
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("28 ноября 2025", (date(2025, 11, 28), date(2025, 11, 28))),
+    ("с 1 ноября 2025 по 5 ноября 2025", (date(2025, 11, 1), date(2025, 11, 5))),
+    ("с 1 по 5 ноября 2025", (date(2025, 11, 1), date(2025, 11, 5))),
+    ("в июне 2025 года", (date(2025, 6, 1), date(2025, 6, 30))),
+    ("за 2025 год", (date(2025, 1, 1), date(2025, 12, 31))),
+    ("2025-11-05", (date(2025, 11, 5), date(2025, 11, 5))),
+])
+def test_absolute_dates(text, expected):
+    assert dates(text) == expected
+    assert not TEMPORAL_PARSER.parse(text, TODAY).relative
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("вчера", (date(2025, 11, 27), date(2025, 11, 27))),
+    ("за последние 7 дней", (date(2025, 11, 22), date(2025, 11, 28))),
+    ("за последнюю неделю", (date(2025, 11, 22), date(2025, 11, 28))),
+    ("за 3 дня", (date(2025, 11, 26), date(2025, 11, 28))),
+    ("за день", (date(2025, 11, 28), date(2025, 11, 28))),
+    ("новые просмотры за неделю", (date(2025, 11, 22), date(2025, 11, 28))),
+    ("на прошлой неделе", (date(2025, 11, 17), date(2025, 11, 23))),
+    ("на этой неделе", (date(2025, 11, 24), date(2025, 11, 28))),
+    ("в прошлом месяце", (date(2025, 10, 1), date(2025, 10, 31))),
+])
+def test_relative_dates(text, expected):
+    assert dates(text) == expected
+    assert TEMPORAL_PARSER.parse(text, TODAY).relative
+
+
+def test_last_days_window_length():
+    first, last = dates("за последние 7 дней")
+    assert (last - first).days + 1 == 7
+
+
+@pytest.mark.parametrize('count', ['1000000', '9' * 40, '9' * 5000])
+def test_huge_relative_period_is_clamped(count):
+    first, last = dates(f"прирост за последние {count} дней")
+    assert last == TODAY
+    assert (last - first).days + 1 == MAX_RELATIVE_DAYS
+
+
+def test_zero_relative_period_is_ignored():
+    assert dates("за последние 0 дней") is None
+
+
+def test_invalid_calendar_date_is_ignored():
+    assert dates("2025-02-31") is None
+
+
+def test_time_window():
+    expression = TEMPORAL_PARSER.parse("с 10:00 до 15:00 28 ноября 2025", TODAY)
+    assert expression.time_window == (time(10, 0), time(15, 0))
+    assert expression.dates == (date(2025, 11, 28), date(2025, 11, 28))
+
+
+def test_more_precise_expression_wins():
+    assert dates("просмотры в ноябре 2025, а именно 5 ноября 2025") == (date(2025, 11, 5), date(2025, 11, 5))
+
+
+def test_tokenize():
+    assert tokenize("С 10:00, 2025-11-05!") == [
+        ('word', 'с'), ('clock', '10:00'), ('iso', '2025-11-05')
+    ]
+
+
+def test_numbers_of_the_chosen_expression():
+    assert TEMPORAL_PARSER.parse("просмотры больше 5000 за последние 1000 дней", TODAY).numbers == ('1000',)
+    assert TEMPORAL_PARSER.parse("с 10:00 до 15:00 вчера", TODAY).numbers == ('10', '00', '15', '00')
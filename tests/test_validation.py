@@ -0,0 +1,61 @@
+from database.validation import ValidationReport, build_frames, validate_frames
+
+
+def snapshot(snapshot_id, created_at, views, delta_views=0):
+    return {
+        'id': snapshot_id, 'created_at': created_at,
+        'views_count': views, 'likes_count': 0, 'comments_count': 0, 'reports_count': 0,
+        'delta_views_count': delta_views, 'delta_likes_count': 0,
+        'delta_comments_count': 0, 'delta_reports_count': 0,
+    }
+
+
+def video(video_id, snapshots):
+    return {
+        'id': video_id, 'creator_id': 'c1', 'video_created_at': '2025-11-01T10:00:00+00:00',
+        'views_count': 0, 'likes_count': 0, 'comments_count': 0, 'reports_count': 0,
+        'snapshots': snapshots,
+    }
+
+
+def validate(videos):
+    report = ValidationReport()
+    videos_df, snapshots_df = validate_frames(*build_frames(videos), report)
+    return videos_df, snapshots_df, report
+
+
+def test_recomputes_deltas_in_time_order():
+    _, snapshots_df, report = validate([video('v1', [
+        snapshot('s2', '2025-11-01T12:00:00+00:00', 150, delta_views=999),
+        snapshot('s1', '2025-11-01T11:00:00+00:00', 100, delta_views=100),
+    ])])
+
+    assert list(snapshots_df['snapshot_id']) == ['s1', 's2']
+    assert list(snapshots_df['delta_views_count']) == [100, 50]
+    assert report.counts['out_of_order'] == 1
+    assert report.counts['delta_views_count_mismatch'] == 1
+
+
+def test_drops_invalid_and_duplicate_snapshots():
+    _, snapshots_df, report = validate([video('v1', [
+        snapshot('s1', '2025-11-01T11:00:00+00:00', 100, delta_views=100),
+        snapshot('s1', '2025-11-01T11:00:00+00:00', 100, delta_views=100),
+        snapshot('s2', 'garbage', 120),
+    ])])
+
+    assert list(snapshots_df['snapshot_id']) == ['s1']
+    assert report.counts['duplicate_snapshot_ids'] == 1
+    assert report.counts['invalid_created_at'] == 1
+    assert report.samples['invalid_created_at'] == ['s2']
+
+
+def test_batch_with_only_invalid_snapshots():
+    videos_df, snapshots_df, report = validate([video('v1', [
+        snapshot('s1', 'garbage', 100),
+        snapshot('s2', 'garbage', 120),
+    ])])
+
+    assert len(videos_df) == 1
+    assert snapshots_df.empty
+    assert report.counts['invalid_created_at'] == 2
+    assert report.counts['snapshots'] == 0